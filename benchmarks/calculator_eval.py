@@ -0,0 +1,60 @@
+"""
+Throughput of the calculator tool's evaluator against plain eval().
+
+For a few typical expressions, prints calls per second of
+  eval      eval(expression, {"__builtins__": {}}), the old calculator
+  cold      expression_eval.evaluate with an empty cache (parse, validate,
+            compile into closures, run)
+  cached    expression_eval.evaluate for an expression seen before
+
+Usage, from the repository root:
+  python benchmarks/calculator_eval.py [seconds per measurement]
+"""
+import math
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib import expression_eval  # noqa: E402
+
+EXPRESSIONS = [
+    "1 + 2",
+    "(3.5 * 4 - 2) / 7",
+    "2 ** 64 % 1000007",
+    "max(3, 9, 4) * sqrt(16) - round(2.567, 2)",
+    "((1 + 2) * (3 + 4) - (5 - 6) * 7) // 3 < 100 and 10 % 4 == 2",
+]
+
+
+def rate(stmt, seconds: float) -> float:
+    timer = timeit.Timer(stmt)
+    number, elapsed = timer.autorange()
+    runs = max(1, int(number * seconds / elapsed))
+    return runs / min(timer.repeat(repeat=3, number=runs))
+
+
+def main() -> None:
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 0.2
+    # The old path had no functions at all; give it these so it can run
+    # the same expressions
+    env = {"__builtins__": {}, "max": max, "round": round, "sqrt": math.sqrt}
+    print("Calls per second (best of 3).")
+    print(f"{'expression':<48} {'eval':>10} {'cold':>10} {'cached':>10}")
+    for expr in EXPRESSIONS:
+        def cold():
+            expression_eval.compile_expression.cache_clear()
+            return expression_eval.evaluate(expr)
+
+        expression_eval.evaluate(expr)
+        print(
+            f"{expr[:48]:<48} "
+            f"{rate(lambda: eval(expr, env), seconds):>10,.0f} "
+            f"{rate(cold, seconds):>10,.0f} "
+            f"{rate(lambda: expression_eval.evaluate(expr), seconds):>10,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
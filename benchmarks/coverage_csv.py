@@ -0,0 +1,59 @@
+"""
+Load latency of coverage totals from jacoco.csv vs jacoco.xml.
+
+Times, without any caching, how long it takes to get the report totals
+  xml   coverage_index.build_index (streaming parse of the whole report)
+  tail  coverage_index.report_totals (report counters at the end of the XML)
+  csv   coverage_csv.build (flat table, column sums)
+and prints the totals where they differ from the full parse (the CSV's
+LINE total counts lines shared by two classes twice).
+
+Usage, from the repository root:
+  python benchmarks/coverage_csv.py [report dir] [runs]
+"""
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lib import coverage_csv  # noqa: E402
+from lib import coverage_index  # noqa: E402
+
+DEFAULT_DIR = os.path.join(ROOT, "codebase", "target", "site", "jacoco")
+
+
+def timed(func, path: str, runs: int) -> tuple:
+    samples = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        result = func(path)
+        samples.append(time.perf_counter() - t)
+    return statistics.median(samples) * 1000, min(samples) * 1000, result
+
+
+def main() -> None:
+    report_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DIR
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    xml_path = os.path.join(report_dir, "jacoco.xml")
+    csv_path = os.path.join(report_dir, "jacoco.csv")
+
+    xml_med, xml_min, index = timed(coverage_index.build_index, xml_path, runs)
+    tail_med, tail_min, tail = timed(coverage_index.report_totals, xml_path, runs)
+    csv_med, csv_min, data = timed(coverage_csv.build, csv_path, runs)
+
+    print(f"{'source':>6} {'KB':>8} {'median ms':>10} {'min ms':>8}")
+    print(f"{'xml':>6} {os.path.getsize(xml_path) / 1024:>8.0f} {xml_med:>10.2f} {xml_min:>8.2f}")
+    print(f"{'tail':>6} {coverage_index.REPORT_TAIL_BYTES / 1024:>8.0f} {tail_med:>10.2f} {tail_min:>8.2f}")
+    print(f"{'csv':>6} {os.path.getsize(csv_path) / 1024:>8.0f} {csv_med:>10.2f} {csv_min:>8.2f}")
+
+    for ctype, counts in index.totals.items():
+        for name, totals in (("tail", tail or {}), ("csv", data.totals)):
+            if totals.get(ctype) != counts:
+                print(f"{ctype}: xml {counts} {name} {totals.get(ctype)}")
+
+
+if __name__ == "__main__":
+    main()
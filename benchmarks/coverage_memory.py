@@ -0,0 +1,94 @@
+"""
+Peak memory of JaCoCo report ingestion as the report grows.
+
+Builds synthetic jacoco.xml files by repeating the packages of the real
+report under new names (x1, x4, x16, ... the original size), then parses
+each one in a fresh interpreter with the DOM path (ET.parse) and with the
+streaming path (coverage_index.build_index) and prints peak RSS.
+
+The streaming parser's own overhead stays flat; what still grows is the
+index it returns, which is proportional to the number of methods.
+
+Usage, from the repository root:
+  python benchmarks/coverage_memory.py [path/to/jacoco.xml] [max-scale]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_REPORT = os.path.join(ROOT, "codebase", "target", "site", "jacoco", "jacoco.xml")
+
+# Run in a child process so each measurement starts from a clean heap
+CHILD = r"""
+import sys
+sys.path.insert(0, {root!r})
+if {mode!r} == "dom":
+    import xml.etree.ElementTree as ET
+    root = ET.parse({path!r}).getroot()
+    totals = [c.get("type") for c in root.findall("counter")]
+else:
+    from lib import coverage_index
+    totals = list(coverage_index.build_index({path!r}).totals)
+if sys.platform.startswith("linux"):
+    # VmHWM belongs to this exec'd image; ru_maxrss would also count the
+    # parent's memory inherited through fork
+    with open("/proc/self/status") as f:
+        print(next(int(l.split()[1]) for l in f if l.startswith("VmHWM")) / 1024)
+elif sys.platform == "win32":
+    import psutil
+    print(psutil.Process().memory_info().peak_wset / (1024 * 1024))
+else:
+    import resource
+    # ru_maxrss is in bytes on macOS
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024))
+"""
+
+
+def make_scaled_report(source: str, scale: int, out_path: str) -> None:
+    tree = ET.parse(source)
+    root = tree.getroot()
+    packages = root.findall("package")
+    counters = root.findall("counter")
+    for elem in packages + counters:
+        root.remove(elem)
+    for i in range(scale):
+        for pkg in packages:
+            copy = ET.fromstring(ET.tostring(pkg))
+            copy.set("name", f"{pkg.get('name')}/copy{i}")
+            for cls in copy.iter("class"):
+                cls.set("name", f"{cls.get('name')}_copy{i}")
+            root.append(copy)
+    root.extend(counters)
+    tree.write(out_path, encoding="UTF-8", xml_declaration=True)
+
+
+def measure(mode: str, path: str) -> float:
+    code = CHILD.format(root=ROOT, mode=mode, path=path)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(out.stdout)
+
+
+def main() -> None:
+    source = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_REPORT
+    max_scale = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+
+    print("Peak RSS in MB; the streaming column includes the index it builds.")
+    print(f"{'scale':>6} {'size MB':>8} {'DOM':>9} {'stream':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        scale = 1
+        while scale <= max_scale:
+            path = os.path.join(tmp, f"jacoco_x{scale}.xml")
+            make_scaled_report(source, scale, path)
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            dom = measure("dom", path)
+            stream = measure("stream", path)
+            print(f"{scale:>6} {size_mb:>8.1f} {dom:>9.1f} {stream:>9.1f}")
+            os.remove(path)
+            scale *= 4
+
+
+if __name__ == "__main__":
+    main()
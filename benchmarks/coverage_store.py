@@ -0,0 +1,76 @@
+"""
+Coverage store: restart load time and top-N query latency.
+
+Load: what a restarted server pays before its first coverage query,
+  xml     coverage_index.build_index on jacoco.xml
+  store   coverage_store.open_store on the mapped column file
+Query: coverage_hotspots-style top-N queries (median over a mix of levels,
+counters and prefixes) on the dict index vs the column store.
+
+Usage, from the repository root:
+  python benchmarks/coverage_store.py [path/to/jacoco.xml] [runs]
+"""
+import itertools
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lib import coverage_index  # noqa: E402
+from lib import coverage_store  # noqa: E402
+
+DEFAULT_REPORT = os.path.join(ROOT, "codebase", "target", "site", "jacoco", "jacoco.xml")
+
+QUERIES = list(itertools.product(
+    ("package", "class", "method"),
+    ("LINE", "BRANCH"),
+    ("missed", "percent"),
+    ("", "org.apache.commons.lang3.text"),
+))
+
+
+def median_ms(func, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - t)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    report = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_REPORT
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    index = coverage_index.build_index(report)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "coverage_store.bin")
+        coverage_store.save(index, path)
+        store = coverage_store.open_store(path)
+
+        print(f"store file {os.path.getsize(path) / 1024:.0f} KB, "
+              f"{store.rows['method']} methods")
+        print(f"load   xml {median_ms(lambda: coverage_index.build_index(report), runs):8.2f} ms"
+              f"   store {median_ms(lambda: coverage_store.open_store(path), runs):8.2f} ms")
+
+        def run_index():
+            for level, ctype, order, prefix in QUERIES:
+                coverage_index.top_nodes(index, level, ctype, 10, prefix, order)
+
+        def run_store():
+            for level, ctype, order, prefix in QUERIES:
+                coverage_store.top_nodes(store, level, ctype, 10, prefix, order)
+
+        n = len(QUERIES)
+        print(f"query  index {median_ms(run_index, runs) / n:6.3f} ms"
+              f"   store {median_ms(run_store, runs) / n:6.3f} ms   (per query, {n} queries)")
+        # The mapping has to be released before the directory is removed
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
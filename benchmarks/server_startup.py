@@ -0,0 +1,88 @@
+"""
+Server cold start and first-call latency, eager vs lazy tool loading.
+
+Each measurement runs in a fresh interpreter. "start" is the time to
+import server.py (FastMCP plus tool registration), "process" the wall time
+of the whole child including interpreter start-up and "fastmcp" the part
+of "start" spent importing FastMCP itself. Then one cheap tool of
+every module is called through an in-memory FastMCP client and the latency
+of that first call is printed; in lazy mode it includes importing the
+tool's module.
+
+Eager mode (MCP_EAGER_TOOLS=1) imports every tool module at start-up, as
+the server did before the registry.
+
+Usage, from the repository root:
+  python benchmarks/server_startup.py [runs]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# One cheap, read-only call per tool module
+FIRST_CALLS = [
+    ("coverage", "coverage_hotspots", {"top": 1}),
+    ("generation", "suggest_boundary_tests", {"description": "n between 0 and 10"}),
+    ("git", "git_status", {}),
+    ("maven", "list_maven_jobs", {}),
+]
+
+CHILD = r"""
+import asyncio, json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+from fastmcp import Client
+fastmcp = time.perf_counter() - started
+import server
+start = time.perf_counter() - started
+
+async def calls():
+    out = {{}}
+    async with Client(server.mcp) as client:
+        for plugin, name, args in {calls!r}:
+            t = time.perf_counter()
+            await client.call_tool(name, args)
+            out[plugin] = time.perf_counter() - t
+    return out
+
+print(json.dumps({{"fastmcp": fastmcp, "start": start, "calls": asyncio.run(calls())}}))
+"""
+
+
+def measure(eager: bool) -> dict:
+    env = dict(os.environ, MCP_EAGER_TOOLS="1" if eager else "0")
+    code = CHILD.format(root=ROOT, calls=FIRST_CALLS)
+    t = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                         check=True, env=env, cwd=ROOT)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["process"] = time.perf_counter() - t
+    return result
+
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    # Warm the OS file cache, .pyc files and the tool manifest
+    measure(False)
+    measure(True)
+
+    print(f"Median of {runs} runs, ms.")
+    print(f"{'mode':>6} {'process':>8} {'start':>7} {'fastmcp':>8} " + " ".join(f"{p:>10}" for p, _, _ in FIRST_CALLS))
+    for eager in (True, False):
+        samples = [measure(eager) for _ in range(runs)]
+
+        def med(get):
+            return statistics.median(get(s) for s in samples) * 1000
+
+        row = f"{'eager' if eager else 'lazy':>6} {med(lambda s: s['process']):>8.1f} {med(lambda s: s['start']):>7.1f} {med(lambda s: s['fastmcp']):>8.1f} "
+        row += " ".join(f"{med(lambda s, p=p: s['calls'][p]):>10.1f}" for p, _, _ in FIRST_CALLS)
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+/*
+ * Licensed to the Apache Software Foundation (ASF) under one or more
+ * contributor license agreements.  See the NOTICE file distributed with
+ * this work for additional information regarding copyright ownership.
+ * The ASF licenses this file to You under the Apache License, Version 2.0
+ * (the "License"); you may not use this file except in compliance with
+ * the License.  You may obtain a copy of the License at
+ *
+ *      http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+package org.apache.commons.lang3;
+
+import java.lang.reflect.Method;
+
+import org.junit.runner.Description;
+import org.junit.runner.Result;
+import org.junit.runner.notification.RunListener;
+
+/**
+ * Surefire listener that records JaCoCo coverage per test class.
+ *
+ * <p>When a new test class starts, the execution data collected so far is
+ * dumped (and reset) under a session named after the previous test class,
+ * so {@code target/jacoco.exec} ends up with one session per test class.
+ * Enabled by the {@code jacoco-per-test} profile; does nothing when the
+ * JaCoCo agent is not attached.</p>
+ *
+ * <p>The agent is reached through reflection so the tests do not need the
+ * JaCoCo runtime on their compile classpath.</p>
+ */
+public class PerTestCoverageListener extends RunListener {
+
+    private Object agent;
+    private Method setSessionId;
+    private Method dump;
+    private String currentClass;
+
+    public PerTestCoverageListener() {
+        try {
+            final Class<?> rt = Class.forName("org.jacoco.agent.rt.RT");
+            final Class<?> agentType = Class.forName("org.jacoco.agent.rt.IAgent");
+            agent = rt.getMethod("getAgent").invoke(null);
+            setSessionId = agentType.getMethod("setSessionId", String.class);
+            dump = agentType.getMethod("dump", boolean.class);
+        } catch (final Exception e) {
+            agent = null;
+        }
+    }
+
+    @Override
+    public void testStarted(final Description description) throws Exception {
+        final String className = description.getClassName();
+        if (agent == null || className == null || className.equals(currentClass)) {
+            return;
+        }
+        if (currentClass != null) {
+            dump.invoke(agent, Boolean.TRUE);
+        }
+        currentClass = className;
+        setSessionId.invoke(agent, className);
+    }
+
+    @Override
+    public void testRunFinished(final Result result) throws Exception {
+        if (agent != null && currentClass != null) {
+            dump.invoke(agent, Boolean.TRUE);
+            currentClass = null;
+        }
+    }
+}
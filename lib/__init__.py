@@ -0,0 +1,4 @@
+"""
+Helpers behind the tool modules: coverage and surefire report parsing,
+build logs, Maven job and process control, caches and the tool registry.
+"""
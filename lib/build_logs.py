@@ -0,0 +1,232 @@
+"""
+Build output spilled to disk.
+
+Each Maven run writes its combined stdout/stderr line by line to its own
+log file under the state directory; only the last lines are kept in
+memory as a ring buffer. Any range of lines can be fetched back from the
+file (a byte offset is recorded every OFFSET_STEP lines, so paging does
+not rescan the log) or searched with a regular expression. The newest
+MAX_LOGS logs are kept, older ones are deleted when a new run starts.
+"""
+import collections
+import itertools
+import os
+import re
+import threading
+import time
+
+LOG_SUFFIX = ".log"
+MAX_LOGS = 20
+BUFFER_LINES = 500
+OFFSET_STEP = 1000
+
+_ids = itertools.count(1)
+# log id -> BuildLog for the logs written by this process
+_open_logs: dict = {}
+_open_logs_lock = threading.Lock()
+
+
+class BuildLog:
+    """
+    One build's output: an append-only file plus the last lines in memory.
+    """
+
+    def __init__(self, path: str, buffer_lines: int = BUFFER_LINES, writable: bool = True):
+        self.path = path
+        self.id = os.path.basename(path)[:-len(LOG_SUFFIX)]
+        self.line_count = 0
+        self.buffer = collections.deque(maxlen=buffer_lines)
+        # offsets[k] is the byte offset of line k * OFFSET_STEP
+        self.offsets = [0]
+        self._size = 0
+        self._lock = threading.Lock()
+        self._file = open(path, "wb") if writable else None
+
+    @classmethod
+    def from_file(cls, path: str) -> "BuildLog":
+        """
+        Read-only view of a log written earlier (e.g. by a previous server run).
+        """
+        log = cls(path, writable=False)
+        with open(path, "rb") as f:
+            for raw in f:
+                log._count(raw)
+                log.buffer.append(raw.decode("utf-8", errors="replace").rstrip("\r\n"))
+        return log
+
+    def _count(self, raw: bytes) -> None:
+        self.line_count += 1
+        self._size += len(raw)
+        if self.line_count % OFFSET_STEP == 0:
+            self.offsets.append(self._size)
+
+    @property
+    def closed(self) -> bool:
+        return self._file is None
+
+    def add(self, line: str) -> None:
+        raw = (line + "\n").encode("utf-8", errors="replace")
+        with self._lock:
+            if self._file is not None:
+                self._file.write(raw)
+            self._count(raw)
+            self.buffer.append(line)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def lines(self, start: int, count: int) -> list[str]:
+        """
+        Lines start .. start + count - 1 (0-based), from memory when they
+        are still in the ring buffer, otherwise from the file.
+        """
+        start = max(start, 0)
+        end = min(start + max(count, 0), self.line_count)
+        if start >= end:
+            return []
+        first_buffered = self.line_count - len(self.buffer)
+        if start >= first_buffered:
+            return list(itertools.islice(self.buffer, start - first_buffered, end - first_buffered))
+
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+        block = start // OFFSET_STEP
+        out = []
+        with open(self.path, "rb") as f:
+            f.seek(self.offsets[block])
+            for n, raw in enumerate(f, block * OFFSET_STEP):
+                if n >= end:
+                    break
+                if n >= start:
+                    out.append(raw.decode("utf-8", errors="replace").rstrip("\r\n"))
+        return out
+
+    def tail(self, chars: int) -> str:
+        """
+        About the last `chars` characters of output, cut at a line start.
+        """
+        out = []
+        size = 0
+        for line in reversed(self.buffer):
+            if out and size + len(line) + 1 > chars:
+                break
+            out.append(line)
+            size += len(line) + 1
+        return "\n".join(reversed(out))
+
+    def grep(self, pattern: str, context: int = 3, max_matches: int = 20,
+             ignore_case: bool = False) -> tuple[list, int]:
+        """
+        Search the whole log for a regular expression.
+
+        Returns ([(first line number, [lines])...], total matches). Each block
+        holds a match with `context` lines around it; overlapping blocks are
+        merged.
+        """
+        regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+        blocks = []
+        before = collections.deque(maxlen=context)
+        matches = 0
+        after = 0
+        with open(self.path, "rb") as f:
+            for n, raw in enumerate(f):
+                line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+                if regex.search(line):
+                    matches += 1
+                    if matches <= max_matches:
+                        if blocks and blocks[-1][0] + len(blocks[-1][1]) == n - len(before):
+                            blocks[-1][1].extend(before)
+                        else:
+                            blocks.append((n - len(before), list(before)))
+                        blocks[-1][1].append(line)
+                        before.clear()
+                        after = context
+                        continue
+                if after > 0 and blocks:
+                    blocks[-1][1].append(line)
+                    after -= 1
+                else:
+                    before.append(line)
+        return blocks, matches
+
+
+def _prune(log_dir: str, keep: int) -> None:
+    logs = sorted(
+        (os.path.join(log_dir, f) for f in os.listdir(log_dir) if f.endswith(LOG_SUFFIX)),
+        key=os.path.getmtime,
+    )
+    for path in logs[:max(len(logs) - keep, 0)]:
+        log_id = os.path.basename(path)[:-len(LOG_SUFFIX)]
+        with _open_logs_lock:
+            log = _open_logs.get(log_id)
+        if log is not None and not log.closed:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        with _open_logs_lock:
+            _open_logs.pop(log_id, None)
+
+
+def open_log(log_dir: str, name: str = "build") -> BuildLog:
+    """
+    Start a new log in log_dir, deleting the oldest ones beyond MAX_LOGS.
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    _prune(log_dir, MAX_LOGS - 1)
+    log_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_ids)}-{name}"
+    log = BuildLog(os.path.join(log_dir, log_id + LOG_SUFFIX))
+    with _open_logs_lock:
+        _open_logs[log.id] = log
+    return log
+
+
+def forget(log: BuildLog) -> None:
+    """
+    Drop a closed log from memory; find_log reads it back from its file.
+    """
+    with _open_logs_lock:
+        if log.closed and _open_logs.get(log.id) is log:
+            del _open_logs[log.id]
+
+
+def list_logs(log_dir: str) -> list[str]:
+    """
+    Log ids in log_dir, newest first.
+    """
+    if not os.path.isdir(log_dir):
+        return []
+    paths = [os.path.join(log_dir, f) for f in os.listdir(log_dir) if f.endswith(LOG_SUFFIX)]
+    paths.sort(key=os.path.getmtime, reverse=True)
+    return [os.path.basename(p)[:-len(LOG_SUFFIX)] for p in paths]
+
+
+def find_log(log_dir: str, log_id: str) -> BuildLog | None:
+    """
+    The log with this id, or the newest log when log_id is empty.
+    """
+    if not log_id:
+        ids = list_logs(log_dir)
+        if not ids:
+            return None
+        log_id = ids[0]
+    with _open_logs_lock:
+        log = _open_logs.get(log_id)
+    if log is not None:
+        return log
+    path = os.path.join(log_dir, log_id + LOG_SUFFIX)
+    if os.path.dirname(os.path.abspath(path)) != os.path.abspath(log_dir) or not os.path.exists(path):
+        return None
+    log = BuildLog.from_file(path)
+    with _open_logs_lock:
+        _open_logs[log_id] = log
+    return log
@@ -0,0 +1,451 @@
+"""
+Where JaCoCo puts its probes in a class file.
+
+JaCoCo numbers the probes of a class in method order while its
+instrumenter walks the bytecode (ClassProbesAdapter, LabelFlowAnalyzer,
+MethodProbesAdapter). A probe is inserted
+
+  - at every return and athrow,
+  - on every jump to a label that is reached from more than one place,
+  - on every distinct such label of a switch,
+  - before a label reached both by fall-through and by a jump, a try
+    block start, or the first line of a line that invokes a method.
+
+Replaying those rules over the class file gives, for each probe id, the
+method it belongs to and the source lines it proves executed (the
+instructions before it, following JaCoCo's predecessor chains back to the
+previous probe). With that, the probe arrays of jacoco.exec turn into
+method and line coverage without running JaCoCo's report.
+
+Line numbers come from LineNumberTable; JaCoCo's report filters
+(synthetic methods, compiler generated code, ...) are not applied.
+"""
+import os
+import struct
+import threading
+from dataclasses import dataclass, field
+
+# Opcodes with special meaning for probe placement
+_IRETURN, _RETURN, _ATHROW = 172, 177, 191
+_GOTO, _GOTO_W = 167, 200
+_JSR, _RET, _JSR_W = 168, 169, 201
+_TABLESWITCH, _LOOKUPSWITCH = 170, 171
+_WIDE = 196
+_IINC = 132
+
+_BRANCH2 = set(range(153, 169)) | {198, 199}
+_BRANCH4 = {_GOTO_W, _JSR_W}
+_INVOKES = set(range(182, 187))
+
+# Instruction length by opcode, for the fixed-length instructions
+_LENGTHS = {}
+for _op in range(0, 16):
+    _LENGTHS[_op] = 1
+for _op in (16, 18, 21, 22, 23, 24, 25, 54, 55, 56, 57, 58, 169, 188):
+    _LENGTHS[_op] = 2
+for _op in range(26, 54):
+    _LENGTHS[_op] = 1
+for _op in range(59, 132):
+    _LENGTHS[_op] = 1
+for _op in (17, 19, 20, 132, 178, 179, 180, 181, 182, 183, 184, 187, 189, 192, 193, 198, 199):
+    _LENGTHS[_op] = 3
+for _op in range(133, 153):
+    _LENGTHS[_op] = 1
+for _op in range(153, 169):
+    _LENGTHS[_op] = 3
+for _op in range(172, 178):
+    _LENGTHS[_op] = 1
+for _op in (190, 191, 194, 195):
+    _LENGTHS[_op] = 1
+_LENGTHS[197] = 4
+for _op in (185, 186, 200, 201):
+    _LENGTHS[_op] = 5
+
+
+class ClassFormatError(ValueError):
+    pass
+
+
+@dataclass(slots=True)
+class MethodProbes:
+    """
+    Probes of one method: ids first_probe .. first_probe + probe_count - 1.
+    """
+    name: str
+    desc: str
+    first_probe: int
+    probe_count: int
+    first_line: int | None
+    last_line: int | None
+    lines: frozenset = frozenset()
+
+    @property
+    def signature(self) -> str:
+        return self.name + self.desc
+
+
+@dataclass(slots=True)
+class ClassProbes:
+    """
+    Probe layout of one class.
+
+    probe_lines[i] is the set of source lines executed when probe i was hit.
+    """
+    name: str
+    source_file: str | None
+    probe_count: int
+    methods: list = field(default_factory=list)
+    probe_lines: list = field(default_factory=list)
+    probe_method: list = field(default_factory=list)
+
+    def covered_lines(self, probes: list) -> set:
+        lines = set()
+        for i, hit in enumerate(probes):
+            if hit:
+                lines.update(self.probe_lines[i])
+        return lines
+
+    def covered_methods(self, probes: list) -> list:
+        hit = {self.probe_method[i] for i, p in enumerate(probes) if p}
+        return [m for i, m in enumerate(self.methods) if i in hit]
+
+
+class _Label:
+    __slots__ = ("target", "successor", "multi", "invocation_line", "done")
+
+    def __init__(self):
+        self.target = False
+        self.successor = False
+        self.multi = False
+        self.invocation_line = False
+        self.done = False
+
+    def set_target(self):
+        if self.target or self.successor:
+            self.multi = True
+        else:
+            self.target = True
+
+    def set_successor(self):
+        self.successor = True
+        if self.target:
+            self.multi = True
+
+    def needs_probe(self) -> bool:
+        return self.successor and (self.multi or self.invocation_line)
+
+
+class _Insn:
+    __slots__ = ("offset", "opcode", "targets", "default")
+
+    def __init__(self, offset, opcode, targets=(), default=None):
+        self.offset = offset
+        self.opcode = opcode
+        # Jump/switch targets as absolute offsets (switch: case targets)
+        self.targets = targets
+        self.default = default
+
+
+def _decode(code: bytes) -> list:
+    insns = []
+    pc = 0
+    n = len(code)
+    while pc < n:
+        op = code[pc]
+        if op in _BRANCH2:
+            insns.append(_Insn(pc, op, (pc + struct.unpack_from(">h", code, pc + 1)[0],)))
+            pc += 3
+        elif op in _BRANCH4:
+            insns.append(_Insn(pc, op, (pc + struct.unpack_from(">i", code, pc + 1)[0],)))
+            pc += 5
+        elif op == _TABLESWITCH:
+            p = (pc + 4) & ~3
+            default, low, high = struct.unpack_from(">iii", code, p)
+            offsets = struct.unpack_from(f">{high - low + 1}i", code, p + 12)
+            insns.append(_Insn(pc, op, tuple(pc + o for o in offsets), pc + default))
+            pc = p + 12 + 4 * (high - low + 1)
+        elif op == _LOOKUPSWITCH:
+            p = (pc + 4) & ~3
+            default, npairs = struct.unpack_from(">ii", code, p)
+            pairs = struct.unpack_from(f">{2 * npairs}i", code, p + 8)
+            insns.append(_Insn(pc, op, tuple(pc + o for o in pairs[1::2]), pc + default))
+            pc = p + 8 + 8 * npairs
+        elif op == _WIDE:
+            insns.append(_Insn(pc, code[pc + 1]))
+            pc += 6 if code[pc + 1] == _IINC else 4
+        elif op in _LENGTHS:
+            insns.append(_Insn(pc, op))
+            pc += _LENGTHS[op]
+        else:
+            raise ClassFormatError(f"Unknown opcode {op} at offset {pc}")
+    return insns
+
+
+def _analyze_method(code: bytes, handlers: list, line_table: list, next_probe: int):
+    """
+    Replay JaCoCo's probe insertion over one method body.
+
+    handlers is [(start_pc, handler_pc)], line_table [(start_pc, line)].
+    Returns (probe count, {probe id: lines}, all lines of the method).
+    """
+    insns = _decode(code)
+    if any(i.opcode in (_JSR, _RET, _JSR_W) for i in insns):
+        raise ClassFormatError("Subroutines (jsr/ret) are not supported")
+
+    labels = {}
+
+    def label(offset):
+        lab = labels.get(offset)
+        if lab is None:
+            lab = labels[offset] = _Label()
+        return lab
+
+    # ASM creates every label while reading the method, before any of them
+    # is visited, so backward jump targets exist when the flow pass reaches them
+    lines_at = {}
+    for start_pc, line in line_table:
+        lines_at.setdefault(start_pc, []).append(line)
+        label(start_pc)
+    for insn in insns:
+        for target in insn.targets:
+            label(target)
+        if insn.default is not None:
+            label(insn.default)
+
+    # LabelFlowAnalyzer: try/catch blocks first, then the instructions
+    for start_pc, handler_pc in handlers:
+        label(start_pc).set_target()
+        label(handler_pc).set_target()
+
+    successor = False
+    first = True
+    line_start = None
+    for insn in insns:
+        lab = labels.get(insn.offset)
+        if lab is not None:
+            if first:
+                lab.set_target()
+            if successor:
+                lab.set_successor()
+            if insn.offset in lines_at:
+                line_start = lab
+        op = insn.opcode
+        first = False
+        if op in _BRANCH2 or op in _BRANCH4:
+            label(insn.targets[0]).set_target()
+            successor = op not in (_GOTO, _GOTO_W)
+        elif op in (_TABLESWITCH, _LOOKUPSWITCH):
+            seen = set()
+            for target in (insn.default,) + insn.targets:
+                if target not in seen:
+                    label(target).set_target()
+                    seen.add(target)
+            successor = False
+        elif _IRETURN <= op <= _RETURN or op == _ATHROW:
+            successor = False
+        else:
+            successor = True
+            if op in _INVOKES and line_start is not None:
+                line_start.invocation_line = True
+
+    # MethodProbesAdapter: assign probe ids in visiting order and note
+    # which instruction each probe is attached to
+    probe_insn = {}
+    predecessor = [None] * len(insns)
+    jumps = []
+    index_at = {insn.offset: idx for idx, insn in enumerate(insns)}
+    line_of = []
+    current_line = None
+    falls_through = False
+    probe = next_probe
+
+    for idx, insn in enumerate(insns):
+        lab = labels.get(insn.offset)
+        if lab is not None and lab.needs_probe():
+            probe_insn[probe] = idx - 1
+            probe += 1
+            falls_through = False
+        if insn.offset in lines_at:
+            current_line = lines_at[insn.offset][-1]
+        line_of.append(current_line)
+        if falls_through:
+            predecessor[idx] = idx - 1
+
+        op = insn.opcode
+        if _IRETURN <= op <= _RETURN or op == _ATHROW:
+            probe_insn[probe] = idx
+            probe += 1
+            falls_through = False
+        elif op in _BRANCH2 or op in _BRANCH4:
+            target = insn.targets[0]
+            if labels[target].multi:
+                probe_insn[probe] = idx
+                probe += 1
+            else:
+                jumps.append((idx, target))
+            falls_through = op not in (_GOTO, _GOTO_W)
+        elif op in (_TABLESWITCH, _LOOKUPSWITCH):
+            done = set()
+            for target in (insn.default,) + insn.targets:
+                if target in done:
+                    continue
+                done.add(target)
+                if labels[target].multi:
+                    probe_insn[probe] = idx
+                    probe += 1
+                else:
+                    jumps.append((idx, target))
+            falls_through = False
+        else:
+            falls_through = True
+
+    for source, target in jumps:
+        predecessor[index_at[target]] = source
+
+    probe_lines = {}
+    for pid, idx in probe_insn.items():
+        lines = set()
+        seen = set()
+        while idx is not None and idx not in seen:
+            seen.add(idx)
+            if line_of[idx] is not None:
+                lines.add(line_of[idx])
+            idx = predecessor[idx]
+        probe_lines[pid] = frozenset(lines)
+
+    all_lines = frozenset(l for l in line_of if l is not None)
+    return probe - next_probe, probe_lines, all_lines
+
+
+def analyze_class(data: bytes) -> ClassProbes:
+    """
+    Probe layout of a class file's bytes.
+    """
+    if data[:4] != b"\xca\xfe\xba\xbe":
+        raise ClassFormatError("Not a class file")
+
+    pos = 10
+    (cp_count,) = struct.unpack_from(">H", data, 8)
+    utf8 = {}
+    class_refs = {}
+    i = 1
+    while i < cp_count:
+        tag = data[pos]
+        if tag == 1:
+            (length,) = struct.unpack_from(">H", data, pos + 1)
+            utf8[i] = data[pos + 3:pos + 3 + length].decode("utf-8", errors="replace")
+            pos += 3 + length
+        elif tag in (3, 4, 9, 10, 11, 12, 17, 18):
+            pos += 5
+        elif tag in (5, 6):
+            pos += 9
+            i += 1
+        elif tag == 7:
+            class_refs[i] = struct.unpack_from(">H", data, pos + 1)[0]
+            pos += 3
+        elif tag in (8, 16, 19, 20):
+            pos += 3
+        elif tag == 15:
+            pos += 4
+        else:
+            raise ClassFormatError(f"Unknown constant pool tag {tag}")
+        i += 1
+
+    _access, this_class, _super, n_interfaces = struct.unpack_from(">HHHH", data, pos)
+    pos += 8 + 2 * n_interfaces
+    name = utf8[class_refs[this_class]]
+
+    def skip_members(pos):
+        (count,) = struct.unpack_from(">H", data, pos)
+        pos += 2
+        for _ in range(count):
+            (n_attrs,) = struct.unpack_from(">H", data, pos + 6)
+            pos += 8
+            for _ in range(n_attrs):
+                (length,) = struct.unpack_from(">I", data, pos + 2)
+                pos += 6 + length
+        return pos
+
+    pos = skip_members(pos)
+
+    result = ClassProbes(name, None, 0)
+    (n_methods,) = struct.unpack_from(">H", data, pos)
+    pos += 2
+    for _ in range(n_methods):
+        _m_access, name_idx, desc_idx, n_attrs = struct.unpack_from(">HHHH", data, pos)
+        pos += 8
+        code_info = None
+        for _ in range(n_attrs):
+            attr_name_idx, length = struct.unpack_from(">HI", data, pos)
+            if utf8.get(attr_name_idx) == "Code":
+                code_info = (pos + 6, length)
+            pos += 6 + length
+
+        method = MethodProbes(utf8[name_idx], utf8[desc_idx], result.probe_count, 0, None, None)
+        if code_info is not None:
+            count, probe_lines, lines = _analyze_method(*_read_code(data, utf8, *code_info), result.probe_count)
+            method.probe_count = count
+            method.lines = lines
+            if lines:
+                method.first_line, method.last_line = min(lines), max(lines)
+            for pid in range(result.probe_count, result.probe_count + count):
+                result.probe_lines.append(probe_lines[pid])
+                result.probe_method.append(len(result.methods))
+            result.probe_count += count
+        result.methods.append(method)
+
+    (n_attrs,) = struct.unpack_from(">H", data, pos)
+    pos += 2
+    for _ in range(n_attrs):
+        attr_name_idx, length = struct.unpack_from(">HI", data, pos)
+        if utf8.get(attr_name_idx) == "SourceFile":
+            result.source_file = utf8[struct.unpack_from(">H", data, pos + 6)[0]]
+        pos += 6 + length
+
+    return result
+
+
+def _read_code(data: bytes, utf8: dict, start: int, _length: int):
+    (code_length,) = struct.unpack_from(">I", data, start + 4)
+    code = data[start + 8:start + 8 + code_length]
+    pos = start + 8 + code_length
+    (n_handlers,) = struct.unpack_from(">H", data, pos)
+    pos += 2
+    handlers = []
+    for _ in range(n_handlers):
+        start_pc, _end_pc, handler_pc, _type = struct.unpack_from(">HHHH", data, pos)
+        handlers.append((start_pc, handler_pc))
+        pos += 8
+    line_table = []
+    (n_attrs,) = struct.unpack_from(">H", data, pos)
+    pos += 2
+    for _ in range(n_attrs):
+        attr_name_idx, length = struct.unpack_from(">HI", data, pos)
+        if utf8.get(attr_name_idx) == "LineNumberTable":
+            (count,) = struct.unpack_from(">H", data, pos + 6)
+            for k in range(count):
+                line_table.append(struct.unpack_from(">HH", data, pos + 8 + 4 * k))
+        pos += 6 + length
+    return code, handlers, line_table
+
+
+# path -> ((mtime_ns, size), ClassProbes)
+_cache: dict = {}
+_cache_lock = threading.Lock()
+
+
+def class_file_probes(path: str) -> ClassProbes:
+    """
+    analyze_class() of a class file, cached on the file's mtime and size.
+    """
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        cached = _cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with open(path, "rb") as f:
+        probes = analyze_class(f.read())
+    with _cache_lock:
+        _cache[path] = (key, probes)
+    return probes
@@ -0,0 +1,142 @@
+"""
+Coverage totals from JaCoCo's jacoco.csv.
+
+jacoco:report writes a flat CSV next to jacoco.xml with one row per class:
+
+  GROUP,PACKAGE,CLASS,INSTRUCTION_MISSED,INSTRUCTION_COVERED,...,METHOD_COVERED
+
+It is about 1% of the XML's size and has no nesting, so when only totals
+or per-package numbers are needed it is much cheaper to load. The rows are
+read into one integer column per counter and aggregated with sum() over
+whole columns (root totals) or over each package's run of rows.
+
+The CSV has no method or line data, and its class names are display names
+(anonymous classes become "Outer.new Runnable() {...}"), so anything below
+package level still needs the XML index. Per-class counters match the
+XML's, and so do the other counters' sums, but LINE sums do not: a line
+shared by two classes (an anonymous class declared inline) counts once per
+class in the CSV but once per source file in the XML's package and report
+counters. Package and report LINE totals should come from the XML
+(coverage_index.report_totals) when it exists.
+"""
+import array
+import csv
+import os
+import threading
+from dataclasses import dataclass, field
+
+from lib.coverage_index import COUNTER_TYPES
+
+# How much older than jacoco.xml the CSV may be and still count as written
+# by the same jacoco:report run (the formats are written one after another)
+FRESH_WINDOW_NS = 5 * 10**9
+
+
+@dataclass
+class CsvCoverage:
+    """
+    Columns of one jacoco.csv.
+
+    package_names and class_names are per row; columns maps a counter type
+    to its (missed, covered) int columns. totals and packages map counter
+    types to (missed, covered), like CoverageNode.counters.
+    """
+    path: str
+    key: tuple
+    package_names: list = field(default_factory=list)
+    class_names: list = field(default_factory=list)
+    columns: dict = field(default_factory=dict)
+    totals: dict = field(default_factory=dict)
+    packages: dict = field(default_factory=dict)
+
+
+_cache: dict = {}
+_cache_lock = threading.Lock()
+
+
+def _key(path: str) -> tuple:
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def build(path: str) -> CsvCoverage:
+    """
+    Read path into a fresh CsvCoverage (no caching).
+    """
+    data = CsvCoverage(path=path, key=_key(path))
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        pos = {name: i for i, name in enumerate(header)}
+        # The CSV has no CLASS counter; it is derived from METHOD below
+        present = [c for c in COUNTER_TYPES if f"{c}_MISSED" in pos]
+        cols = [(pos[f"{c}_MISSED"], pos[f"{c}_COVERED"]) for c in present]
+        missed = [array.array("q") for _ in present]
+        covered = [array.array("q") for _ in present]
+        pkg_col, cls_col = pos["PACKAGE"], pos["CLASS"]
+
+        for row in reader:
+            if not row:
+                continue
+            data.package_names.append(row[pkg_col])
+            data.class_names.append(row[cls_col])
+            for i, (m, c) in enumerate(cols):
+                missed[i].append(int(row[m]))
+                covered[i].append(int(row[c]))
+
+    for i, ctype in enumerate(present):
+        data.columns[ctype] = (missed[i], covered[i])
+    if "CLASS" not in data.columns and "METHOD" in data.columns:
+        # JaCoCo counts a class as covered when any of its methods ran
+        method_covered = data.columns["METHOD"][1]
+        cls_covered = array.array("q", (1 if c else 0 for c in method_covered))
+        cls_missed = array.array("q", (1 - c for c in cls_covered))
+        data.columns["CLASS"] = (cls_missed, cls_covered)
+
+    data.totals = {ctype: (sum(m), sum(c)) for ctype, (m, c) in data.columns.items()}
+
+    # Rows come grouped by package; aggregate each run of rows with slices
+    names = data.package_names
+    start = 0
+    for end in range(1, len(names) + 1):
+        if end < len(names) and names[end] == names[start]:
+            continue
+        counters = data.packages.setdefault(names[start], {})
+        for ctype, (m, c) in data.columns.items():
+            old_m, old_c = counters.get(ctype, (0, 0))
+            counters[ctype] = (old_m + sum(m[start:end]), old_c + sum(c[start:end]))
+        start = end
+    return data
+
+
+def load(path: str) -> CsvCoverage:
+    """
+    Return the cached CsvCoverage for path, rereading it when the file
+    changed on disk.
+    """
+    key = _key(path)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached.key == key:
+            return cached
+    data = build(path)
+    with _cache_lock:
+        _cache[path] = data
+    return data
+
+
+def is_fresh(csv_path: str, xml_path: str | None) -> bool:
+    """
+    True when csv_path exists and was written by the same (or a later)
+    report run as xml_path.
+    """
+    try:
+        csv_mtime = os.stat(csv_path).st_mtime_ns
+    except OSError:
+        return False
+    if xml_path is None:
+        return True
+    try:
+        return csv_mtime >= os.stat(xml_path).st_mtime_ns - FRESH_WINDOW_NS
+    except OSError:
+        return True
@@ -0,0 +1,305 @@
+"""
+In-memory index over a JaCoCo XML report.
+
+The report is parsed once into package -> class -> method nodes that carry
+their counters, and the result is cached per report path. The cache entry is
+keyed on the file's mtime and size, so a new `mvn test` run (which rewrites
+jacoco.xml) invalidates it automatically and everything else is a dict lookup.
+"""
+import array
+import heapq
+import os
+import re
+import threading
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+
+# Counter types in the order JaCoCo writes them
+COUNTER_TYPES = ("INSTRUCTION", "BRANCH", "LINE", "COMPLEXITY", "METHOD", "CLASS")
+
+
+@dataclass(slots=True)
+class CoverageNode:
+    """
+    One package, class or method of the report.
+
+    counters maps a counter type to (missed, covered); children maps a child
+    name to its node (empty for methods).
+    """
+    name: str
+    counters: dict = field(default_factory=dict)
+    children: dict = field(default_factory=dict)
+    line: int | None = None
+
+    def missed(self, ctype: str) -> int:
+        return self.counters.get(ctype, (0, 0))[0]
+
+    def covered(self, ctype: str) -> int:
+        return self.counters.get(ctype, (0, 0))[1]
+
+
+@dataclass
+class CoverageIndex:
+    """
+    Coverage model of one jacoco.xml.
+
+    packages is the package -> class -> method tree; classes and methods are
+    flat lookups by dotted class name ("org.apache.commons.lang3.Range") and
+    by (class name, method name + descriptor).
+
+    sourcefiles maps a source path ("org/apache/commons/lang3/Range.java")
+    to its line counters, an int array of LINE_FIELDS per line in line
+    order; class_sources maps a dotted class name to its source path.
+    """
+    report_path: str
+    key: tuple
+    totals: dict = field(default_factory=dict)
+    packages: dict = field(default_factory=dict)
+    classes: dict = field(default_factory=dict)
+    methods: dict = field(default_factory=dict)
+    sourcefiles: dict = field(default_factory=dict)
+    class_sources: dict = field(default_factory=dict)
+
+
+# How much of the end of a report report_totals reads
+REPORT_TAIL_BYTES = 4096
+_COUNTER_RE = re.compile(rb'<counter type="(\w+)" missed="(\d+)" covered="(\d+)"\s*/>')
+
+# Per-line fields of CoverageIndex.sourcefiles: line number, missed and
+# covered instructions, missed and covered branches
+LINE_FIELDS = 5
+
+
+_cache: dict = {}
+_cache_lock = threading.Lock()
+
+
+def _report_key(path: str) -> tuple:
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _counter_values(elem: ET.Element) -> tuple:
+    return (int(elem.get("missed", "0")), int(elem.get("covered", "0")))
+
+
+def dotted(jacoco_name: str) -> str:
+    # JaCoCo uses VM names: org/apache/commons/lang3/Range
+    return jacoco_name.replace("/", ".")
+
+
+def within(name: str, prefix: str) -> bool:
+    """
+    Whether the dotted package or class name is prefix or lies below it:
+    "a.b" takes "a.b", "a.b.c" and "a.b.C$Inner" but not "a.bc".
+    """
+    return name == prefix or name.startswith(prefix) and name[len(prefix)] in ".$"
+
+
+def build_index(report_path: str) -> CoverageIndex:
+    """
+    Parse report_path into a fresh CoverageIndex (no caching).
+
+    The report is streamed with iterparse and every element is cleared as
+    soon as its counters have been folded into the index, so memory use
+    follows the size of the index rather than the size of the XML.
+    """
+    key = _report_key(report_path)
+    index = CoverageIndex(report_path=report_path, key=key)
+
+    # Tags of the open elements; nodes of the open package/class/method
+    tags = []
+    nodes = []
+    root = None
+    package_path = ""
+    line_data = None
+
+    for event, elem in ET.iterparse(report_path, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            if root is None:
+                root = elem
+            tags.append(tag)
+            if tag == "package":
+                package_path = elem.get("name")
+                pkg = CoverageNode(dotted(package_path))
+                index.packages[pkg.name] = pkg
+                nodes.append(pkg)
+            elif tag == "class":
+                cls = CoverageNode(dotted(elem.get("name")))
+                nodes[-1].children[cls.name] = cls
+                index.classes[cls.name] = cls
+                nodes.append(cls)
+                source = elem.get("sourcefilename")
+                if source:
+                    index.class_sources[cls.name] = f"{package_path}/{source}" if package_path else source
+            elif tag == "sourcefile":
+                name = elem.get("name")
+                line_data = array.array("i")
+                index.sourcefiles[f"{package_path}/{name}" if package_path else name] = line_data
+            elif tag == "method":
+                sig = elem.get("name") + elem.get("desc", "")
+                line = elem.get("line")
+                method = CoverageNode(sig, line=int(line) if line else None)
+                cls = nodes[-1]
+                cls.children[sig] = method
+                index.methods[(cls.name, sig)] = method
+                nodes.append(method)
+            continue
+
+        tags.pop()
+        if tag == "line":
+            line_data.extend((
+                int(elem.get("nr")),
+                int(elem.get("mi", "0")),
+                int(elem.get("ci", "0")),
+                int(elem.get("mb", "0")),
+                int(elem.get("cb", "0")),
+            ))
+        elif tag == "counter":
+            parent = tags[-1] if tags else None
+            if parent == "report":
+                index.totals[elem.get("type")] = _counter_values(elem)
+            elif parent in ("package", "class", "method"):
+                nodes[-1].counters[elem.get("type")] = _counter_values(elem)
+        elif tag in ("package", "class", "method"):
+            nodes.pop()
+            elem.clear()
+            if tag == "package":
+                # Drop the finished package from the root as well
+                root.clear()
+        elif tag == "sourcefile":
+            elem.clear()
+
+    return index
+
+
+def report_totals(report_path: str) -> dict | None:
+    """
+    The report-level counters of report_path, as in CoverageIndex.totals,
+    read from the end of the file without parsing the rest. None when they
+    are not found there.
+    """
+    with open(report_path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(f.tell() - REPORT_TAIL_BYTES, 0))
+        tail = f.read()
+    # They follow the last package (or group) and close the report
+    start = max(tail.rfind(b"</package>"), tail.rfind(b"</group>"))
+    end = tail.rfind(b"</report>")
+    if start < 0 or end < start:
+        return None
+    totals = {
+        m.group(1).decode("ascii"): (int(m.group(2)), int(m.group(3)))
+        for m in _COUNTER_RE.finditer(tail, start, end)
+    }
+    return totals or None
+
+
+def load_index(report_path: str) -> CoverageIndex:
+    """
+    Return the cached index for report_path, rebuilding it if the report
+    changed on disk since it was built.
+    """
+    key = _report_key(report_path)
+    with _cache_lock:
+        cached = _cache.get(report_path)
+        if cached is not None and cached.key == key:
+            return cached
+
+    index = build_index(report_path)
+    with _cache_lock:
+        _cache[report_path] = index
+    return index
+
+
+def percent(missed: int, covered: int) -> float:
+    total = missed + covered
+    return 0.0 if total == 0 else round(covered * 100.0 / total, 1)
+
+
+LEVELS = ("package", "class", "method")
+
+
+def top_nodes(index: CoverageIndex, level: str, ctype: str = "LINE", n: int = 10,
+              prefix: str = "", order: str = "missed") -> list[dict]:
+    """
+    The n packages, classes or methods with the most missed `ctype` items
+    (order="missed") or the lowest coverage ratio (order="percent"),
+    restricted to the package or class prefix and what lies below it
+    ("org.apache.commons.lang3.text" or "org/apache/commons/lang3/text").
+    Nodes without any missed item are left out. Returns JSON-ready dicts.
+
+    The tools query coverage_store.top_nodes; this version over the dict
+    index is the reference its results are checked and benchmarked against.
+    """
+    prefix = dotted(prefix)
+    if level == "package":
+        nodes = index.packages.items()
+    elif level == "class":
+        nodes = index.classes.items()
+    elif level == "method":
+        nodes = index.methods.items()
+    else:
+        raise ValueError(f"Unknown level {level!r}; use one of {', '.join(LEVELS)}")
+
+    candidates = []
+    for key, node in nodes:
+        owner = key[0] if level == "method" else key
+        if prefix and not within(owner, prefix):
+            continue
+        missed, covered = node.counters.get(ctype, (0, 0))
+        if missed:
+            candidates.append((key, node, missed, covered))
+
+    if order == "missed":
+        rank = lambda c: (c[2], -c[3])
+    elif order == "percent":
+        rank = lambda c: (-c[3] / (c[2] + c[3]), c[2])
+    else:
+        raise ValueError(f"Unknown order {order!r}; use 'missed' or 'percent'")
+
+    results = []
+    for key, node, missed, covered in heapq.nlargest(n, candidates, key=rank):
+        row = {"missed": missed, "covered": covered, "percent": percent(missed, covered)}
+        if level == "method":
+            cls, sig = key
+            name, _paren, desc = sig.partition("(")
+            row = {"class": cls, "method": name, "desc": "(" + desc, "line": node.line, **row}
+        else:
+            row = {"name": key, **row}
+        results.append(row)
+    return results
+
+
+def line_ranges(line_data: array.array, first: int = 0, last: int | None = None) -> list[dict]:
+    """
+    Uncovered and partly covered line ranges from a sourcefile's line
+    counters, optionally limited to lines first..last.
+
+    A line is "uncovered" when none of its instructions ran and "partial"
+    when some did not run or some of its branches were missed. Consecutive
+    code lines with the same status form one range; lines without code in
+    between do not break it.
+    """
+    ranges = []
+    current = None
+    for i in range(0, len(line_data), LINE_FIELDS):
+        nr, mi, ci, mb, cb = line_data[i:i + LINE_FIELDS]
+        if nr < first or (last is not None and nr > last):
+            continue
+        if ci == 0 and mi > 0:
+            status = "uncovered"
+        elif mi > 0 or mb > 0:
+            status = "partial"
+        else:
+            current = None
+            continue
+        if current is None or current["status"] != status:
+            current = {"status": status, "first": nr, "last": nr, "missed_instructions": 0, "missed_branches": 0, "branches": 0}
+            ranges.append(current)
+        current["last"] = nr
+        current["missed_instructions"] += mi
+        current["missed_branches"] += mb
+        current["branches"] += mb + cb
+    return ranges
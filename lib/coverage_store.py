@@ -0,0 +1,283 @@
+"""
+Columnar, memory-mapped copy of a coverage index.
+
+Once jacoco.xml has been parsed, the package, class and method nodes are
+written to one file as three tables of int32 columns:
+
+  name      id into the name table
+  parent    row of the owning package (classes) or class (methods), -1
+  line      first line of a method, -1 if unknown or not a method
+  <COUNTER>_missed, <COUNTER>_covered   for each of COUNTER_TYPES
+
+Package and class rows keep JaCoCo's own counters rather than sums of
+their children: LINE is counted per source line, so it does not add up.
+
+A restarted server maps the file instead of parsing the XML again, which
+takes a few milliseconds. Queries work on whole columns: int memoryviews
+into the mapping, filtered in one pass and ranked with heapq.
+
+File layout: MAGIC, version (u16), JSON header length (u32), JSON header,
+the name table (UTF-8, newline-separated), then the tables' columns, each
+contiguous and 8-byte aligned, in native byte order.
+"""
+import array
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+
+from lib.coverage_index import COUNTER_TYPES, CoverageIndex, dotted, load_index, percent, within
+
+MAGIC = b"JCCS"
+VERSION = 1
+LEVELS = ("package", "class", "method")
+COLUMNS = ("name", "parent", "line") + tuple(
+    f"{ctype}_{kind}" for ctype in COUNTER_TYPES for kind in ("missed", "covered")
+)
+_HEADER = struct.Struct("<4sHI")
+_ITEMSIZE = 4
+
+
+class CoverageStore:
+    """
+    A mapped store: report_key and totals from the header, the name
+    table, and col(level, column) returning a column as an int memoryview.
+    """
+
+    def __init__(self, buffer, header: dict, names: list[str], offset: int):
+        self._buffer = buffer
+        self.report_path = header["report_path"]
+        self.report_key = tuple(header["report_key"])
+        self.totals = {k: tuple(v) for k, v in header["totals"].items()}
+        self.rows = header["rows"]
+        self.names = names
+        self._columns = {}
+        self._level_names = {}
+        view = memoryview(buffer)
+        for level in LEVELS:
+            n = self.rows[level]
+            for column in COLUMNS:
+                self._columns[(level, column)] = view[offset:offset + n * _ITEMSIZE].cast("i")
+                offset += _aligned(n * _ITEMSIZE)
+
+    def col(self, level: str, column: str):
+        return self._columns[(level, column)]
+
+    def close(self) -> None:
+        """
+        Drop the column views and unmap the file, e.g. for a store from
+        open_store before its file is removed. Stores returned by load()
+        are shared and stay open.
+        """
+        self._columns.clear()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def level_names(self, level: str) -> list[str]:
+        """
+        Names of the level's rows, in row order (built on first use).
+        """
+        names = self._level_names.get(level)
+        if names is None:
+            names = self._level_names[level] = [self.names[i] for i in self.col(level, "name")]
+        return names
+
+
+def _aligned(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def encode(index: CoverageIndex) -> bytes:
+    names = {}
+
+    def name_id(name: str) -> int:
+        i = names.get(name)
+        if i is None:
+            i = names[name] = len(names)
+        return i
+
+    tables = {level: {c: array.array("i") for c in COLUMNS} for level in LEVELS}
+
+    def add(level: str, name: str, parent: int, line, counters: dict) -> int:
+        t = tables[level]
+        t["name"].append(name_id(name))
+        t["parent"].append(parent)
+        t["line"].append(-1 if line is None else line)
+        for ctype in COUNTER_TYPES:
+            missed, covered = counters.get(ctype, (0, 0))
+            t[f"{ctype}_missed"].append(missed)
+            t[f"{ctype}_covered"].append(covered)
+        return len(t["name"]) - 1
+
+    # Tree order is document order, the order index.classes and
+    # index.methods iterate in, so ties rank as in coverage_index.top_nodes
+    for pkg in index.packages.values():
+        pkg_row = add("package", pkg.name, -1, None, pkg.counters)
+        for cls in pkg.children.values():
+            cls_row = add("class", cls.name, pkg_row, None, cls.counters)
+            for method in cls.children.values():
+                add("method", method.name, cls_row, method.line, method.counters)
+
+    table = "\n".join(names).encode("utf-8")
+    header = json.dumps({
+        "report_path": index.report_path,
+        "report_key": list(index.key),
+        "byteorder": sys.byteorder,
+        "totals": index.totals,
+        "rows": {level: len(tables[level]["name"]) for level in LEVELS},
+        "names": len(table),
+    }).encode("utf-8")
+
+    out = bytearray(_HEADER.pack(MAGIC, VERSION, len(header)))
+    out += header + table
+    out += b"\0" * (_aligned(len(out)) - len(out))
+    for level in LEVELS:
+        for column in COLUMNS:
+            data = tables[level][column].tobytes()
+            out += data + b"\0" * (_aligned(len(data)) - len(data))
+    return bytes(out)
+
+
+def decode(buffer) -> CoverageStore:
+    """
+    A store over buffer (bytes or an mmap); the columns are views into it.
+    """
+    magic, version, header_len = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a coverage store of this version")
+    pos = _HEADER.size
+    header = json.loads(bytes(buffer[pos:pos + header_len]))
+    if header["byteorder"] != sys.byteorder:
+        raise ValueError("coverage store was written with a different byte order")
+    pos += header_len
+    table = bytes(buffer[pos:pos + header["names"]]).decode("utf-8")
+    names = table.split("\n") if table else []
+    return CoverageStore(buffer, header, names, _aligned(pos + header["names"]))
+
+
+def save(index: CoverageIndex, path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(encode(index))
+    os.replace(tmp, path)
+
+
+def open_store(path: str) -> CoverageStore:
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return decode(buffer)
+
+
+_cache: dict = {}
+_cache_lock = threading.Lock()
+
+
+def load(report_path: str, store_path: str) -> CoverageStore:
+    """
+    The store for report_path: the mapped store_path when it was built
+    from the report as it is on disk now, otherwise rebuilt from the XML
+    and saved to store_path.
+    """
+    st = os.stat(report_path)
+    key = (st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        cached = _cache.get(store_path)
+    if cached is not None and cached.report_key == key and cached.report_path == report_path:
+        return cached
+
+    store = None
+    try:
+        store = open_store(store_path)
+        if store.report_key != key or store.report_path != report_path:
+            store = None
+    except (OSError, ValueError):
+        store = None
+
+    if store is None:
+        index = load_index(report_path)
+        try:
+            save(index, store_path)
+            store = open_store(store_path)
+        except OSError:
+            # Read-only cache dir, or the old file is still mapped (Windows)
+            store = decode(encode(index))
+
+    with _cache_lock:
+        _cache[store_path] = store
+    return store
+
+
+def _prefix_mask(store: CoverageStore, level: str, prefix: str) -> list[bool]:
+    """
+    Per row of level, whether the node (or for methods, its class) is
+    within prefix.
+    """
+    owner_level = "package" if level == "package" else "class"
+    owner = [within(name, prefix) for name in store.level_names(owner_level)]
+    if level != "method":
+        return owner
+    return [owner[p] for p in store.col("method", "parent")]
+
+
+def top_nodes(store: CoverageStore, level: str, ctype: str = "LINE", n: int = 10,
+              prefix: str = "", order: str = "missed") -> list[dict]:
+    """
+    Same query and result as coverage_index.top_nodes, over the columns.
+    """
+    if level not in LEVELS:
+        raise ValueError(f"Unknown level {level!r}; use one of {', '.join(LEVELS)}")
+    if order not in ("missed", "percent"):
+        raise ValueError(f"Unknown order {order!r}; use 'missed' or 'percent'")
+    prefix = dotted(prefix)
+    missed = store.col(level, f"{ctype}_missed")
+    covered = store.col(level, f"{ctype}_covered")
+    keep = _prefix_mask(store, level, prefix) if prefix else None
+    candidates = [r for r in range(len(missed)) if missed[r] and (keep is None or keep[r])]
+    if order == "missed":
+        rank = lambda r: (missed[r], -covered[r])
+    else:
+        rank = lambda r: (-covered[r] / (missed[r] + covered[r]), missed[r])
+    selected = heapq.nlargest(n, candidates, key=rank)
+
+    names = store.names
+    name_col = store.col(level, "name")
+    results = []
+    for r in selected:
+        mi, ci = missed[r], covered[r]
+        row = {"missed": mi, "covered": ci, "percent": percent(mi, ci)}
+        if level == "method":
+            cls = names[store.col("class", "name")[store.col("method", "parent")[r]]]
+            name, _paren, desc = names[name_col[r]].partition("(")
+            line = store.col("method", "line")[r]
+            row = {"class": cls, "method": name, "desc": "(" + desc,
+                   "line": None if line < 0 else line, **row}
+        else:
+            row = {"name": names[name_col[r]], **row}
+        results.append(row)
+    return results
+
+
+def subtotal(store: CoverageStore, ctype: str = "LINE", prefix: str = "") -> tuple:
+    """
+    (missed, covered) of `ctype` over the packages named prefix or below
+    it. Package counters add up exactly: each source file is in one
+    package. A prefix naming a class rather than a package sums that class
+    and its nested classes; a line holding code of several of them is then
+    counted once per class, as in their own LINE counters.
+    """
+    prefix = dotted(prefix)
+    level = "package"
+    rows = [
+        r for r, name in enumerate(store.level_names("package"))
+        if not prefix or within(name, prefix)
+    ]
+    if not rows:
+        level = "class"
+        rows = [r for r, name in enumerate(store.level_names("class")) if within(name, prefix)]
+    missed = store.col(level, f"{ctype}_missed")
+    covered = store.col(level, f"{ctype}_covered")
+    return sum(missed[r] for r in rows), sum(covered[r] for r in rows)
@@ -0,0 +1,219 @@
+"""
+Arithmetic expression evaluator for the calculator tool.
+
+Expressions are parsed with `ast` and only numbers, arithmetic, comparison
+and boolean operators and a few math functions are accepted. Anything else
+(names, attributes, strings, containers, lambdas, ...) is rejected before
+evaluation, so there is nothing to escape into.
+
+eval() with empty builtins is also easy to stall: `9**9**9` keeps a core
+busy for minutes. Here every integer power, product and shift is checked
+against MAX_INT_BITS before it is computed, and evaluation stops once
+TIME_LIMIT seconds have passed.
+
+A validated expression is compiled into a tree of closures, cached per
+expression string, so repeated calls skip parsing and validation.
+"""
+import ast
+import functools
+import math
+import operator
+import time
+from typing import Callable
+
+MAX_EXPRESSION_CHARS = 2000
+MAX_NODES = 500
+# About 3000 decimal digits; str() of ints stops at 4300 digits anyway
+MAX_INT_BITS = 10_000
+TIME_LIMIT = 0.25
+CACHE_SIZE = 1024
+
+
+class ExpressionError(ValueError):
+    """
+    The expression is not allowed, too large, or took too long.
+    """
+
+
+def _check_bits(bits: int) -> None:
+    if bits > MAX_INT_BITS:
+        raise ExpressionError(f"result too large (over {MAX_INT_BITS} bits)")
+
+
+def _pow(a, b):
+    if isinstance(a, int) and isinstance(b, int) and b > 0 and abs(a) > 1:
+        # bit_length() * b bounds the result from above for any base
+        _check_bits(abs(a).bit_length() * b)
+    return a ** b
+
+
+def _mul(a, b):
+    if isinstance(a, int) and isinstance(b, int):
+        # The product has at most this many bits
+        _check_bits(a.bit_length() + b.bit_length())
+    return a * b
+
+
+def _lshift(a, b):
+    if isinstance(a, int) and isinstance(b, int) and a:
+        _check_bits(a.bit_length() + b)
+    return a << b
+
+
+_BINOPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: _mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: _pow,
+    ast.LShift: _lshift,
+    ast.RShift: operator.rshift,
+    ast.BitAnd: operator.and_,
+    ast.BitOr: operator.or_,
+    ast.BitXor: operator.xor,
+}
+
+_UNARYOPS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+    ast.Invert: operator.invert,
+    ast.Not: operator.not_,
+}
+
+_COMPARE = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+_FUNCTIONS = {
+    "abs": abs,
+    "round": round,
+    "min": min,
+    "max": max,
+    "sqrt": math.sqrt,
+    "exp": math.exp,
+    "log": math.log,
+    "log10": math.log10,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "floor": math.floor,
+    "ceil": math.ceil,
+}
+
+_CONSTANTS = {"pi": math.pi, "e": math.e}
+
+
+def _deadline_check(deadline: float) -> None:
+    if time.perf_counter() > deadline:
+        raise ExpressionError("time limit exceeded")
+
+
+def _compile(node) -> Callable[[float], object]:
+    """
+    Closure computing node's value, given the evaluation deadline.
+    """
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if type(value) not in (int, float, bool):
+            raise ExpressionError(f"unsupported literal {value!r}")
+        return lambda deadline: value
+
+    if isinstance(node, ast.Name):
+        if node.id not in _CONSTANTS:
+            raise ExpressionError(f"unknown name {node.id!r}")
+        value = _CONSTANTS[node.id]
+        return lambda deadline: value
+
+    if isinstance(node, ast.BinOp):
+        op = _BINOPS.get(type(node.op))
+        if op is None:
+            raise ExpressionError(f"unsupported operator {type(node.op).__name__}")
+        left, right = _compile(node.left), _compile(node.right)
+
+        def binop(deadline):
+            a, b = left(deadline), right(deadline)
+            _deadline_check(deadline)
+            return op(a, b)
+        return binop
+
+    if isinstance(node, ast.UnaryOp):
+        op = _UNARYOPS[type(node.op)]
+        operand = _compile(node.operand)
+        return lambda deadline: op(operand(deadline))
+
+    if isinstance(node, ast.Compare):
+        ops = []
+        for op in node.ops:
+            if type(op) not in _COMPARE:
+                raise ExpressionError(f"unsupported comparison {type(op).__name__}")
+            ops.append(_COMPARE[type(op)])
+        first = _compile(node.left)
+        rest = [_compile(c) for c in node.comparators]
+
+        def compare(deadline):
+            a = first(deadline)
+            for op, nxt in zip(ops, rest):
+                b = nxt(deadline)
+                if not op(a, b):
+                    return False
+                a = b
+            return True
+        return compare
+
+    if isinstance(node, ast.BoolOp):
+        values = [_compile(v) for v in node.values]
+        is_and = isinstance(node.op, ast.And)
+
+        def boolop(deadline):
+            for value in values:
+                result = value(deadline)
+                if bool(result) != is_and:
+                    return result
+            return result
+        return boolop
+
+    if isinstance(node, ast.IfExp):
+        test, body, orelse = _compile(node.test), _compile(node.body), _compile(node.orelse)
+        return lambda deadline: body(deadline) if test(deadline) else orelse(deadline)
+
+    if isinstance(node, ast.Call):
+        name = getattr(node.func, "id", None)
+        if not isinstance(node.func, ast.Name) or name not in _FUNCTIONS:
+            raise ExpressionError(f"unsupported function {ast.unparse(node.func)!r}")
+        if node.keywords:
+            raise ExpressionError("keyword arguments are not supported")
+        func = _FUNCTIONS[name]
+        args = [_compile(a) for a in node.args]
+
+        def call(deadline):
+            values = [a(deadline) for a in args]
+            _deadline_check(deadline)
+            return func(*values)
+        return call
+
+    raise ExpressionError(f"unsupported syntax: {type(node).__name__}")
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def compile_expression(expression: str) -> Callable[[float], object]:
+    """
+    Parse, validate and compile an expression. Raises ExpressionError (or
+    SyntaxError) for anything outside the accepted subset.
+    """
+    if len(expression) > MAX_EXPRESSION_CHARS:
+        raise ExpressionError(f"expression longer than {MAX_EXPRESSION_CHARS} characters")
+    tree = ast.parse(expression.strip(), mode="eval")
+    if sum(1 for _ in ast.walk(tree)) > MAX_NODES:
+        raise ExpressionError(f"expression has more than {MAX_NODES} syntax nodes")
+    return _compile(tree.body)
+
+
+def evaluate(expression: str, time_limit: float = TIME_LIMIT):
+    return compile_expression(expression)(time.perf_counter() + time_limit)
@@ -0,0 +1,191 @@
+"""
+Compile-only fast path for test runs.
+
+Instead of `mvn clean test`, the files changed since the last passing run
+are compiled straight into the existing target/classes and
+target/test-classes with javac, and only the affected test classes are
+run against those directories (surefire:test without the lifecycle).
+
+javac needs the project's dependency classpath. It is written by
+`dependency:build-classpath` during a clean build and recorded together
+with a fingerprint of pom.xml; when pom.xml changes (and with it the
+dependency set or compiler settings) the fast path is refused and a clean
+build has to record a new classpath first.
+
+Only the changed files are recompiled, not the classes that depend on
+them, so a change to a constant or a signature used elsewhere needs a
+clean build.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+
+from lib import process_tree
+
+STATE_FILE = "fast_build.json"
+CLASSPATH_FILE = "test_classpath.txt"
+
+
+class FastBuildError(Exception):
+    """
+    The fast path cannot be used, or compiling the changed files failed.
+    """
+
+
+def pom_fingerprint(codebase_dir: str) -> str:
+    with open(os.path.join(codebase_dir, "pom.xml"), "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def load_state(state_dir: str) -> dict | None:
+    try:
+        with open(os.path.join(state_dir, STATE_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def record_state(state_dir: str, fingerprint: str) -> bool:
+    """
+    Save the classpath written by the last build under `fingerprint`.
+    Returns False when that build wrote no classpath file.
+    """
+    path = os.path.join(state_dir, CLASSPATH_FILE)
+    if not os.path.exists(path):
+        return False
+    with open(path, "r", encoding="utf-8") as f:
+        classpath = f.read().strip()
+    with open(os.path.join(state_dir, STATE_FILE), "w", encoding="utf-8") as f:
+        json.dump({"pom": fingerprint, "classpath": classpath}, f)
+    return True
+
+
+def classpath_args(state_dir: str) -> list[str]:
+    """
+    Maven arguments that make a build write its test classpath for later use.
+    """
+    return [
+        "dependency:build-classpath",
+        "-Dmdep.outputFile=" + os.path.join(state_dir, CLASSPATH_FILE),
+    ]
+
+
+def unavailable_reason(codebase_dir: str, state_dir: str, output_dirs: list[str]) -> str | None:
+    """
+    Why the fast path cannot be used right now, or None when it can.
+    """
+    state = load_state(state_dir)
+    if state is None:
+        return "no dependency classpath recorded yet"
+    if state.get("pom") != pom_fingerprint(codebase_dir):
+        return "pom.xml changed since the classpath was recorded"
+    for d in output_dirs:
+        if not os.path.isdir(d):
+            return f"{os.path.relpath(d, codebase_dir)} does not exist"
+    return None
+
+
+def compiler_settings(codebase_dir: str) -> dict:
+    """
+    Source/target level and encoding from the POM properties.
+    """
+    with open(os.path.join(codebase_dir, "pom.xml"), "r", encoding="utf-8") as f:
+        pom = f.read()
+    settings = {}
+    for key, names in (
+        ("source", ("maven.compiler.source", "maven.compile.source")),
+        ("target", ("maven.compiler.target", "maven.compile.target")),
+        ("encoding", ("project.build.sourceEncoding",)),
+    ):
+        for name in names:
+            m = re.search(rf"<{re.escape(name)}>\s*([^<\s]+)\s*</{re.escape(name)}>", pom)
+            if m:
+                settings[key] = m.group(1)
+                break
+    return settings
+
+
+def _javac() -> str:
+    java_home = os.environ.get("JAVA_HOME")
+    if java_home:
+        path = os.path.join(java_home, "bin", "javac.exe" if os.name == "nt" else "javac")
+        if os.path.exists(path):
+            return path
+    return "javac"
+
+
+def compile_changed(codebase_dir: str, state_dir: str, changed: list[str]) -> str:
+    """
+    Bring target/classes and target/test-classes up to date for the changed
+    files (paths relative to codebase/src). Java sources are compiled with
+    javac, resources are copied (or removed from target/ when deleted).
+    Returns a note for the build output; raises FastBuildError with the
+    compiler output when compilation fails, and for any I/O error.
+    """
+    try:
+        return _compile_changed(codebase_dir, state_dir, changed)
+    except OSError as e:
+        raise FastBuildError(f"Updating target/ for the changed files failed: {e}") from e
+
+
+def _compile_changed(codebase_dir: str, state_dir: str, changed: list[str]) -> str:
+    state = load_state(state_dir) or {}
+    deps = [p for p in state.get("classpath", "").split(os.pathsep) if p]
+    settings = compiler_settings(codebase_dir)
+    src_dir = os.path.join(codebase_dir, "src")
+    classes = os.path.join(codebase_dir, "target", "classes")
+    test_classes = os.path.join(codebase_dir, "target", "test-classes")
+
+    notes = []
+    # Main sources first: the tests compile against them
+    for root, out_dir, classpath in (
+        ("main", classes, [classes] + deps),
+        ("test", test_classes, [test_classes, classes] + deps),
+    ):
+        sources = [os.path.join(src_dir, *p.split("/")) for p in changed
+                   if p.startswith(f"{root}/java/") and p.endswith(".java")]
+        resources = [p for p in changed if p.startswith(f"{root}/resources/")]
+
+        copied = removed = 0
+        for rel in resources:
+            src = os.path.join(src_dir, *rel.split("/"))
+            dst = os.path.join(out_dir, *rel.split("/")[2:])
+            if not os.path.exists(src):
+                # Deleted since the last run: drop the stale copy
+                if os.path.exists(dst):
+                    os.remove(dst)
+                removed += 1
+                continue
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.copyfile(src, dst)
+            copied += 1
+        if copied:
+            notes.append(f"Copied {copied} {root} resource(s).")
+        if removed:
+            notes.append(f"Removed {removed} deleted {root} resource(s) from target/.")
+
+        if not sources:
+            continue
+        cmd = [_javac(), "-nowarn", "-g", "-d", out_dir, "-cp", os.pathsep.join(classpath)]
+        if "encoding" in settings:
+            cmd += ["-encoding", settings["encoding"]]
+        if "source" in settings:
+            cmd += ["-source", settings["source"]]
+        if "target" in settings:
+            cmd += ["-target", settings["target"]]
+        result = process_tree.run(cmd + sources, process_tree.limits_for("javac"))
+        if result.usage.exceeded:
+            raise FastBuildError(
+                f"javac for {len(sources)} {root} source file(s): {result.usage.summary()}\n"
+                + (result.stdout + result.stderr)[-4000:]
+            )
+        if result.returncode != 0:
+            raise FastBuildError(
+                f"javac failed for {len(sources)} {root} source file(s):\n"
+                + (result.stdout + result.stderr)[-4000:]
+            )
+        notes.append(f"Compiled {len(sources)} {root} source file(s) with javac.")
+
+    return "\n".join(notes)
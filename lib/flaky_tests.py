@@ -0,0 +1,154 @@
+"""
+Flakiness scores of test methods from repeated randomized runs.
+
+The surefire "plain" execution runs test classes in random order, so a
+test that depends on what ran before it fails only now and then. Rerunning
+the same classes several times with different order seeds, on unchanged
+code, separates those tests from ones that are simply broken:
+
+  flaky     passed in some runs and failed in others
+  failing   failed in every run
+  stable    passed in every run
+
+Every run's outcome is kept per test method ("Class#method") together with
+its seed, the last MAX_HISTORY per test, in .mcp_cache/flaky_tests.json.
+The score of a test is the share of its recorded runs that failed if its
+outcomes are mixed, and 0 otherwise.
+
+The history is only valid for the code it was recorded on: the file keeps
+sources_key() of the source hashes it belongs to, and load() returns an
+empty history once the sources differ, so a fixed test stops being
+treated as flaky.
+"""
+import hashlib
+import json
+import os
+import re
+
+from lib import surefire_reports
+
+FLAKY_FILE = "flaky_tests.json"
+MAX_HISTORY = 50
+
+FLAKY = "flaky"
+FAILING = "failing"
+STABLE = "stable"
+
+# surefire 3.x prints the seed it used for runOrder=random
+SEED_RE = re.compile(r"-Dsurefire\.runOrder\.random\.seed=(-?\d+)")
+_RUNNING_RE = re.compile(r"Running (\S+)\s*$")
+
+
+def _path(state_dir: str) -> str:
+    return os.path.join(state_dir, FLAKY_FILE)
+
+
+def sources_key(hashes: dict) -> str:
+    """
+    One digest of {path: sha1 of contents} for the whole source tree.
+    """
+    return hashlib.sha1(json.dumps(hashes, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def load(state_dir: str, sources: str) -> dict:
+    """
+    {"Class#method": [[seed, status], ...]}, oldest run first, recorded on
+    the sources with key `sources`; empty if it was recorded on others.
+    """
+    try:
+        with open(_path(state_dir), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("sources") != sources:
+        return {}
+    return data.get("tests", {})
+
+
+def save(state_dir: str, tests: dict, sources: str) -> None:
+    os.makedirs(state_dir, exist_ok=True)
+    tmp = _path(state_dir) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"sources": sources, "tests": tests}, f)
+    os.replace(tmp, _path(state_dir))
+
+
+def record(tests: dict, seed, results: list) -> None:
+    """
+    Add one run's surefire results (TestCaseResult) to the history.
+    Skipped tests are not recorded.
+    """
+    for r in results:
+        if r.status == surefire_reports.SKIPPED:
+            continue
+        failed = r.status in (surefire_reports.FAILED, surefire_reports.ERROR)
+        history = tests.setdefault(f"{r.class_name}#{r.method}", [])
+        history.append([seed, "fail" if failed else "pass"])
+        del history[:-MAX_HISTORY]
+
+
+def verdict(history: list) -> tuple[str, float]:
+    """
+    (flaky/failing/stable, score) of one test's history.
+    """
+    failures = sum(1 for _seed, status in history if status == "fail")
+    if failures == 0:
+        return STABLE, 0.0
+    if failures == len(history):
+        return FAILING, 0.0
+    return FLAKY, round(failures / len(history), 3)
+
+
+def summarize(tests: dict, classes: set | None = None) -> list[dict]:
+    """
+    One row per test (of the given classes), flakiest first.
+    """
+    rows = []
+    for key, history in tests.items():
+        if classes is not None and key.partition("#")[0] not in classes:
+            continue
+        kind, score = verdict(history)
+        rows.append({
+            "test": key,
+            "verdict": kind,
+            "score": score,
+            "runs": len(history),
+            "failures": sum(1 for _s, status in history if status == "fail"),
+            "failing_seeds": sorted({s for s, status in history if status == "fail" and s is not None}),
+        })
+    order = {FLAKY: 0, FAILING: 1, STABLE: 2}
+    rows.sort(key=lambda r: (order[r["verdict"]], -r["score"], r["test"]))
+    return rows
+
+
+def known_flaky(tests: dict) -> set[str]:
+    return {key for key, history in tests.items() if verdict(history)[0] == FLAKY}
+
+
+def method_filter(keys, exclude: bool = False) -> str:
+    """
+    surefire -Dtest patterns selecting (or with exclude=True, excluding)
+    the given "Class#method" tests: "Class#m1+m2,Other#m3".
+    """
+    by_class = {}
+    for key in sorted(keys):
+        cls, _sep, method = key.partition("#")
+        # Parameterized runs are reported as "test[0]"; filter on the method
+        by_class.setdefault(cls, set()).add(method.split("[", 1)[0])
+    prefix = "!" if exclude else ""
+    return ",".join(f"{prefix}{cls}#{'+'.join(sorted(methods))}" for cls, methods in by_class.items())
+
+
+def seed_from_output(lines) -> int | None:
+    for line in lines:
+        m = SEED_RE.search(line)
+        if m:
+            return int(m.group(1))
+    return None
+
+
+def class_order(lines) -> list[str]:
+    """
+    Test classes in the order surefire started them.
+    """
+    return [m.group(1) for m in map(_RUNNING_RE.search, lines) if m]
@@ -0,0 +1,92 @@
+"""
+Parser for `git status --porcelain=v2 --branch -z`.
+
+The v2 format is stable across git versions and locales, unlike the
+human-readable status, and -z keeps paths with spaces or non-ASCII
+characters unquoted. Each NUL-terminated record is one of
+
+  # branch.oid <commit> | (initial)
+  # branch.head <branch> | (detached)
+  # branch.upstream <upstream>
+  # branch.ab +<ahead> -<behind>
+  1 <XY> <sub> <mH> <mI> <mW> <hH> <hI> <path>
+  2 <XY> <sub> <mH> <mI> <mW> <hH> <hI> <R|C><score> <path> NUL <origPath>
+  u <XY> <sub> <m1> <m2> <m3> <mW> <h1> <h2> <h3> <path>
+  ? <path>
+  ! <path>
+
+where X is the index (staged) state and Y the worktree state, "." meaning
+unmodified.
+"""
+
+STATUS_ARGS = ["status", "--porcelain=v2", "--branch", "-z"]
+
+
+def parse_status(output: str) -> dict:
+    """
+    Branch info and files of a porcelain v2 status, as a JSON-ready dict:
+
+      branch     {head, oid, upstream, ahead, behind}
+      staged     [{path, status, orig_path?}]  changes in the index
+      unstaged   [{path, status}]              worktree changes not staged
+      unmerged   [{path, status}]              conflicts
+      untracked  [path]
+      ignored    [path]                        only with --ignored
+      clean      no staged, unstaged, unmerged or untracked files
+    """
+    branch = {"head": None, "oid": None, "upstream": None, "ahead": 0, "behind": 0}
+    staged, unstaged, unmerged, untracked, ignored = [], [], [], [], []
+
+    records = output.split("\0")
+    i = 0
+    while i < len(records):
+        rec = records[i]
+        i += 1
+        if not rec:
+            continue
+        kind = rec[0]
+        if kind == "#":
+            parts = rec.split(" ")
+            key = parts[1]
+            if key == "branch.oid":
+                branch["oid"] = None if parts[2] == "(initial)" else parts[2]
+            elif key == "branch.head":
+                branch["head"] = None if parts[2] == "(detached)" else parts[2]
+            elif key == "branch.upstream":
+                branch["upstream"] = parts[2]
+            elif key == "branch.ab":
+                branch["ahead"] = int(parts[2])
+                branch["behind"] = -int(parts[3])
+        elif kind in "12":
+            fields = 9 if kind == "1" else 10
+            parts = rec.split(" ", fields - 1)
+            xy, path = parts[1], parts[-1]
+            orig_path = None
+            if kind == "2":
+                # The original path is the next NUL-separated record
+                orig_path = records[i]
+                i += 1
+            if xy[0] != ".":
+                entry = {"path": path, "status": xy[0]}
+                if orig_path is not None:
+                    entry["orig_path"] = orig_path
+                staged.append(entry)
+            if xy[1] != ".":
+                unstaged.append({"path": path, "status": xy[1]})
+        elif kind == "u":
+            parts = rec.split(" ", 10)
+            unmerged.append({"path": parts[-1], "status": parts[1]})
+        elif kind == "?":
+            untracked.append(rec[2:])
+        elif kind == "!":
+            ignored.append(rec[2:])
+
+    return {
+        "branch": branch,
+        "staged": staged,
+        "unstaged": unstaged,
+        "unmerged": unmerged,
+        "untracked": untracked,
+        "ignored": ignored,
+        "clean": not (staged or unstaged or unmerged or untracked),
+    }
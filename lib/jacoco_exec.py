@@ -0,0 +1,269 @@
+"""
+Reader for JaCoCo's binary execution data (jacoco.exec).
+
+The file is a sequence of blocks, each starting with a type byte:
+
+  0x01 header     char magic 0xC0C0, char format version (0x1007)
+  0x10 session    UTF id, long start, long dump
+  0x11 class      long class id, UTF VM name, boolean[] probes
+
+Java's DataOutput conventions apply (big-endian, modified UTF-8 with a
+2-byte length); boolean arrays are a var-int length followed by the probes
+packed 8 per byte, least significant bit first.
+
+A class id is JaCoCo's CRC64 of the class file, so execution data can be
+matched to target/classes without running `jacoco:report`. Mapping probes
+to methods and source lines is left to class_probes.py.
+"""
+import os
+import struct
+import threading
+from dataclasses import dataclass, field
+
+BLOCK_HEADER = 0x01
+BLOCK_SESSIONINFO = 0x10
+BLOCK_EXECUTIONDATA = 0x11
+
+MAGIC_NUMBER = 0xC0C0
+FORMAT_VERSION = 0x1007
+
+# Class file major versions (Opcodes.V1_8 / Opcodes.V9)
+_V1_8 = 52
+_V9 = 53
+
+
+@dataclass(slots=True)
+class ExecSession:
+    id: str
+    start: int
+    dump: int
+
+
+@dataclass(slots=True)
+class ExecClass:
+    id: int
+    name: str
+    probes: list = field(default_factory=list)
+
+    @property
+    def covered(self) -> int:
+        return sum(self.probes)
+
+    @property
+    def total(self) -> int:
+        return len(self.probes)
+
+
+class ExecFormatError(ValueError):
+    pass
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def at_end(self) -> bool:
+        return self.pos >= len(self.data)
+
+    def take(self, n: int) -> bytes:
+        if self.pos + n > len(self.data):
+            raise ExecFormatError("Unexpected end of execution data")
+        chunk = self.data[self.pos:self.pos + n]
+        self.pos += n
+        return chunk
+
+    def byte(self) -> int:
+        return self.take(1)[0]
+
+    def char(self) -> int:
+        return struct.unpack(">H", self.take(2))[0]
+
+    def long(self) -> int:
+        return struct.unpack(">q", self.take(8))[0]
+
+    def utf(self) -> str:
+        raw = self.take(self.char())
+        # Modified UTF-8 only differs for NUL and supplementary characters,
+        # neither of which appear in VM class names or session ids
+        return raw.decode("utf-8", errors="replace")
+
+    def varint(self) -> int:
+        value = 0
+        shift = 0
+        while True:
+            b = self.byte()
+            value |= (b & 0x7F) << shift
+            if not b & 0x80:
+                return value
+            shift += 7
+
+    def booleans(self) -> list:
+        length = self.varint()
+        packed = self.take((length + 7) // 8)
+        return [bool(packed[i >> 3] & (1 << (i & 7))) for i in range(length)]
+
+
+def read_sessions(path: str) -> list[tuple[ExecSession | None, dict]]:
+    """
+    Read an exec file as [(session, classes by id)], one entry per dump.
+
+    Each dump writes its session info block followed by the data of the
+    classes it saw, so class blocks belong to the session before them
+    (None for data written before any session block).
+    """
+    with open(path, "rb") as f:
+        reader = _Reader(f.read())
+
+    sessions = []
+    classes = {}
+    session = None
+    while not reader.at_end():
+        block = reader.byte()
+        if block == BLOCK_HEADER:
+            if reader.char() != MAGIC_NUMBER:
+                raise ExecFormatError(f"{path} is not a JaCoCo execution data file")
+            version = reader.char()
+            if version != FORMAT_VERSION:
+                raise ExecFormatError(f"Unsupported exec format version 0x{version:04x}")
+        elif block == BLOCK_SESSIONINFO:
+            if session is not None or classes:
+                sessions.append((session, classes))
+            session = ExecSession(reader.utf(), reader.long(), reader.long())
+            classes = {}
+        elif block == BLOCK_EXECUTIONDATA:
+            class_id = reader.long()
+            name = reader.utf()
+            _merge(classes, ExecClass(class_id, name, reader.booleans()))
+        else:
+            raise ExecFormatError(f"Unknown block type 0x{block:02x} at offset {reader.pos - 1}")
+
+    if session is not None or classes:
+        sessions.append((session, classes))
+    return sessions
+
+
+def _merge(classes: dict, data: ExecClass) -> None:
+    existing = classes.get(data.id)
+    if existing is None:
+        classes[data.id] = ExecClass(data.id, data.name, list(data.probes))
+    elif len(existing.probes) == len(data.probes):
+        existing.probes = [a or b for a, b in zip(existing.probes, data.probes)]
+    else:
+        raise ExecFormatError(f"Incompatible execution data for class {data.name}")
+
+
+def read_exec(path: str) -> tuple[list, dict]:
+    """
+    Read an exec file into (sessions, classes by id).
+
+    Entries for the same class id (several sessions appended to one file)
+    are merged by OR-ing their probes, as JaCoCo's ExecutionDataStore does.
+    """
+    sessions = []
+    classes = {}
+    for session, session_classes in read_sessions(path):
+        if session is not None:
+            sessions.append(session)
+        for data in session_classes.values():
+            _merge(classes, data)
+    return sessions, classes
+
+
+def _crc64_table() -> list:
+    table = []
+    for i in range(256):
+        v = i
+        for _ in range(8):
+            v = (v >> 1) ^ 0xD800000000000000 if v & 1 else v >> 1
+        table.append(v)
+    return table
+
+
+_CRC64_TABLE = _crc64_table()
+
+
+def _crc64_update(crc: int, data: bytes) -> int:
+    table = _CRC64_TABLE
+    for b in data:
+        crc = (crc >> 8) ^ table[(crc ^ b) & 0xFF]
+    return crc
+
+
+def class_id(class_bytes: bytes) -> int:
+    """
+    JaCoCo's class id (CRC64.classId) as the signed long stored in exec files.
+
+    JaCoCo checksums Java 9+ class files as if their major version were
+    Java 8, so the same normalisation is applied here.
+    """
+    if len(class_bytes) > 7 and class_bytes[6] == 0 and class_bytes[7] >= _V9:
+        crc = _crc64_update(0, class_bytes[:7])
+        crc = _crc64_update(crc, bytes([_V1_8]))
+        crc = _crc64_update(crc, class_bytes[8:])
+    else:
+        crc = _crc64_update(0, class_bytes)
+    return crc - (1 << 64) if crc >= 1 << 63 else crc
+
+
+# path -> ((mtime_ns, size), class id)
+_class_id_cache: dict = {}
+_class_id_lock = threading.Lock()
+
+
+def class_file_id(path: str) -> int:
+    """
+    class_id() of a class file, cached on the file's mtime and size.
+    """
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    with _class_id_lock:
+        cached = _class_id_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with open(path, "rb") as f:
+        cid = class_id(f.read())
+    with _class_id_lock:
+        _class_id_cache[path] = (key, cid)
+    return cid
+
+
+def match_class_files(classes: dict, classes_dir: str) -> tuple[list, list, list]:
+    """
+    Match execution data against the compiled classes in classes_dir.
+
+    Returns (current, stale, unexecuted):
+      current     ExecClass entries whose class file has the same id
+      stale       ExecClass entries whose class file was recompiled since
+                  the data was recorded
+      unexecuted  VM names of class files with no execution data at all
+
+    Execution data for classes outside classes_dir (test classes, JUnit,
+    other libraries) is ignored.
+    """
+    by_name = {c.name: c for c in classes.values()}
+    current = []
+    stale = []
+    seen = set()
+
+    for name, data in by_name.items():
+        path = os.path.join(classes_dir, *name.split("/")) + ".class"
+        if not os.path.exists(path):
+            continue
+        if class_file_id(path) == data.id:
+            current.append(data)
+        else:
+            stale.append(data)
+        seen.add(name)
+
+    unexecuted = []
+    for dirpath, _dirnames, filenames in os.walk(classes_dir):
+        for fname in filenames:
+            if not fname.endswith(".class"):
+                continue
+            rel = os.path.relpath(os.path.join(dirpath, fname), classes_dir)
+            name = rel[:-len(".class")].replace(os.sep, "/")
+            if name not in seen and not name.endswith("package-info"):
+                unexecuted.append(name)
+
+    return current, stale, sorted(unexecuted)
@@ -0,0 +1,470 @@
+"""
+Symbol table of the Java sources under codebase/src.
+
+Every .java file is tokenized once (comments, strings and annotations are
+understood) and its type declarations are recorded with their members:
+classes, interfaces, enums and annotation types including nested ones,
+and methods and constructors with full signatures, visibility, modifiers
+and line ranges. Method bodies are skipped, so local and anonymous
+classes are not indexed.
+
+The table is persisted as JSON and refreshed per file by mtime and size,
+so after the first build a lookup only costs a stat() per source file.
+"""
+import collections
+import json
+import os
+import re
+import threading
+
+INDEX_VERSION = 1
+
+_TOKEN_RE = re.compile(
+    r'(?P<ws>\s+)'
+    r'|(?P<comment>//[^\n]*|/\*.*?\*/)'
+    r'|(?P<text>"""(?:\\.|.)*?""")'
+    r'|(?P<string>"(?:\\.|[^"\\\n])*")'
+    r'|(?P<char>\'(?:\\.|[^\'\\\n])+\')'
+    r'|(?P<ident>[^\W\d][\w$]*|\$[\w$]*)'
+    r'|(?P<number>\.?\d[\w.]*)'
+    r'|(?P<ellipsis>\.\.\.)'
+    r'|(?P<punct>.)',
+    re.DOTALL,
+)
+
+MODIFIERS = {
+    "public", "protected", "private", "static", "final", "abstract", "native",
+    "synchronized", "transient", "volatile", "strictfp", "default", "sealed",
+}
+_TYPE_KEYWORDS = {"class", "interface", "enum", "record"}
+_OPEN = {"(": ")", "[": "]", "{": "}"}
+
+
+def tokenize(text: str) -> list[tuple[str, int]]:
+    """
+    Split Java source into (token, line) pairs, dropping whitespace and comments.
+    """
+    tokens = []
+    line = 1
+    for m in _TOKEN_RE.finditer(text):
+        kind = m.lastgroup
+        value = m.group()
+        if kind not in ("ws", "comment"):
+            tokens.append((value, line))
+        line += value.count("\n")
+    return tokens
+
+
+def _join(tokens: list) -> str:
+    out = ""
+    prev = ""
+    for t in tokens:
+        if out and prev not in ("(", "[", ".", "<", "@") and t not in (",", ")", "]", ".", ">", "[", "...", "(", "<"):
+            out += " "
+        elif out and t == "<" and prev in (",", "?"):
+            out += " "
+        out += t
+        prev = t
+    return out
+
+
+def _skip_balanced(tokens: list, i: int) -> int:
+    """
+    tokens[i] is an opening bracket; return the index of its closing partner.
+    """
+    stack = []
+    while i < len(tokens):
+        t = tokens[i][0]
+        if t in _OPEN:
+            stack.append(_OPEN[t])
+        elif stack and t == stack[-1]:
+            stack.pop()
+            if not stack:
+                return i
+        i += 1
+    return len(tokens) - 1
+
+
+def _strip_annotations(header: list) -> list:
+    out = []
+    i = 0
+    while i < len(header):
+        t = header[i][0]
+        if t == "@" and i + 1 < len(header) and header[i + 1][0] != "interface":
+            i += 2
+            while i + 1 < len(header) and header[i][0] == "." :
+                i += 2
+            if i < len(header) and header[i][0] == "(":
+                i = _skip_balanced(header, i) + 1
+            continue
+        out.append(header[i])
+        i += 1
+    return out
+
+
+def _split_top_level(tokens: list, sep: str) -> list:
+    parts = [[]]
+    depth = 0
+    for tok in tokens:
+        t = tok[0]
+        if t in ("<", "(", "["):
+            depth += 1
+        elif t in (">", ")", "]"):
+            depth -= 1
+        if t == sep and depth == 0:
+            parts.append([])
+        else:
+            parts[-1].append(tok)
+    return [p for p in parts if p]
+
+
+def _visibility(modifiers: list, in_interface: bool) -> str:
+    for v in ("public", "protected", "private"):
+        if v in modifiers:
+            return v
+    return "public" if in_interface else "package"
+
+
+def _parse_method(header: list, type_name: str, in_interface: bool, start: int, end: int) -> dict | None:
+    h = _strip_annotations(header)
+    i = 0
+    modifiers = []
+    while i < len(h) and h[i][0] in MODIFIERS:
+        modifiers.append(h[i][0])
+        i += 1
+    type_params = ""
+    if i < len(h) and h[i][0] == "<":
+        close = i
+        depth = 0
+        for close in range(i, len(h)):
+            depth += {"<": 1, ">": -1}.get(h[close][0], 0)
+            if depth == 0:
+                break
+        type_params = _join([t for t, _l in h[i:close + 1]])
+        i = close + 1
+
+    paren = next((k for k in range(i, len(h)) if h[k][0] == "("), None)
+    if paren is None or paren == i:
+        return None
+    name = h[paren - 1][0]
+    return_type = _join([t for t, _l in h[i:paren - 1]])
+    close = _skip_balanced(h, paren)
+
+    params = []
+    for p in _split_top_level(h[paren + 1:close], ","):
+        p = [tok for tok in _strip_annotations(p) if tok[0] != "final"]
+        dims = ""
+        while len(p) >= 3 and p[-1][0] == "]" and p[-2][0] == "[":
+            dims += "[]"
+            p = p[:-2]
+        if len(p) < 2:
+            continue
+        params.append({"type": _join([t for t, _l in p[:-1]]) + dims, "name": p[-1][0]})
+
+    rest = [t for t, _l in h[close + 1:]]
+    throws = []
+    if "throws" in rest:
+        after = rest[rest.index("throws") + 1:]
+        if "default" in after:
+            after = after[:after.index("default")]
+        throws = [_join([t for t, _l in part]) for part in _split_top_level([(t, 0) for t in after], ",")]
+
+    kind = "method"
+    if not return_type:
+        if name != type_name:
+            return None
+        kind = "constructor"
+
+    sig = " ".join(filter(None, [
+        " ".join(modifiers),
+        type_params,
+        return_type,
+        name + "(" + ", ".join(f"{p['type']} {p['name']}" for p in params) + ")",
+    ]))
+    if throws:
+        sig += " throws " + ", ".join(throws)
+
+    return {
+        "name": name,
+        "kind": kind,
+        "visibility": _visibility(modifiers, in_interface),
+        "modifiers": modifiers,
+        "type_params": type_params,
+        "return_type": return_type or None,
+        "params": params,
+        "throws": throws,
+        "signature": sig,
+        "start_line": start,
+        "end_line": end,
+    }
+
+
+def _parse_members(tokens: list, i: int, owner: dict | None, prefix: str, out: list) -> int:
+    """
+    Parse declarations from tokens[i] until the closing brace of `owner`
+    (or the end of the file at top level). Returns the index of that brace.
+    """
+    in_interface = owner is not None and owner["kind"] in ("interface", "annotation")
+
+    if owner is not None and owner["kind"] == "enum":
+        # Enum constants come first, up to the first top-level ';'
+        while i < len(tokens) and tokens[i][0] not in (";", "}"):
+            if tokens[i][0] in _OPEN:
+                i = _skip_balanced(tokens, i)
+            i += 1
+        if i < len(tokens) and tokens[i][0] == ";":
+            i += 1
+
+    while i < len(tokens):
+        t = tokens[i][0]
+        if t == "}":
+            return i
+        if t == ";":
+            i += 1
+            continue
+
+        # Collect a declaration header up to its body '{' or closing ';'
+        j = i
+        saw_assign = False
+        while j < len(tokens):
+            tj = tokens[j][0]
+            if tj in ("(", "["):
+                j = _skip_balanced(tokens, j)
+            elif tj == "=":
+                saw_assign = True
+            elif tj == "{":
+                if not saw_assign:
+                    break
+                j = _skip_balanced(tokens, j)
+            elif tj == ";" or tj == "}":
+                break
+            j += 1
+        if j >= len(tokens):
+            return j
+        header = tokens[i:j]
+        start = header[0][1] if header else tokens[j][1]
+
+        if tokens[j][0] == "}":
+            # Stray tokens before the closing brace
+            return j
+
+        if tokens[j][0] == ";":
+            if owner is not None and "(" in [t for t, _l in header] and not saw_assign:
+                method = _parse_method(header, owner["name"], in_interface, start, tokens[j][1])
+                if method:
+                    owner["methods"].append(method)
+            i = j + 1
+            continue
+
+        # Body follows at tokens[j] == '{'
+        plain = _strip_annotations(header)
+        words = [t for t, _l in plain]
+        kind = None
+        for k, w in enumerate(words):
+            if w in _TYPE_KEYWORDS and k + 1 < len(words):
+                if w == "record" and not (k + 2 < len(words) and words[k + 2] in ("(", "<")):
+                    continue
+                kind = w
+                name = words[k + 1]
+                break
+            if w == "@" and k + 2 < len(words) and words[k + 1] == "interface":
+                kind = "annotation"
+                name = words[k + 2]
+                break
+
+        if kind is not None:
+            modifiers = [w for w in words if w in MODIFIERS]
+            qualified = f"{prefix}.{name}" if prefix else name
+            entry = {
+                "name": name,
+                "qualified": qualified,
+                "kind": kind,
+                "visibility": _visibility(modifiers, in_interface),
+                "modifiers": modifiers,
+                "start_line": start,
+                "end_line": None,
+                "methods": [],
+            }
+            out.append(entry)
+            close = _parse_members(tokens, j + 1, entry, qualified, out)
+            entry["end_line"] = tokens[min(close, len(tokens) - 1)][1]
+            i = close + 1
+            continue
+
+        close = _skip_balanced(tokens, j)
+        if owner is not None and "(" in words:
+            method = _parse_method(header, owner["name"], in_interface, start, tokens[close][1])
+            if method:
+                owner["methods"].append(method)
+        i = close + 1
+
+    return i
+
+
+def parse_source(text: str) -> dict:
+    """
+    {"package": ..., "types": [...]} for one compilation unit. Nested types
+    are listed flat, with "qualified" names relative to the package
+    ("Outer.Inner").
+    """
+    tokens = tokenize(text)
+    package = ""
+    i = 0
+    while i < len(tokens) and tokens[i][0] in ("package", "import", "@", ";"):
+        if tokens[i][0] == "@" and (i + 1 >= len(tokens) or tokens[i + 1][0] != "interface"):
+            # Package annotations
+            i += 2
+            if i < len(tokens) and tokens[i][0] == "(":
+                i = _skip_balanced(tokens, i) + 1
+            continue
+        if tokens[i][0] == "@":
+            break
+        j = i
+        while j < len(tokens) and tokens[j][0] != ";":
+            j += 1
+        if tokens[i][0] == "package":
+            package = "".join(t for t, _l in tokens[i + 1:j])
+        i = j + 1
+
+    types = []
+    _parse_members(tokens, i, None, "", types)
+    return {"package": package, "types": types}
+
+
+def binary_name(package: str, jtype: dict) -> str:
+    """
+    JVM binary name of an indexed type: "org.apache.commons.lang3.builder.ToStringStyle$DefaultToStringStyle".
+    """
+    nested = "$".join(jtype["qualified"].split("."))
+    return f"{package}.{nested}" if package else nested
+
+
+class SourceIndex:
+    """
+    Persistent symbol table of all .java files below a source root.
+    """
+
+    def __init__(self, src_dir: str, index_path: str):
+        self.src_dir = src_dir
+        self.index_path = index_path
+        self.files = {}
+        self._by_name = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self.files = data["files"]
+        except (OSError, ValueError, KeyError):
+            self.files = {}
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "files": self.files}, f)
+        os.replace(tmp, self.index_path)
+
+    def refresh(self) -> int:
+        """
+        Re-parse files whose mtime or size changed and drop deleted ones.
+        Returns the number of files parsed.
+        """
+        with self._lock:
+            seen = set()
+            parsed = 0
+            for dirpath, _dirnames, filenames in os.walk(self.src_dir):
+                for fname in filenames:
+                    if not fname.endswith(".java"):
+                        continue
+                    path = os.path.join(dirpath, fname)
+                    rel = os.path.relpath(path, self.src_dir).replace(os.sep, "/")
+                    seen.add(rel)
+                    st = os.stat(path)
+                    entry = self.files.get(rel)
+                    if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+                        continue
+                    with open(path, "r", encoding="ISO-8859-1") as f:
+                        parsed_file = parse_source(f.read())
+                    parsed_file.update(mtime_ns=st.st_mtime_ns, size=st.st_size)
+                    self.files[rel] = parsed_file
+                    parsed += 1
+
+            removed = [rel for rel in self.files if rel not in seen]
+            for rel in removed:
+                del self.files[rel]
+
+            if parsed or removed or not self._by_name:
+                self._by_name = {}
+                for rel, entry in self.files.items():
+                    package = entry["package"]
+                    for t in entry["types"]:
+                        fq = f"{package}.{t['qualified']}" if package else t["qualified"]
+                        self._by_name[fq] = (rel, t)
+                        self._by_name[fq.replace(".", "/")] = (rel, t)
+                        self._by_name[binary_name(package, t)] = (rel, t)
+            if parsed or removed:
+                self._save()
+            return parsed
+
+    def find_type(self, name: str) -> tuple[str, dict] | None:
+        """
+        (source path relative to src_dir, type entry) for a fully qualified
+        name: "org.apache.commons.lang3.Range", "...Outer.Inner" or "...Outer$Inner".
+        """
+        return self._by_name.get(name)
+
+    def package_of(self, rel: str) -> str:
+        return self.files[rel]["package"]
+
+    def types(self):
+        for rel, entry in self.files.items():
+            for t in entry["types"]:
+                yield rel, entry["package"], t
+
+
+_indexes: dict = {}
+_indexes_lock = threading.Lock()
+
+
+def load_index(src_dir: str, index_path: str) -> SourceIndex:
+    """
+    The shared SourceIndex for src_dir, refreshed against the files on disk.
+    """
+    with _indexes_lock:
+        index = _indexes.get((src_dir, index_path))
+        if index is None:
+            index = _indexes[(src_dir, index_path)] = SourceIndex(src_dir, index_path)
+    index.refresh()
+    return index
+
+
+SOURCE_CACHE_FILES = 64
+# path -> ((mtime_ns, size), [lines]), least recently used first
+_source_lines: collections.OrderedDict = collections.OrderedDict()
+_source_lines_lock = threading.Lock()
+
+
+def source_lines(path: str) -> list[str]:
+    """
+    Lines of a source file (index 0 is line 1), cached on mtime and size
+    for the SOURCE_CACHE_FILES most recently used files.
+    """
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    with _source_lines_lock:
+        cached = _source_lines.get(path)
+        if cached is not None and cached[0] == key:
+            _source_lines.move_to_end(path)
+            return cached[1]
+    with open(path, "r", encoding="ISO-8859-1") as f:
+        lines = f.read().splitlines()
+    with _source_lines_lock:
+        _source_lines[path] = (key, lines)
+        _source_lines.move_to_end(path)
+        while len(_source_lines) > SOURCE_CACHE_FILES:
+            _source_lines.popitem(last=False)
+    return lines
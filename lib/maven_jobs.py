@@ -0,0 +1,241 @@
+"""
+Background Maven runs for the MCP server.
+
+Jobs run on the server's asyncio event loop through
+asyncio.create_subprocess_exec, so tool calls keep being served while a
+build is going. Jobs share codebase/target, so they run one at a time in
+submission order; the rest wait in the queue.
+
+While a job runs, its output lines are written to a build log (see
+build_logs) as they arrive and the surefire progress lines ("Running X" /
+"Tests run: ...") are turned into per-test-class results.
+
+Each job's process runs in its own process group under the job's limits
+(see process_tree); exceeding one, or cancelling the job, stops Maven
+together with the JVMs it forked.
+"""
+import asyncio
+import itertools
+import re
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from lib import build_logs, process_tree
+
+# Surefire console lines (2.x "Running X" and 3.x "[INFO] Running X")
+_RUNNING_RE = re.compile(r"Running (\S+)\s*$")
+_TESTS_RUN_RE = re.compile(
+    r"Tests run: (\d+), Failures: (\d+), Errors: (\d+), Skipped: (\d+)"
+    r"(?:, Time elapsed: ([\d.,]+))?"
+)
+
+QUEUED = "queued"
+RUNNING = "running"
+PASSED = "passed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+ERROR = "error"
+
+# Finished jobs kept for maven_job_status; older ones are forgotten when a
+# new job is submitted (their log files are pruned by build_logs)
+MAX_FINISHED_JOBS = build_logs.MAX_LOGS
+# How often a job waiting for the build lock checks it again
+LOCK_POLL_SECONDS = 0.1
+
+
+@dataclass
+class TestClassResult:
+    name: str
+    tests: int
+    failures: int
+    errors: int
+    skipped: int
+    seconds: float | None
+
+    @property
+    def ok(self) -> bool:
+        return self.failures == 0 and self.errors == 0
+
+
+@dataclass
+class MavenJob:
+    """
+    One queued or running Maven build.
+
+    before(job) runs in a worker thread right before the process starts and
+    returns a note for the output; it may fill in or replace cmd and
+    description, and a job whose cmd is still empty afterwards passes
+    without running anything. after(returncode, elapsed) runs once the
+    process exits and returns text appended to the output. A job stopped
+    by its limits fails with `stopped` saying why, and after() is not run.
+    """
+    id: str
+    description: str
+    cmd: list
+    cwd: str
+    log: build_logs.BuildLog
+    before: Callable | None = None
+    after: Callable | None = None
+    limits: process_tree.Limits = field(default_factory=process_tree.Limits)
+    status: str = QUEUED
+    returncode: int | None = None
+    submitted: float = field(default_factory=time.time)
+    started: float | None = None
+    finished: float | None = None
+    tests: list = field(default_factory=list)
+    process: asyncio.subprocess.Process | None = None
+    stopped: str | None = None
+    _current_class: str | None = None
+
+    def add_line(self, line: str) -> None:
+        self.log.add(line)
+        m = _RUNNING_RE.search(line)
+        if m:
+            self._current_class = m.group(1)
+            return
+        m = _TESTS_RUN_RE.search(line)
+        if m and self._current_class:
+            elapsed = m.group(5)
+            self.tests.append(TestClassResult(
+                self._current_class,
+                int(m.group(1)),
+                int(m.group(2)),
+                int(m.group(3)),
+                int(m.group(4)),
+                float(elapsed.replace(",", "")) if elapsed else None,
+            ))
+            self._current_class = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (PASSED, FAILED, CANCELLED, ERROR)
+
+
+class JobQueue:
+    """
+    FIFO of MavenJobs executed one at a time on the running event loop.
+
+    lock, when given, is held from a job's before() until its process has
+    exited, so builds outside the queue that share the working tree can
+    keep out of the way (and jobs wait for them). Only the newest
+    MAX_FINISHED_JOBS finished jobs are kept.
+    """
+
+    def __init__(self, log_dir: str, lock: "threading.Lock | None" = None) -> None:
+        self.log_dir = log_dir
+        self.lock = lock
+        self.jobs: dict = {}
+        self._ids = itertools.count(1)
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+
+    def submit(self, description: str, cmd: list, cwd: str,
+               before: Callable | None = None, after: Callable | None = None,
+               limits: process_tree.Limits | None = None) -> MavenJob:
+        # Must be called from a coroutine running on the server's loop
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            for job in self.jobs.values():
+                if job.status == QUEUED:
+                    self._queue.put_nowait(job)
+            self._worker = asyncio.get_running_loop().create_task(self._work())
+
+        self._forget_finished()
+        job_id = f"job-{next(self._ids)}"
+        log = build_logs.open_log(self.log_dir, job_id)
+        job = MavenJob(job_id, description, cmd, cwd, log, before, after, limits or process_tree.Limits())
+        self.jobs[job.id] = job
+        self._queue.put_nowait(job)
+        return job
+
+    def _forget_finished(self) -> None:
+        finished = [job for job in self.jobs.values() if job.done]
+        for job in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self.jobs[job.id]
+            build_logs.forget(job.log)
+
+    def cancel(self, job_id: str) -> MavenJob | None:
+        job = self.jobs.get(job_id)
+        if job is None or job.done:
+            return job
+        if job.status == QUEUED:
+            job.finished = time.time()
+            job.log.close()
+        elif job.process is not None and job.process.returncode is None:
+            # kill_tree waits out the grace period; the loop must keep running
+            threading.Thread(target=process_tree.kill_tree, args=(job.process,), daemon=True).start()
+        # A running job without a process yet stops before starting one
+        job.status = CANCELLED
+        return job
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            if job.status == QUEUED:
+                await self._run(job)
+
+    async def _run(self, job: MavenJob) -> None:
+        if self.lock is not None:
+            # Polled on the loop rather than acquired in a worker thread: a
+            # thread would still take the lock after this task is cancelled
+            # and nothing would release it
+            while not self.lock.acquire(blocking=False):
+                await asyncio.sleep(LOCK_POLL_SECONDS)
+        try:
+            if job.status == QUEUED:
+                await self._execute(job)
+        finally:
+            if self.lock is not None:
+                self.lock.release()
+
+    async def _execute(self, job: MavenJob) -> None:
+        job.status = RUNNING
+        job.started = time.time()
+        try:
+            if job.before is not None:
+                note = await asyncio.to_thread(job.before, job)
+                for line in note.splitlines():
+                    job.add_line(line)
+            if job.status == CANCELLED:
+                job.log.close()
+                return
+            if not job.cmd:
+                job.status = PASSED
+                job.log.close()
+                return
+
+            job.process = await asyncio.create_subprocess_exec(
+                *job.cmd,
+                cwd=job.cwd,
+                stdin=subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                **process_tree.popen_kwargs(),
+            )
+            with process_tree.Watchdog(job.process, job.limits) as usage:
+                async for raw in job.process.stdout:
+                    job.add_line(raw.decode("utf-8", errors="replace").rstrip("\r\n"))
+                job.returncode = await job.process.wait()
+            if usage.exceeded:
+                job.stopped = usage.summary()
+            job.add_line(f"---- {usage.summary()} ----")
+        except Exception as e:
+            job.add_line(f"Error running {job.description}: {e}")
+            job.status = ERROR
+        finally:
+            job.process = None
+            job.finished = time.time()
+
+        if job.status == RUNNING:
+            job.status = PASSED if job.returncode == 0 else FAILED
+        if job.after is not None and job.status in (PASSED, FAILED) and not job.stopped:
+            try:
+                extra = await asyncio.to_thread(job.after, job.returncode, job.finished - job.started)
+                for line in extra.splitlines():
+                    job.add_line(line)
+            except Exception as e:
+                job.add_line(f"Error finishing job: {e}")
+        job.log.close()
@@ -0,0 +1,299 @@
+"""
+Run child processes under limits and stop them as a whole tree.
+
+Maven forks surefire JVMs (and javac, and the JaCoCo agent's JVMs), so
+terminating only the mvn process can leave test JVMs running and holding
+target/. Started with popen_kwargs(), a child is the leader of a new
+process group (a new session on POSIX, CREATE_NEW_PROCESS_GROUP on
+Windows) that its forks inherit; kill_tree() interrupts that group, as
+Ctrl-C would, and kills what is still alive after a grace period.
+
+A Watchdog thread enforces Limits on a running child: wall-clock time,
+CPU time and resident memory of the whole tree. The tree is every process
+in the child's session on Linux (read from /proc), or the child and its
+descendants through psutil where that is installed; without either only
+the wall-clock limit applies. CPU time includes the children that members
+of the tree have already reaped.
+
+Every tool has its own limits: DEFAULT_LIMITS, which limits_for() lets
+environment variables override (see "Tool limits" in README.md).
+"""
+import os
+import signal
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+
+try:
+    import psutil
+except ImportError:  # optional; /proc is used on Linux
+    psutil = None
+
+KILL_GRACE = 5.0
+MB = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class Limits:
+    """
+    Wall-clock and CPU seconds and resident megabytes; None is unlimited.
+    """
+    timeout: float | None = None
+    cpu_seconds: float | None = None
+    memory_mb: float | None = None
+
+
+DEFAULT_LIMITS = {
+    # Limits apply to each process a tool starts
+    "run_maven_tests": Limits(timeout=1800),
+    "start_maven_tests": Limits(timeout=1800),
+    "detect_flaky_tests": Limits(timeout=900),
+    "mvnd": Limits(timeout=120),
+    "javac": Limits(timeout=300),
+    "git_status": Limits(timeout=30),
+    "git_add_all": Limits(timeout=60),
+    "git_commit": Limits(timeout=120),
+    "git_push": Limits(timeout=120),
+    "git_batch": Limits(timeout=120),
+}
+FALLBACK_LIMITS = Limits(timeout=600)
+
+
+def _env_limit(name: str, default: float | None) -> float | None:
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number, got {value!r}") from None
+    return number if number > 0 else None
+
+
+def limits_for(tool: str) -> Limits:
+    base = DEFAULT_LIMITS.get(tool, FALLBACK_LIMITS)
+    name = tool.upper()
+    return Limits(
+        _env_limit(f"MCP_TIMEOUT_{name}", base.timeout),
+        _env_limit(f"MCP_CPU_{name}", base.cpu_seconds),
+        _env_limit(f"MCP_MEMORY_MB_{name}", base.memory_mb),
+    )
+
+
+def popen_kwargs() -> dict:
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def _exited(proc) -> bool:
+    # proc is a subprocess.Popen or an asyncio.subprocess.Process
+    if isinstance(proc, subprocess.Popen):
+        return proc.poll() is not None
+    return proc.returncode is not None
+
+
+def _wait(proc, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while not _exited(proc):
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def _signal_group(pid: int, sig) -> None:
+    try:
+        os.killpg(pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def kill_tree(proc, grace: float = KILL_GRACE) -> None:
+    """
+    Stop proc, started with popen_kwargs(), and every process in its group.
+    proc is a subprocess.Popen or an asyncio.subprocess.Process (whose
+    event loop keeps running while this waits).
+
+    SIGINT (CTRL_BREAK_EVENT on Windows) first: Maven runs its shutdown
+    hooks and mvnd cancels the build in the daemon. Whatever is left after
+    grace seconds is killed.
+    """
+    if os.name == "nt":
+        if not _exited(proc):
+            try:
+                os.kill(proc.pid, signal.CTRL_BREAK_EVENT)
+            except OSError:
+                pass
+            _wait(proc, grace)
+        # taskkill /T also reaches children that outlived the leader
+        subprocess.run(["taskkill", "/PID", str(proc.pid), "/T", "/F"],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
+
+    _signal_group(proc.pid, signal.SIGINT)
+    _wait(proc, grace)
+    # Forked JVMs can outlive mvn; the group id stays valid while any member lives
+    _signal_group(proc.pid, signal.SIGKILL)
+
+
+def _proc_usage(session: int) -> tuple[float, int]:
+    """
+    (CPU seconds, resident bytes) of the processes in a session, from /proc.
+    """
+    ticks = os.sysconf("SC_CLK_TCK")
+    page = os.sysconf("SC_PAGE_SIZE")
+    cpu = rss = 0
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                data = f.read()
+        except OSError:
+            continue
+        # After "pid (comm) ": state ppid pgrp session ... utime(11) stime
+        # cutime cstime ... rss(21)
+        fields = data[data.rindex(b")") + 2:].split()
+        if int(fields[3]) != session:
+            continue
+        cpu += sum(int(v) for v in fields[11:15])
+        rss += int(fields[21])
+    return cpu / ticks, rss * page
+
+
+def _psutil_usage(pid: int) -> tuple[float, int] | None:
+    try:
+        root = psutil.Process(pid)
+        procs = [root] + root.children(recursive=True)
+    except psutil.Error:
+        return None
+    cpu = rss = 0
+    for p in procs:
+        try:
+            times = p.cpu_times()
+            cpu += times.user + times.system
+            rss += p.memory_info().rss
+        except psutil.Error:
+            pass
+    return cpu, rss
+
+
+def tree_usage(pid: int) -> tuple[float, int] | None:
+    """
+    (CPU seconds, resident bytes) of the tree started as pid, or None where
+    neither /proc nor psutil is available.
+    """
+    if os.name != "nt" and os.path.isdir("/proc/self"):
+        return _proc_usage(pid)
+    if psutil is not None:
+        return _psutil_usage(pid)
+    return None
+
+
+class Watchdog:
+    """
+    Enforces limits on a process started with popen_kwargs() from a
+    background thread, killing its tree when one is exceeded. Use it as a
+    context manager around reading the process's output and waiting for
+    it.
+
+    Afterwards exceeded names the limit that stopped the process (None if
+    none did), and summary() describes that and the resources used.
+    """
+    INTERVAL = 0.5
+
+    def __init__(self, proc, limits: Limits):
+        self.proc = proc
+        self.limits = limits
+        self.elapsed = 0.0
+        self.cpu_seconds: float | None = None
+        self.peak_rss: int | None = None
+        self.exceeded: str | None = None
+        self._started = time.monotonic()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+
+    def __enter__(self) -> "Watchdog":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self._done.set()
+        self._thread.join()
+        self.elapsed = time.monotonic() - self._started
+        return False
+
+    def _sample(self) -> None:
+        usage = tree_usage(self.proc.pid)
+        if usage is None:
+            return
+        cpu, rss = usage
+        # Members that exit take their CPU time with them; keep the maximum
+        self.cpu_seconds = max(cpu, self.cpu_seconds or 0.0)
+        self.peak_rss = max(rss, self.peak_rss or 0)
+
+    def _check(self) -> str | None:
+        limits = self.limits
+        if limits.timeout and time.monotonic() - self._started >= limits.timeout:
+            return f"wall-clock limit of {limits.timeout:g} s"
+        if limits.cpu_seconds and (self.cpu_seconds or 0) >= limits.cpu_seconds:
+            return f"CPU limit of {limits.cpu_seconds:g} s"
+        if limits.memory_mb and (self.peak_rss or 0) >= limits.memory_mb * MB:
+            return f"memory limit of {limits.memory_mb:g} MB"
+        return None
+
+    def _watch(self) -> None:
+        while True:
+            interval = self.INTERVAL
+            if self.limits.timeout:
+                remaining = self.limits.timeout - (time.monotonic() - self._started)
+                interval = max(min(interval, remaining), 0.0)
+            if self._done.wait(interval):
+                return
+            self._sample()
+            self.exceeded = self._check()
+            if self.exceeded:
+                kill_tree(self.proc)
+                return
+
+    def summary(self) -> str:
+        usage = f"{self.elapsed:.1f} s wall-clock"
+        if self.cpu_seconds is not None:
+            usage += f", {self.cpu_seconds:.1f} s CPU, {self.peak_rss / MB:.0f} MB peak memory"
+        if self.exceeded:
+            return f"Stopped: exceeded the {self.exceeded}; killed the process tree ({usage}). Output is partial."
+        return f"Resource usage: {usage}"
+
+
+class CompletedRun(subprocess.CompletedProcess):
+    """
+    A CompletedProcess that also carries the run's Watchdog as usage.
+    """
+
+    def __init__(self, args, returncode, stdout, stderr, usage: Watchdog):
+        super().__init__(args, returncode, stdout, stderr)
+        self.usage = usage
+
+
+def run(cmd: list[str], limits: Limits, cwd: str | None = None, env: dict | None = None) -> CompletedRun:
+    """
+    subprocess.run(cmd, capture_output=True, text=True) under limits, with
+    no stdin. A process stopped by a limit returns what it wrote so far.
+    """
+    with subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        **popen_kwargs(),
+    ) as proc:
+        with Watchdog(proc, limits) as usage:
+            stdout, stderr = proc.communicate()
+    return CompletedRun(cmd, proc.returncode, stdout, stderr, usage)
@@ -0,0 +1,133 @@
+"""
+Structured view of surefire's TEST-*.xml reports.
+
+Each report file is parsed into TestCaseResult records (class, method,
+status, duration, failure message). Files are parsed in a thread pool and
+the records are cached per file on its mtime and size, so after a run only
+the rewritten reports are parsed again.
+"""
+import os
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+PASSED = "passed"
+FAILED = "failed"
+ERROR = "error"
+SKIPPED = "skipped"
+
+
+@dataclass(slots=True)
+class TestCaseResult:
+    class_name: str
+    method: str
+    status: str
+    seconds: float
+    message: str | None = None
+    type: str | None = None
+
+    def as_dict(self) -> dict:
+        d = {
+            "class": self.class_name,
+            "method": self.method,
+            "status": self.status,
+            "seconds": self.seconds,
+        }
+        if self.message is not None or self.type is not None:
+            d["type"] = self.type
+            d["message"] = self.message
+        return d
+
+
+# path -> ((mtime_ns, size), [TestCaseResult])
+_cache: dict = {}
+_cache_lock = threading.Lock()
+
+
+def _seconds(value: str | None) -> float:
+    # Older surefire versions write "1,234.5" for long durations
+    try:
+        return float((value or "0").replace(",", ""))
+    except ValueError:
+        return 0.0
+
+
+def parse_report(path: str) -> list:
+    """
+    Parse one TEST-*.xml file into TestCaseResult records.
+    """
+    results = []
+    for _event, elem in ET.iterparse(path):
+        if elem.tag == "properties":
+            elem.clear()
+        elif elem.tag == "testcase":
+            status, message, etype = PASSED, None, None
+            for child in elem:
+                if child.tag in ("failure", "error"):
+                    status = FAILED if child.tag == "failure" else ERROR
+                    message = child.get("message")
+                    etype = child.get("type")
+                    break
+                if child.tag == "skipped":
+                    status = SKIPPED
+                    message = child.get("message")
+            results.append(TestCaseResult(
+                elem.get("classname", ""),
+                elem.get("name", ""),
+                status,
+                _seconds(elem.get("time")),
+                message,
+                etype,
+            ))
+            elem.clear()
+    return results
+
+
+def _cached_report(path: str) -> list:
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        cached = _cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    results = parse_report(path)
+    with _cache_lock:
+        _cache[path] = (key, results)
+    return results
+
+
+def load_results(reports_dir: str, workers: int = 8) -> list:
+    """
+    All test case results under reports_dir, parsing changed files in parallel.
+    """
+    paths = sorted(
+        os.path.join(reports_dir, f)
+        for f in os.listdir(reports_dir)
+        if f.startswith("TEST-") and f.endswith(".xml")
+    )
+    with _cache_lock:
+        # Forget reports that were deleted (e.g. by mvn clean)
+        for path in [p for p in _cache if os.path.dirname(p) == reports_dir and p not in paths]:
+            del _cache[path]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        per_file = list(pool.map(_cached_report, paths))
+    return [r for results in per_file for r in results]
+
+
+def summarize(results: list, slowest: int = 10) -> dict:
+    """
+    Totals, failures and the slowest tests as a JSON-ready dict.
+    """
+    totals = {"tests": len(results), PASSED: 0, FAILED: 0, ERROR: 0, SKIPPED: 0}
+    for r in results:
+        totals[r.status] += 1
+    totals["seconds"] = round(sum(r.seconds for r in results), 3)
+    totals["classes"] = len({r.class_name for r in results})
+
+    return {
+        "totals": totals,
+        "failures": [r.as_dict() for r in results if r.status in (FAILED, ERROR)],
+        "slowest": [r.as_dict() for r in sorted(results, key=lambda r: r.seconds, reverse=True)[:slowest]],
+    }
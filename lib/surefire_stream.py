@@ -0,0 +1,177 @@
+"""
+Fail-fast watcher over surefire's console output.
+
+FailFastWatcher is fed the build output line by line and says when a test
+run has told us what we need: the first failing test (with its exception
+and the top of its stack trace), or the completion of every targeted test
+class. The caller can then stop Maven instead of waiting for the rest of
+the suite and the report goals.
+
+Recognized surefire output (2.x and 3.x):
+
+  Running org.x.FooTest
+  Tests run: 5, Failures: 1, Errors: 0, Skipped: 0, Time elapsed: 0.1 s <<< FAILURE! - in org.x.FooTest
+  testBar(org.x.FooTest)  Time elapsed: 0.01 s  <<< FAILURE!            (2.19+)
+  org.x.FooTest.testBar -- Time elapsed: 0.01 s <<< FAILURE!            (3.x)
+  java.lang.AssertionError: expected:<1> but was:<2>
+  	at org.x.FooTest.testBar(FooTest.java:42)
+
+Versions that print no per-test block (older 2.x) still print the class
+line; the failure is then read from the class's TEST-*.xml report, unless
+that report is older than the run (left over from an earlier build).
+"""
+import os
+import re
+import time
+
+from lib import surefire_reports
+
+_LEVEL = r"^(?:\[\w+\]\s+)?"
+_RUNNING_RE = re.compile(_LEVEL + r"Running (\S+)\s*$")
+_CLASS_DONE_RE = re.compile(
+    _LEVEL + r"Tests run: (\d+), Failures: (\d+), Errors: (\d+), Skipped: (\d+)"
+    r"(?:, Time elapsed: [\d.,]+ \w+)?(?: <<< (?:FAILURE|ERROR)!)?(?: -+ in (\S+))?"
+)
+_METHOD_RE = re.compile(
+    _LEVEL + r"(?:(?P<m2>[\w$\[\]., -]+?)\((?P<c2>[\w.$]+)\)|(?P<c3>[\w.$]+)\.(?P<m3>[^.\s]+?))"
+    r"\s+(?:--\s+)?Time elapsed: .*<<< (?P<kind>FAILURE|ERROR)!"
+)
+# Lines of a stack trace after the exception line
+_TRACE_RE = re.compile(r"^\s+(?:at |\.\.\. \d+ more|Caused by: )|^Caused by: ")
+MAX_TRACE_LINES = 25
+
+
+def _is_marker(line: str) -> bool:
+    """
+    A line that starts something new rather than continuing a message.
+    """
+    return bool(line.startswith("[") or _METHOD_RE.match(line) or _RUNNING_RE.match(line)
+                or _CLASS_DONE_RE.match(line))
+
+
+class FailFastWatcher:
+    """
+    Feed lines with feed(); it returns True once the run can be stopped.
+    Afterwards `failure` is the first failure record (or None) and
+    `completed` lists the test classes that finished.
+
+    targets are the test classes to wait for (simple or qualified names);
+    with no targets only a failure stops the run. Reports in reports_dir
+    written before `since` (a time.time() value, by default when the
+    watcher was made) are ignored.
+    """
+
+    def __init__(self, targets: list[str] | None = None, reports_dir: str | None = None,
+                 since: float | None = None):
+        self.targets = [t for t in (targets or []) if t]
+        self.reports_dir = reports_dir
+        self.since = time.time() if since is None else since
+        self.completed: list[str] = []
+        self.failure: dict | None = None
+        self.done = False
+        self._current: str | None = None
+        self._failed_class: str | None = None
+        self._record: dict | None = None
+        self._in_frames = False
+
+    def _finish(self) -> bool:
+        if self._record is None and self._failed_class is not None:
+            self._record = self._from_report(self._failed_class)
+        if self._record is not None:
+            self.failure = self._record
+            self.done = True
+        return self.done
+
+    def _from_report(self, class_name: str) -> dict:
+        record = {"class": class_name, "method": None, "kind": "failure",
+                  "type": None, "message": None, "trace": []}
+        if not self.reports_dir:
+            return record
+        path = os.path.join(self.reports_dir, f"TEST-{class_name}.xml")
+        try:
+            # One second of slack for file systems with coarse timestamps
+            if os.path.getmtime(path) < self.since - 1:
+                return record
+            results = surefire_reports.parse_report(path)
+        except (OSError, SyntaxError):
+            return record
+        for r in results:
+            if r.status in (surefire_reports.FAILED, surefire_reports.ERROR):
+                record.update(method=r.method, type=r.type, message=r.message,
+                              kind="failure" if r.status == surefire_reports.FAILED else "error")
+                break
+        return record
+
+    def _targets_done(self) -> bool:
+        return bool(self.targets) and all(
+            any(c == t or c.endswith("." + t) for c in self.completed) for t in self.targets
+        )
+
+    def feed(self, line: str) -> bool:
+        if self.done:
+            return True
+        record = self._record
+
+        if record is not None:
+            # Inside a failed test's block: the exception line (and the rest
+            # of a multi-line message), then the stack frames
+            stripped = line.strip()
+            if _TRACE_RE.match(line):
+                self._in_frames = True
+                if len(record["trace"]) < MAX_TRACE_LINES:
+                    record["trace"].append(stripped)
+                return False
+            if stripped and not self._in_frames and not _is_marker(line):
+                if record["type"] is None:
+                    exc, _sep, message = stripped.partition(": ")
+                    record["type"], record["message"] = exc, message or None
+                else:
+                    record["message"] = ((record["message"] or "") + "\n" + stripped).lstrip("\n")
+                if len(record["trace"]) < MAX_TRACE_LINES:
+                    record["trace"].append(stripped)
+                return False
+            return self._finish()
+
+        m = _METHOD_RE.match(line)
+        if m:
+            self._record = {
+                "class": m.group("c2") or m.group("c3"),
+                "method": (m.group("m2") or m.group("m3")).strip(),
+                "kind": m.group("kind").lower(),
+                "type": None,
+                "message": None,
+                "trace": [],
+            }
+            self._in_frames = False
+            return False
+
+        if self._failed_class is not None and line.strip():
+            # A failed class without a per-test block: use its report
+            return self._finish()
+
+        m = _RUNNING_RE.match(line)
+        if m:
+            self._current = m.group(1)
+            return False
+
+        m = _CLASS_DONE_RE.match(line)
+        if m:
+            # The run's closing totals repeat this line without a class
+            name = m.group(5) or self._current
+            self._current = None
+            if name is None:
+                return False
+            self.completed.append(name)
+            if int(m.group(2)) or int(m.group(3)):
+                self._failed_class = name
+                return False
+            if self._targets_done():
+                self.done = True
+        return self.done
+
+    def close(self) -> None:
+        """
+        The output ended; settle a failure still being read.
+        """
+        if not self.done and (self._record is not None or self._failed_class is not None):
+            self._finish()
@@ -0,0 +1,253 @@
+"""
+Test impact index: which test classes execute which methods and lines.
+
+Built from a jacoco.exec recorded with one session per test class (the
+`jacoco-per-test` Maven profile, see PerTestCoverageListener). Each
+session's probe arrays are mapped to methods and lines with
+class_probes, and the result is inverted into
+
+  source file -> method -> test classes
+  source file -> line   -> test classes
+
+The index is persisted as JSON together with a copy of the indexed
+sources, so a later edit can be diffed against exactly the code the line
+numbers refer to. It is rebuilt whenever jacoco.exec changes.
+
+Data recorded before a class was recompiled cannot be mapped to its new
+probes; its source file is marked stale and left to the caller's
+fallback until a per-test run records it again.
+"""
+import difflib
+import json
+import os
+import shutil
+import threading
+
+from lib import class_probes, jacoco_exec
+
+INDEX_VERSION = 2
+INDEX_FILE = "test_impact.json"
+SOURCES_DIR = "test_impact_src"
+
+_cache: dict = {}
+_cache_lock = threading.Lock()
+
+
+def _file_key(path: str) -> list:
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def build_index(exec_path: str, classes_dir: str, test_classes_dir: str,
+                main_src_dir: str, state_dir: str) -> dict | None:
+    """
+    Build and persist the index. Returns None when exec_path has no
+    per-test-class sessions.
+    """
+    key = _file_key(exec_path)
+    tests = []
+    test_ids = {}
+    sources = {}
+    stale = set()
+
+    for session, classes in jacoco_exec.read_sessions(exec_path):
+        # Only sessions named after a compiled test class are per-test data
+        if session is None:
+            continue
+        test_file = os.path.join(test_classes_dir, *session.id.split(".")) + ".class"
+        if not os.path.exists(test_file):
+            continue
+        ti = test_ids.get(session.id)
+        if ti is None:
+            ti = test_ids[session.id] = len(tests)
+            tests.append(session.id)
+
+        for data in classes.values():
+            class_file = os.path.join(classes_dir, *data.name.split("/")) + ".class"
+            # Skip other classes (tests, libraries) and data made stale by a recompile
+            if not any(data.probes) or not os.path.exists(class_file):
+                continue
+            probes = class_probes.class_file_probes(class_file)
+            if jacoco_exec.class_file_id(class_file) != data.id:
+                stale.add(_source_path(probes, data.name))
+                continue
+            entry = _source_entry(sources, probes, data.name)
+            entry["tests"].add(ti)
+            for line in probes.covered_lines(data.probes):
+                entry["lines"].setdefault(line, set()).add(ti)
+            for method in probes.covered_methods(data.probes):
+                if method.first_line is not None:
+                    entry["methods"][(data.name, method.signature)]["tests"].add(ti)
+
+    if not tests:
+        return None
+
+    index = {
+        "version": INDEX_VERSION,
+        "exec_key": key,
+        "tests": tests,
+        "sources": {
+            path: {
+                "tests": sorted(entry["tests"]),
+                "lines": {str(l): sorted(t) for l, t in sorted(entry["lines"].items())},
+                "methods": [dict(m, tests=sorted(m["tests"])) for m in entry["methods"].values()],
+            }
+            for path, entry in sorted(sources.items())
+        },
+        "stale": sorted(stale),
+    }
+
+    os.makedirs(state_dir, exist_ok=True)
+    copies = os.path.join(state_dir, SOURCES_DIR)
+    shutil.rmtree(copies, ignore_errors=True)
+    for path in index["sources"]:
+        src = os.path.join(main_src_dir, *path.split("/"))
+        if os.path.exists(src):
+            dst = os.path.join(copies, *path.split("/"))
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.copyfile(src, dst)
+    with open(os.path.join(state_dir, INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    return index
+
+
+def _source_path(probes: class_probes.ClassProbes, vm_name: str) -> str:
+    package = vm_name.rpartition("/")[0]
+    return f"{package}/{probes.source_file}" if package else probes.source_file
+
+
+def _source_entry(sources: dict, probes: class_probes.ClassProbes, vm_name: str) -> dict:
+    path = _source_path(probes, vm_name)
+    entry = sources.get(path)
+    if entry is None:
+        entry = sources[path] = {"tests": set(), "lines": {}, "methods": {}, "classes": set()}
+    if vm_name not in entry["classes"]:
+        # Every method with code is listed, including those no test reaches
+        entry["classes"].add(vm_name)
+        for m in probes.methods:
+            if m.first_line is not None:
+                entry["methods"][(vm_name, m.signature)] = {
+                    "class": vm_name.replace("/", "."),
+                    "name": m.name,
+                    "desc": m.desc,
+                    "first_line": m.first_line,
+                    "last_line": m.last_line,
+                    "lines": sorted(m.lines),
+                    "tests": set(),
+                }
+    return entry
+
+
+def load_index(exec_path: str, classes_dir: str, test_classes_dir: str,
+               main_src_dir: str, state_dir: str) -> dict | None:
+    """
+    The index for exec_path: from memory, from disk, or rebuilt when the
+    exec file changed since it was built. None when there is no per-test data.
+    """
+    if not os.path.exists(exec_path):
+        return None
+    key = _file_key(exec_path)
+    index_path = os.path.join(state_dir, INDEX_FILE)
+
+    # Memory cache holds (exec key, index or None for "no per-test data")
+    with _cache_lock:
+        cached = _cache.get(index_path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    index = None
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = None
+    if index is None or index.get("version") != INDEX_VERSION or index.get("exec_key") != key:
+        index = build_index(exec_path, classes_dir, test_classes_dir, main_src_dir, state_dir)
+
+    with _cache_lock:
+        _cache[index_path] = (key, index)
+    return index
+
+
+def changed_lines(state_dir: str, source: str, current_path: str) -> set | None:
+    """
+    Lines of the indexed copy of `source` that were changed or deleted in
+    current_path, plus the lines around insertions. Blank and comment-only
+    lines are left out. None when no indexed copy exists.
+    """
+    indexed = os.path.join(state_dir, SOURCES_DIR, *source.split("/"))
+    if not os.path.exists(indexed):
+        return None
+    with open(indexed, "r", encoding="ISO-8859-1") as f:
+        old = f.read().splitlines()
+    new = []
+    if os.path.exists(current_path):
+        with open(current_path, "r", encoding="ISO-8859-1") as f:
+            new = f.read().splitlines()
+
+    lines = set()
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag in ("replace", "delete"):
+            lines.update(n for n in range(i1 + 1, i2 + 1) if _is_code(old[n - 1]))
+        if tag in ("replace", "insert") and any(_is_code(l) for l in new[j1:j2]):
+            lines.update((i1, i1 + 1) if tag == "insert" else range(i1 + 1, i2 + 1))
+    return lines
+
+
+def _is_code(line: str) -> bool:
+    stripped = line.strip()
+    return bool(stripped) and not stripped.startswith(("//", "/*", "*"))
+
+
+def _owns(method: dict, line: int) -> bool:
+    # Constructors and static initializers also carry field initializer
+    # lines spread over the class, so only their exact lines count
+    if method["name"] in ("<init>", "<clinit>"):
+        return line in method["lines"]
+    return method["first_line"] <= line <= method["last_line"]
+
+
+def tests_for(index: dict, source: str, lines: set | None = None, method: str | None = None) -> list[str] | None:
+    """
+    Test classes that execute `source` ("org/apache/commons/lang3/Range.java").
+
+    With lines, only tests of the methods containing those lines are
+    returned; a line outside every method (fields, imports) selects every
+    test of the file. With method, only tests of methods with that name.
+    Returns None when the file is not in the index, or when some of its
+    data is stale and the tests it lists may be incomplete.
+    """
+    entry = index["sources"].get(source)
+    if entry is None or source in index["stale"]:
+        return None
+
+    selected = set()
+    if lines is None and not method:
+        selected.update(entry["tests"])
+    for m in entry["methods"]:
+        if method and m["name"] == method:
+            selected.update(m["tests"])
+    if lines:
+        for line in lines:
+            owners = [m for m in entry["methods"] if _owns(m, line)]
+            if not owners:
+                selected.update(entry["tests"])
+                break
+            for m in owners:
+                selected.update(m["tests"])
+
+    return sorted(index["tests"][t] for t in selected)
+
+
+def source_for_class(class_name: str, classes_dir: str) -> str | None:
+    """
+    Source path of a dotted class name as used in the index, via the
+    class file's SourceFile attribute.
+    """
+    vm_name = class_name.replace(".", "/")
+    path = os.path.join(classes_dir, *vm_name.split("/")) + ".class"
+    if not os.path.exists(path):
+        return None
+    return _source_path(class_probes.class_file_probes(path), vm_name)
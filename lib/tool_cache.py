@@ -0,0 +1,154 @@
+"""
+Memoization for deterministic MCP tools.
+
+A cached tool's result is keyed on its arguments plus a workspace
+fingerprint: a cheap function returning something that changes whenever
+the tool's inputs may have changed (file mtimes and sizes). As long as
+the fingerprint is the same, the stored result is returned without
+recomputing it.
+
+git status is not cached: its answer also depends on remote refs and the
+upstream, and running it is about as cheap as fingerprinting the tree.
+
+All tools share one LRU of MAX_ENTRIES results; hits, misses and
+evictions are counted per tool.
+"""
+import collections
+import functools
+import inspect
+import os
+import threading
+from typing import Callable
+
+MAX_ENTRIES = 256
+
+
+class ToolCache:
+    """
+    LRU of tool results with per-tool hit/miss/eviction counters.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: collections.OrderedDict = collections.OrderedDict()
+        self._stats: dict = {}
+        self._lock = threading.Lock()
+
+    def _counter(self, tool: str) -> dict:
+        return self._stats.setdefault(tool, {"hits": 0, "misses": 0, "evictions": 0})
+
+    def get(self, tool: str, key: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counter(tool)["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counter(tool)["hits"] += 1
+            return entry
+
+    def put(self, tool: str, key: tuple, value) -> None:
+        with self._lock:
+            self._entries[key] = (value,)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                (evicted_tool, *_rest), _value = self._entries.popitem(last=False)
+                self._counter(evicted_tool)["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = collections.Counter(key[0] for key in self._entries)
+            tools = {
+                tool: dict(counts, entries=entries.get(tool, 0))
+                for tool, counts in sorted(self._stats.items())
+            }
+            hits = sum(c["hits"] for c in self._stats.values())
+            misses = sum(c["misses"] for c in self._stats.values())
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+                "tools": tools,
+            }
+
+
+cache = ToolCache()
+
+
+def memoize(fingerprint: Callable[[], object]):
+    """
+    Decorator caching a tool's result on (arguments, fingerprint()).
+
+    A fingerprint of None disables caching for that call. The wrapper keeps
+    the tool's signature, so it can sit under @mcp.tool.
+    """
+    def decorate(func):
+        sig = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            fp = fingerprint()
+            if fp is None:
+                return func(*args, **kwargs)
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (func.__name__, tuple(bound.arguments.items()), fp)
+            entry = cache.get(func.__name__, key)
+            if entry is not None:
+                return entry[0]
+            result = func(*args, **kwargs)
+            # Error messages are not cached, so a retry really runs again
+            if not (isinstance(result, str) and result.startswith("Error")):
+                cache.put(func.__name__, key, result)
+            return result
+
+        return wrapper
+
+    return decorate
+
+
+def file_fingerprint(*paths: str) -> tuple:
+    """
+    (mtime_ns, size) per path, None for missing files.
+    """
+    out = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            out.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            out.append(None)
+    return tuple(out)
+
+
+def tree_fingerprint(root: str, skip_dirs: tuple = ()) -> tuple:
+    """
+    (file count, sum of mtime_ns, total size) over a directory tree. Any
+    touched, added or removed file changes it; directory mtimes are
+    included so renames count too.
+    """
+    count = 0
+    mtimes = 0
+    size = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in skip_dirs]
+        try:
+            mtimes += os.stat(dirpath).st_mtime_ns
+        except OSError:
+            continue
+        for fname in filenames:
+            try:
+                st = os.stat(os.path.join(dirpath, fname))
+            except OSError:
+                continue
+            count += 1
+            size += st.st_size
+            mtimes += st.st_mtime_ns
+    return count, mtimes, size
@@ -0,0 +1,190 @@
+"""
+Plugin registry for the MCP server's tools.
+
+Tool modules live in the tools package (tools/coverage.py, tools/git.py,
+...) and mark their tools with @tool. The server does not import them at
+start-up: each module's tools are read from its source with `ast` (name,
+docstring, parameters, sync or async) and registered as lightweight
+proxies with the same signature. The first call of any tool of a module
+imports that module; later calls go straight to the real function.
+
+The parsed tool list is cached in .mcp_cache/tool_manifest.json, keyed on
+the modules' mtimes and sizes, so a normal start-up reads one small JSON
+file instead of parsing the modules.
+"""
+import importlib
+import inspect
+import json
+import os
+import threading
+import time
+
+PACKAGE = "tools"
+PLUGINS = ("calculator", "coverage", "generation", "git", "maven")
+MANIFEST_VERSION = 1
+
+# The repository root, where the tools package and .mcp_cache live
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MANIFEST_FILE = os.path.join(_ROOT, ".mcp_cache", "tool_manifest.json")
+
+# Annotations tool parameters may use
+_TYPES = {"str": str, "int": int, "float": float, "bool": bool}
+
+# plugin -> seconds its import took, for the plugins loaded so far
+load_times: dict = {}
+_load_lock = threading.Lock()
+
+
+def tool(func):
+    """
+    Mark a function in a tool module as an MCP tool.
+    """
+    func.__mcp_tool__ = True
+    return func
+
+
+def _plugin_path(plugin: str) -> str:
+    return os.path.join(_ROOT, PACKAGE, plugin + ".py")
+
+
+def _is_tool_decorator(node) -> bool:
+    return getattr(node, "id", None) == "tool" or getattr(node, "attr", None) == "tool"
+
+
+def scan_plugin(plugin: str) -> list[dict]:
+    """
+    Tool specs of one module, read from its source without importing it.
+    """
+    import ast
+
+    with open(_plugin_path(plugin), "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+
+    specs = []
+    for node in tree.body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        if not any(_is_tool_decorator(d) for d in node.decorator_list):
+            continue
+        args = node.args
+        defaults = [None] * (len(args.args) - len(args.defaults)) + list(args.defaults)
+        params = []
+        for arg, default in zip(args.args, defaults):
+            annotation = ast.unparse(arg.annotation) if arg.annotation else "str"
+            if annotation not in _TYPES:
+                raise ValueError(f"{plugin}.{node.name}: unsupported annotation {annotation!r} on {arg.arg}")
+            param = {"name": arg.arg, "type": annotation}
+            if default is not None:
+                param["default"] = ast.literal_eval(default)
+            params.append(param)
+        specs.append({
+            "name": node.name,
+            "async": isinstance(node, ast.AsyncFunctionDef),
+            "doc": ast.get_docstring(node, clean=False) or "",
+            "params": params,
+        })
+    return specs
+
+
+def load_manifest(plugins: tuple = PLUGINS) -> dict:
+    """
+    {plugin: [tool spec, ...]}, from the cached manifest when every
+    module is unchanged, otherwise rescanned and saved.
+    """
+    keys = {}
+    for plugin in plugins:
+        st = os.stat(_plugin_path(plugin))
+        keys[plugin] = [st.st_mtime_ns, st.st_size]
+
+    try:
+        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("version") == MANIFEST_VERSION and cached.get("keys") == keys:
+            return cached["plugins"]
+    except (OSError, ValueError):
+        pass
+
+    manifest = {plugin: scan_plugin(plugin) for plugin in plugins}
+    try:
+        os.makedirs(os.path.dirname(MANIFEST_FILE), exist_ok=True)
+        with open(MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "keys": keys, "plugins": manifest}, f)
+    except OSError:
+        pass
+    return manifest
+
+
+def load_plugin(plugin: str):
+    """
+    Import a tool module (once) and record how long that took.
+    """
+    name = f"{PACKAGE}.{plugin}"
+    with _load_lock:
+        if plugin not in load_times:
+            started = time.perf_counter()
+            importlib.import_module(name)
+            load_times[plugin] = time.perf_counter() - started
+    return importlib.import_module(name)
+
+
+def _proxy(plugin: str, spec: dict):
+    """
+    A function with the tool's name, docstring and signature that imports
+    the plugin on first use and delegates to the real tool.
+    """
+    params = [
+        inspect.Parameter(
+            p["name"],
+            inspect.Parameter.POSITIONAL_OR_KEYWORD,
+            default=p.get("default", inspect.Parameter.empty),
+            annotation=_TYPES[p["type"]],
+        )
+        for p in spec["params"]
+    ]
+    target = None
+
+    def resolve():
+        nonlocal target
+        if target is None:
+            target = getattr(load_plugin(plugin), spec["name"])
+        return target
+
+    if spec["async"]:
+        async def proxy(*args, **kwargs):
+            return await resolve()(*args, **kwargs)
+    else:
+        def proxy(*args, **kwargs):
+            return resolve()(*args, **kwargs)
+
+    proxy.__name__ = proxy.__qualname__ = spec["name"]
+    proxy.__doc__ = spec["doc"]
+    proxy.__module__ = f"{PACKAGE}.{plugin}"
+    proxy.__signature__ = inspect.Signature(params, return_annotation=str)
+    proxy.__annotations__ = {p.name: p.annotation for p in params}
+    proxy.__annotations__["return"] = str
+    return proxy
+
+
+def register(mcp, plugins: tuple = PLUGINS, lazy: bool = True) -> dict:
+    """
+    Register every tool of the given modules on a FastMCP server. With
+    lazy=False the modules are imported and their functions registered
+    directly. Returns {plugin: [tool names]}.
+    """
+    registered = {}
+    if lazy:
+        for plugin, specs in load_manifest(plugins).items():
+            for spec in specs:
+                mcp.tool(_proxy(plugin, spec))
+            registered[plugin] = [s["name"] for s in specs]
+        return registered
+
+    for plugin in plugins:
+        module = load_plugin(plugin)
+        names = []
+        for name, func in vars(module).items():
+            if getattr(func, "__mcp_tool__", False) and func.__module__ == module.__name__:
+                mcp.tool(func)
+                names.append(name)
+        registered[plugin] = names
+    return registered
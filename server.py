@@ -1,17 +1,46 @@
+import json
+import os
+
 from fastmcp import FastMCP
-from test_tools import run_maven_tests  # NEW IMPORT
+
+from lib import tool_cache, tool_registry
 
 mcp = FastMCP("se333-testing-agent")
 
+@mcp.tool
+def tool_cache_stats(clear: bool = False) -> str:
+    """
+    Hit/miss/eviction counts of the shared tool result cache, as JSON.
+
+    Read-only tools (coverage summaries and queries, test skeletons, class
+    outlines, surefire reports) return a stored result while their inputs
+    are unchanged on disk. clear=True empties the cache and resets the
+    counters.
+    """
+    if clear:
+        tool_cache.cache.clear()
+        return "Tool cache cleared."
+    return json.dumps(tool_cache.cache.stats(), indent=2)
 
 @mcp.tool
-def calculator(expression: str) -> str:
-    try:
-        result = eval(expression, {"__builtins__": {}})
-        return str(result)
-    except Exception as e:
-        return f"Error: {e}"
+def tool_plugins() -> str:
+    """
+    The tool modules behind this server, their tools, and which modules
+    have been loaded so far (with their import time in ms), as JSON.
+    Modules are imported on the first call of one of their tools.
+    """
+    return json.dumps({
+        plugin: {
+            "tools": names,
+            "loaded": plugin in tool_registry.load_times,
+            "import_ms": round(tool_registry.load_times[plugin] * 1000, 1)
+            if plugin in tool_registry.load_times else None,
+        }
+        for plugin, names in PLUGIN_TOOLS.items()
+    }, indent=2)
 
+# MCP_EAGER_TOOLS=1 imports every tool module at start-up instead of on first use
+PLUGIN_TOOLS = tool_registry.register(mcp, lazy=os.environ.get("MCP_EAGER_TOOLS") != "1")
 
 if __name__ == "__main__":
     mcp.run(transport="sse")
@@ -0,0 +1,12 @@
+package org.example;
+
+public class Greeter {
+    public String greet(final String name) {
+        if (name == null)
+            return "nobody";
+        return "Hello, " + name;
+    }
+    public Runnable task() { return new Runnable() {
+        public void run() { greet(null); }
+    }; }
+}
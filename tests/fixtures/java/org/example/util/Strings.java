@@ -0,0 +1,36 @@
+package org.example.util;
+
+public final class Strings {
+    // Overloads: { braces in comments } are ignored
+    public static boolean isBlank(final String s) {
+        return s == null
+            || s.trim().isEmpty();
+    }
+
+    public static boolean isBlank(final CharSequence cs) {
+        String text = "}" + cs;
+        return isBlank(text.substring(1));
+    }
+
+    @Deprecated
+    static <T extends Comparable<T>> T max(T a, T b) throws IllegalStateException {
+        return a.compareTo(b) >= 0 ? a : b;
+    }
+
+    protected String join(String... parts) {
+        return String.join(",", parts);
+    }
+
+    public enum Mode {
+        STRICT { int weight() { return 2; } },
+        LENIENT;
+
+        int weight() {
+            return 1;
+        }
+    }
+
+    interface Matcher {
+        boolean matches(String s);
+    }
+}
@@ -0,0 +1,81 @@
+import os
+
+from lib import build_logs
+
+
+def _log(tmp_path, lines: int, **kwargs) -> build_logs.BuildLog:
+    log = build_logs.BuildLog(str(tmp_path / "run.log"), **kwargs)
+    for n in range(lines):
+        log.add(f"line {n}")
+    return log
+
+
+def test_lines_come_from_memory_or_the_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(build_logs, "OFFSET_STEP", 10)
+    log = _log(tmp_path, 35, buffer_lines=5)
+
+    assert log.line_count == 35
+    # An offset every ten lines: 0, 10, 20 and 30
+    assert len(log.offsets) == 4 and log.offsets[1] == len("line 0\n") * 10
+    # The last five lines are buffered, the rest are read back from the file
+    assert log.lines(31, 10) == [f"line {n}" for n in range(31, 35)]
+    assert log.lines(12, 3) == ["line 12", "line 13", "line 14"]
+    assert log.lines(28, 4) == ["line 28", "line 29", "line 30", "line 31"]
+    assert log.lines(40, 5) == [] and log.lines(3, 0) == []
+    assert log.tail(20) == "line 33\nline 34"
+
+
+def test_grep_merges_overlapping_context(tmp_path):
+    log = _log(tmp_path, 20)
+    log.add("[ERROR] at the end")
+
+    blocks, matches = log.grep(r"line 1[02]$", context=1)
+    assert matches == 2
+    assert blocks == [(9, ["line 9", "line 10", "line 11", "line 12", "line 13"])]
+
+    blocks, matches = log.grep("error", context=0, ignore_case=True)
+    assert (blocks, matches) == ([(20, ["[ERROR] at the end"])], 1)
+
+    _blocks, matches = log.grep("line", max_matches=3)
+    assert matches == 20
+
+
+def test_from_file_reads_a_closed_log(tmp_path):
+    log = _log(tmp_path, 3)
+    log.close()
+    assert log.closed
+
+    again = build_logs.BuildLog.from_file(log.path)
+    assert again.closed and again.line_count == 3
+    assert again.lines(0, 3) == ["line 0", "line 1", "line 2"]
+
+
+def test_open_find_and_prune_logs(tmp_path, monkeypatch):
+    monkeypatch.setattr(build_logs, "MAX_LOGS", 2)
+    log_dir = str(tmp_path)
+    logs = []
+    for n in range(3):
+        log = build_logs.open_log(log_dir, "maven")
+        log.add(f"run {n}")
+        log.close()
+        os.utime(log.path, (n, n))
+        logs.append(log)
+
+    # Opening the third log deleted the first
+    assert build_logs.list_logs(log_dir) == [logs[2].id, logs[1].id]
+    assert build_logs.find_log(log_dir, logs[0].id) is None
+    assert build_logs.find_log(log_dir, logs[1].id) is logs[1]
+    assert build_logs.find_log(log_dir, "") is logs[2]
+    assert build_logs.find_log(log_dir, "../" + logs[1].id) is None
+
+    build_logs.forget(logs[1])
+    reloaded = build_logs.find_log(log_dir, logs[1].id)
+    assert reloaded is not logs[1] and reloaded.lines(0, 1) == ["run 1"]
+
+
+def test_open_logs_are_not_pruned(tmp_path, monkeypatch):
+    monkeypatch.setattr(build_logs, "MAX_LOGS", 1)
+    running = build_logs.open_log(str(tmp_path))
+    build_logs.open_log(str(tmp_path)).close()
+    assert os.path.exists(running.path)
+    running.close()
@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+from lib import class_probes
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+PACKAGE_DIR = os.path.join(FIXTURES, "classes", "org", "apache", "commons", "lang3", "concurrent")
+
+
+def _probes(name: str) -> class_probes.ClassProbes:
+    return class_probes.class_file_probes(os.path.join(PACKAGE_DIR, name + ".class"))
+
+
+def test_probes_are_laid_out_per_method():
+    probes = _probes("LazyInitializer")
+
+    assert probes.name == "org/apache/commons/lang3/concurrent/LazyInitializer"
+    assert probes.source_file == "LazyInitializer.java"
+    assert probes.probe_count == 9
+    assert [(m.signature, m.first_probe, m.probe_count) for m in probes.methods] == [
+        ("<init>()V", 0, 1),
+        ("get()Ljava/lang/Object;", 1, 8),
+        # Abstract: no code, no probes
+        ("initialize()Ljava/lang/Object;", 9, 0),
+    ]
+    get = probes.methods[1]
+    assert (get.first_line, get.last_line) == (95, 106)
+    assert sorted(get.lines) == [95, 97, 98, 99, 100, 101, 103, 106]
+
+
+def test_covered_lines_and_methods():
+    probes = _probes("LazyInitializer")
+
+    only_ctor = [True] + [False] * 8
+    assert probes.covered_lines(only_ctor) == {79}
+    assert [m.name for m in probes.covered_methods(only_ctor)] == ["<init>"]
+
+    # Two branches of get() missed, but every line ran
+    hits = [True, True, True, False, True, True, True, False, True]
+    assert probes.covered_lines(hits) == {79, 95, 97, 98, 99, 100, 101, 103, 106}
+    assert [m.name for m in probes.covered_methods(hits)] == ["<init>", "get"]
+
+
+def test_interface_without_code_has_no_probes():
+    probes = _probes("ConcurrentInitializer")
+    assert probes.probe_count == 0
+    assert probes.covered_lines([]) == set()
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "Broken.class"
+    path.write_bytes(b"not a class file")
+    with pytest.raises(class_probes.ClassFormatError):
+        class_probes.class_file_probes(str(path))
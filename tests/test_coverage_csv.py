@@ -0,0 +1,81 @@
+import os
+import shutil
+
+from lib import coverage_csv, coverage_index, tool_cache
+from lib.tool_cache import ToolCache
+from tools import coverage
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+REPORT = os.path.join(FIXTURES, "jacoco.xml")
+CSV = os.path.join(FIXTURES, "jacoco.csv")
+
+
+def test_totals_match_the_xml_except_shared_lines():
+    data = coverage_csv.build(CSV)
+    index = coverage_index.build_index(REPORT)
+
+    for ctype, counts in index.totals.items():
+        if ctype != "LINE":
+            assert data.totals[ctype] == counts, ctype
+    # Line 9 of Greeter.java is counted for Greeter and its anonymous class
+    assert index.totals["LINE"] == (7, 6)
+    assert data.totals["LINE"] == (8, 6)
+    assert data.packages["org.example"]["LINE"] == (4, 3)
+    assert index.packages["org.example"].counters["LINE"] == (3, 3)
+
+
+def test_package_and_class_counters():
+    data = coverage_csv.build(CSV)
+    index = coverage_index.build_index(REPORT)
+
+    assert list(data.packages) == ["org.example", "org.example.util", "org.examples"]
+    for name, counters in data.packages.items():
+        expected = index.packages[name].counters
+        for ctype, counts in counters.items():
+            # The XML leaves out counters with nothing to count
+            if ctype != "LINE":
+                assert counts == expected.get(ctype, (0, 0)), (name, ctype)
+    assert data.class_names[1] == "Greeter.new Runnable() {...}"
+    # CLASS is derived from METHOD
+    assert [list(col) for col in data.columns["CLASS"]] == [[0, 1, 0, 1], [1, 0, 1, 0]]
+
+
+def test_report_totals_read_from_the_end_of_the_xml():
+    assert coverage_index.report_totals(REPORT) == coverage_index.build_index(REPORT).totals
+
+
+def test_load_is_cached_and_is_fresh(tmp_path):
+    path = tmp_path / "jacoco.csv"
+    shutil.copy(CSV, path)
+    first = coverage_csv.load(str(path))
+    assert coverage_csv.load(str(path)) is first
+
+    xml = tmp_path / "jacoco.xml"
+    xml.write_text("<report/>")
+    mtime = os.stat(xml).st_mtime_ns
+    os.utime(path, ns=(mtime, mtime - coverage_csv.FRESH_WINDOW_NS - 1))
+    assert not coverage_csv.is_fresh(str(path), str(xml))
+    assert coverage_csv.load(str(path)) is not first
+    assert coverage_csv.is_fresh(str(path), None)
+    assert not coverage_csv.is_fresh(str(tmp_path / "missing.csv"), None)
+
+
+def test_summarize_coverage_takes_totals_from_the_xml(monkeypatch):
+    monkeypatch.setattr(tool_cache, "cache", ToolCache())
+    monkeypatch.setattr(coverage, "find_jacoco_report", lambda: REPORT)
+    monkeypatch.setattr(coverage, "find_fresh_jacoco_csv", lambda report_path: CSV)
+
+    summary = coverage.summarize_coverage()
+    assert summary.splitlines()[0] == f"JaCoCo coverage summary from: {REPORT}"
+    assert "- LINE: 46.2% (6/13 covered)" in summary
+
+
+def test_summarize_coverage_falls_back_to_the_csv(monkeypatch):
+    monkeypatch.setattr(tool_cache, "cache", ToolCache())
+    monkeypatch.setattr(coverage, "find_jacoco_report", lambda: None)
+    monkeypatch.setattr(coverage, "find_fresh_jacoco_csv", lambda report_path: CSV)
+
+    summary = coverage.summarize_coverage()
+    assert CSV in summary.splitlines()[0]
+    assert "- LINE: 42.9% (6/14 covered)" in summary
+    assert "- INSTRUCTION: 46.5% (20/43 covered)" in summary
@@ -0,0 +1,96 @@
+import os
+import shutil
+
+import pytest
+
+from lib import coverage_index
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+REPORT = os.path.join(FIXTURES, "jacoco.xml")
+
+
+def test_build_index_reads_the_tree_and_counters():
+    index = coverage_index.build_index(REPORT)
+
+    assert list(index.packages) == ["org.example", "org.example.util", "org.examples"]
+    assert list(index.packages["org.example"].children) == ["org.example.Greeter", "org.example.Greeter$1"]
+    assert index.totals["LINE"] == (7, 6)
+    assert index.totals["INSTRUCTION"] == (23, 20)
+
+    greeter = index.classes["org.example.Greeter"]
+    assert greeter.counters["METHOD"] == (1, 2)
+    greet = index.methods[("org.example.Greeter", "greet(Ljava/lang/String;)Ljava/lang/String;")]
+    assert greet is greeter.children["greet(Ljava/lang/String;)Ljava/lang/String;"]
+    assert greet.line == 5
+    assert greet.missed("INSTRUCTION") == 2 and greet.covered("BRANCH") == 1
+
+
+def test_build_index_keeps_source_lines_per_file():
+    index = coverage_index.build_index(REPORT)
+
+    assert index.class_sources["org.example.Greeter$1"] == "org/example/Greeter.java"
+    lines = index.sourcefiles["org/example/Greeter.java"]
+    rows = [tuple(lines[i:i + coverage_index.LINE_FIELDS]) for i in range(0, len(lines), coverage_index.LINE_FIELDS)]
+    # Line 9 holds code of both Greeter and its anonymous class
+    assert rows == [(3, 0, 3, 0, 0), (5, 0, 4, 1, 1), (6, 2, 0, 0, 0), (7, 0, 2, 0, 0),
+                    (9, 7, 0, 0, 0), (10, 2, 0, 0, 0)]
+
+
+def test_load_index_is_cached_until_the_report_changes(tmp_path):
+    report = tmp_path / "jacoco.xml"
+    shutil.copy(REPORT, report)
+    first = coverage_index.load_index(str(report))
+    assert coverage_index.load_index(str(report)) is first
+
+    # The last LINE counter is the report's
+    head, _sep, tail = report.read_text().rpartition('<counter type="LINE" missed="7" covered="6"/>')
+    report.write_text(head + '<counter type="LINE" missed="1" covered="12"/>' + tail)
+    os.utime(report, ns=(first.key[0] + 10**9, first.key[0] + 10**9))
+    second = coverage_index.load_index(str(report))
+    assert second is not first
+    assert second.totals["LINE"] == (1, 12)
+
+
+def test_top_nodes_ranks_and_filters_by_prefix():
+    index = coverage_index.build_index(REPORT)
+
+    rows = coverage_index.top_nodes(index, "class", "INSTRUCTION", n=2)
+    # Equal misses rank the less covered class first
+    assert [r["name"] for r in rows] == ["org.examples.Other", "org.example.Greeter"]
+
+    rows = coverage_index.top_nodes(index, "package", "LINE", prefix="org/example")
+    assert [r["name"] for r in rows] == ["org.example", "org.example.util"]
+
+    rows = coverage_index.top_nodes(index, "method", "INSTRUCTION", prefix="org.example.Greeter", order="percent")
+    assert [(r["class"], r["method"]) for r in rows][:2] == [
+        ("org.example.Greeter", "task"), ("org.example.Greeter$1", "<init>")]
+    assert rows[0]["desc"] == "()Ljava/lang/Runnable;" and rows[0]["line"] == 9
+
+    with pytest.raises(ValueError):
+        coverage_index.top_nodes(index, "module")
+
+
+def test_within_matches_whole_name_segments():
+    assert coverage_index.within("a.b", "a.b")
+    assert coverage_index.within("a.b.C", "a.b")
+    assert coverage_index.within("a.b.C$Inner", "a.b.C")
+    assert not coverage_index.within("a.bc", "a.b")
+
+
+def test_percent():
+    assert coverage_index.percent(1, 2) == 66.7
+    assert coverage_index.percent(0, 0) == 0.0
+
+
+def test_line_ranges_group_lines_by_status():
+    index = coverage_index.build_index(REPORT)
+    lines = index.sourcefiles["org/example/Greeter.java"]
+
+    ranges = coverage_index.line_ranges(lines)
+    assert [(r["status"], r["first"], r["last"]) for r in ranges] == [
+        ("partial", 5, 5), ("uncovered", 6, 6), ("uncovered", 9, 10)]
+    assert ranges[0]["missed_branches"] == 1 and ranges[0]["branches"] == 2
+    assert ranges[2]["missed_instructions"] == 9
+
+    # Limited to the lines of one type
+    assert [(r["first"], r["last"]) for r in coverage_index.line_ranges(lines, 6, 9)] == [(6, 6), (9, 9)]
@@ -0,0 +1,72 @@
+import os
+
+from lib import coverage_index, coverage_snapshots
+from lib.coverage_snapshots import Snapshot
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+REPORT = os.path.join(FIXTURES, "jacoco.xml")
+
+
+def test_encode_decode_round_trip():
+    index = coverage_index.build_index(REPORT)
+    snap = coverage_snapshots.decode(coverage_snapshots.encode(index, "full run", created=12.5), "s1")
+
+    assert (snap.id, snap.created, snap.label, snap.report_key) == ("s1", 12.5, "full run", list(index.key))
+    assert snap.totals == index.totals
+    assert snap.packages == {name: pkg.counters for name, pkg in index.packages.items()}
+    assert snap.classes["org.example.Greeter$1"] == index.classes["org.example.Greeter$1"].counters
+    assert snap.methods[("org.example.Greeter", "greet(Ljava/lang/String;)Ljava/lang/String;")] == (
+        index.methods[("org.example.Greeter", "greet(Ljava/lang/String;)Ljava/lang/String;")].counters)
+    assert len(snap.methods) == len(index.methods)
+
+
+def test_save_list_and_load(tmp_path, monkeypatch):
+    monkeypatch.setattr(coverage_snapshots, "MAX_SNAPSHOTS", 2)
+    index = coverage_index.build_index(REPORT)
+    ids = []
+    for n in range(3):
+        ids.append(coverage_snapshots.save(index, str(tmp_path), "partial run/1"))
+        os.utime(tmp_path / (ids[-1] + coverage_snapshots.SUFFIX), (n, n))
+
+    assert ids[0].endswith("-partial_run_1") and ids[1].endswith("-partial_run_1.2")
+    # The oldest snapshot beyond MAX_SNAPSHOTS was deleted
+    assert coverage_snapshots.list_snapshots(str(tmp_path)) == [ids[2], ids[1]]
+    snap = coverage_snapshots.load(str(tmp_path), ids[2])
+    assert snap.totals == index.totals
+    assert coverage_snapshots.load(str(tmp_path), ids[2]) is snap
+    assert coverage_snapshots.latest_key(str(tmp_path)) == list(index.key)
+
+
+def _snapshot(snapshot_id: str, classes: dict) -> Snapshot:
+    missed = sum(m for m, _c in classes.values())
+    covered = sum(c for _m, c in classes.values())
+    return Snapshot(snapshot_id, 0.0, totals={"LINE": (missed, covered)},
+                    classes={name: {"LINE": counts} for name, counts in classes.items()})
+
+
+def test_diff_lists_gains_and_losses():
+    base = _snapshot("base", {"A": (2, 3), "B": (1, 4), "C": (1, 1), "D": (3, 0), "F": (1, 1), "G": (0, 2)})
+    target = _snapshot("target", {"A": (1, 4), "B": (2, 3), "C": (2, 1), "D": (1, 0), "F": (1, 1), "E": (0, 2)})
+
+    result = coverage_snapshots.diff(base, target)
+
+    assert result["totals"] == {"percent": [57.9, 61.1], "covered_delta": 0, "missed_delta": -1}
+    classes = result["classes"]
+    assert classes["changed"] == 6
+    assert [r["name"] for r in classes["gains"]] == ["E", "A"]
+    assert classes["gains"][0]["added"]
+    # Fewer missed lines alone (D) is no loss
+    assert [r["name"] for r in classes["losses"]] == ["G", "B", "C"]
+    assert classes["losses"][0]["removed"]
+    assert classes["losses"][1] == {"name": "B", "covered": [4, 3], "missed": [1, 2],
+                                    "covered_delta": -1, "missed_delta": 1}
+    assert result["packages"] == {"changed": 0, "gains": [], "losses": []}
+
+
+def test_diff_limits_the_lists():
+    base = _snapshot("base", {f"C{n}": (1, 0) for n in range(5)})
+    target = _snapshot("target", {f"C{n}": (0, 1) for n in range(5)})
+
+    classes = coverage_snapshots.diff(base, target, limit=2)["classes"]
+    assert classes["changed"] == 5
+    assert [r["name"] for r in classes["gains"]] == ["C0", "C1"]
@@ -0,0 +1,86 @@
+import os
+import shutil
+
+from lib import coverage_index, coverage_store
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+REPORT = os.path.join(FIXTURES, "jacoco.xml")
+
+
+def _store() -> coverage_store.CoverageStore:
+    return coverage_store.decode(coverage_store.encode(coverage_index.build_index(REPORT)))
+
+
+def test_subtotal_over_packages():
+    store = _store()
+
+    assert coverage_store.subtotal(store, "INSTRUCTION") == (23, 20)
+    # org.example and org.example.util, but not org.examples
+    assert coverage_store.subtotal(store, "INSTRUCTION", "org.example") == (17, 20)
+    assert coverage_store.subtotal(store, "LINE", "org/example/util") == (2, 3)
+
+
+def test_subtotal_over_a_class_and_its_nested_classes():
+    store = _store()
+
+    assert coverage_store.subtotal(store, "INSTRUCTION", "org.example.Greeter") == (11, 9)
+    assert coverage_store.subtotal(store, "INSTRUCTION", "org.example.Greeter$1") == (5, 0)
+    # Line 9 holds code of Greeter and Greeter$1 and counts for both
+    assert coverage_store.subtotal(store, "LINE", "org.example.Greeter") == (4, 3)
+    assert coverage_store.subtotal(store, "LINE", "org.exa") == (0, 0)
+
+
+def test_encode_decode_round_trip():
+    index = coverage_index.build_index(REPORT)
+    store = coverage_store.decode(coverage_store.encode(index))
+
+    assert store.report_path == index.report_path and store.report_key == index.key
+    assert store.totals == index.totals
+    assert store.rows == {"package": 3, "class": 4, "method": 9}
+    assert store.level_names("class") == list(index.classes)
+    assert list(store.col("class", "LINE_missed")) == [
+        cls.counters["LINE"][0] for cls in index.classes.values()]
+
+
+def test_top_nodes_match_the_index():
+    index = coverage_index.build_index(REPORT)
+    store = _store()
+
+    for level, ctype, prefix, order in [
+        ("package", "LINE", "", "missed"),
+        ("class", "INSTRUCTION", "", "missed"),
+        ("class", "BRANCH", "org.example", "percent"),
+        ("method", "INSTRUCTION", "org.example.Greeter", "percent"),
+        ("method", "LINE", "", "missed"),
+    ]:
+        assert coverage_store.top_nodes(store, level, ctype, 3, prefix, order) == \
+               coverage_index.top_nodes(index, level, ctype, 3, prefix, order)
+
+
+def test_save_and_open_store(tmp_path):
+    path = str(tmp_path / "cache" / "store.bin")
+    coverage_store.save(coverage_index.build_index(REPORT), path)
+
+    store = coverage_store.open_store(path)
+    assert store.totals["INSTRUCTION"] == (23, 20)
+    assert coverage_store.subtotal(store, "BRANCH", "org.example.util") == (1, 3)
+    store.close()
+
+
+def test_load_is_cached_until_the_report_changes(tmp_path):
+    report = tmp_path / "jacoco.xml"
+    shutil.copy(REPORT, report)
+    store_path = str(tmp_path / "store.bin")
+
+    first = coverage_store.load(str(report), store_path)
+    assert coverage_store.load(str(report), store_path) is first
+    assert os.path.exists(store_path)
+
+    # The last LINE counter is the report's
+    head, _sep, tail = report.read_text().rpartition('<counter type="LINE" missed="7" covered="6"/>')
+    report.write_text(head + '<counter type="LINE" missed="1" covered="12"/>' + tail)
+    os.utime(report, ns=(first.report_key[0] + 10**9, first.report_key[0] + 10**9))
+    second = coverage_store.load(str(report), store_path)
+    assert second is not first
+    assert second.totals["LINE"] == (1, 12)
+    assert coverage_store.open_store(store_path).report_key == second.report_key
@@ -0,0 +1,60 @@
+import pytest
+
+from lib import expression_eval
+from lib.expression_eval import ExpressionError, evaluate
+
+
+def test_arithmetic_functions_and_constants():
+    assert evaluate("2 + 3 * 4") == 14
+    assert evaluate("2 ** 10") == 1024
+    assert evaluate("max(1, 7, 3) - abs(-2)") == 5
+    assert evaluate("1 < 2 <= 2 and not 0") is True
+    assert evaluate("sqrt(16) if pi > 3 else 0") == 4.0
+
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os')",
+    "open('x')",
+    "x + 1",
+    "(1).__class__",
+    "'a' * 3",
+    "[1, 2]",
+    "lambda: 1",
+    "round(2.5, ndigits=0)",
+    "[x for x in (1, 2)]",
+    "1 in (1, 2)",
+    "1 @ 2",
+])
+def test_rejects_anything_outside_the_subset(expression):
+    with pytest.raises(ExpressionError):
+        evaluate(expression)
+
+
+@pytest.mark.parametrize("expression", [
+    "3 ** 9999",
+    "2 ** 10001",
+    "(10 ** 2000) * (10 ** 2000)",
+    # Operands of 5000 and 5001 bits; the product has 10001
+    "((1 << 5000) - 1) * ((1 << 5001) - 1)",
+    "1 << 20000",
+])
+def test_rejects_results_over_the_bit_limit(expression):
+    with pytest.raises(ExpressionError, match="too large"):
+        evaluate(expression)
+
+
+def test_rejects_long_and_deep_expressions():
+    with pytest.raises(ExpressionError, match="characters"):
+        evaluate("1+" * expression_eval.MAX_EXPRESSION_CHARS + "1")
+    with pytest.raises(ExpressionError, match="syntax nodes"):
+        evaluate("+".join(["1"] * expression_eval.MAX_NODES))
+
+
+def test_time_limit():
+    with pytest.raises(ExpressionError, match="time limit"):
+        evaluate("9 ** 4000 // 7 ** 4000 + 9 ** 4000 // 7 ** 4000", time_limit=0)
+
+
+def test_syntax_errors_are_raised_as_such():
+    with pytest.raises(SyntaxError):
+        evaluate("1 +")
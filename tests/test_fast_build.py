@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+from lib import fast_build
+
+POM = """<project>
+  <properties>
+    <project.build.sourceEncoding>ISO-8859-1</project.build.sourceEncoding>
+    <maven.compile.source>1.8</maven.compile.source>
+    <maven.compile.target> 1.8 </maven.compile.target>
+  </properties>
+</project>
+"""
+
+
+def _codebase(tmp_path):
+    codebase = tmp_path / "codebase"
+    (codebase / "target" / "classes").mkdir(parents=True)
+    (codebase / "target" / "test-classes").mkdir()
+    (codebase / "pom.xml").write_text(POM)
+    return codebase, tmp_path / "state"
+
+
+def test_compiler_settings_from_the_pom(tmp_path):
+    codebase, _state = _codebase(tmp_path)
+    assert fast_build.compiler_settings(str(codebase)) == {"source": "1.8", "target": "1.8", "encoding": "ISO-8859-1"}
+
+
+def test_fast_path_needs_a_classpath_for_the_current_pom(tmp_path):
+    codebase, state = _codebase(tmp_path)
+    outputs = [str(codebase / "target" / "classes"), str(codebase / "target" / "test-classes")]
+    state.mkdir()
+
+    assert fast_build.unavailable_reason(str(codebase), str(state), outputs) == "no dependency classpath recorded yet"
+    fingerprint = fast_build.pom_fingerprint(str(codebase))
+    # The build wrote no classpath file
+    assert not fast_build.record_state(str(state), fingerprint)
+
+    args = fast_build.classpath_args(str(state))
+    assert args[0] == "dependency:build-classpath"
+    classpath_file = args[1].partition("=")[2]
+    with open(classpath_file, "w", encoding="utf-8") as f:
+        f.write("/m2/a.jar" + os.pathsep + "/m2/b.jar\n")
+    assert fast_build.record_state(str(state), fingerprint)
+    assert fast_build.load_state(str(state)) == {"pom": fingerprint, "classpath": "/m2/a.jar" + os.pathsep + "/m2/b.jar"}
+    assert fast_build.unavailable_reason(str(codebase), str(state), outputs) is None
+
+    (codebase / "target" / "test-classes").rmdir()
+    assert fast_build.unavailable_reason(str(codebase), str(state), outputs) == (
+        f"{os.path.join('target', 'test-classes')} does not exist")
+    (codebase / "pom.xml").write_text(POM + "<!-- changed -->")
+    assert fast_build.unavailable_reason(str(codebase), str(state), outputs) == (
+        "pom.xml changed since the classpath was recorded")
+
+
+def test_resources_are_copied_and_deleted_ones_removed(tmp_path):
+    codebase, state = _codebase(tmp_path)
+    resource = codebase / "src" / "main" / "resources" / "org" / "x" / "a.properties"
+    resource.parent.mkdir(parents=True)
+    resource.write_text("a=1\n")
+    stale = codebase / "target" / "test-classes" / "gone.txt"
+    stale.write_text("old")
+
+    note = fast_build.compile_changed(str(codebase), str(state), [
+        "main/resources/org/x/a.properties", "test/resources/gone.txt"])
+
+    assert (codebase / "target" / "classes" / "org" / "x" / "a.properties").read_text() == "a=1\n"
+    assert not stale.exists()
+    assert note == "Copied 1 main resource(s).\nRemoved 1 deleted test resource(s) from target/."
+
+
+def test_compile_errors_are_raised_as_fast_build_errors(tmp_path, monkeypatch):
+    codebase, state = _codebase(tmp_path)
+    source = codebase / "src" / "main" / "java" / "org" / "x" / "Foo.java"
+    source.parent.mkdir(parents=True)
+    source.write_text("class Foo {}\n")
+    monkeypatch.setattr(fast_build, "_javac", lambda: str(tmp_path / "no-such-javac"))
+
+    with pytest.raises(fast_build.FastBuildError, match="Updating target/"):
+        fast_build.compile_changed(str(codebase), str(state), ["main/java/org/x/Foo.java"])
@@ -0,0 +1,58 @@
+from lib import flaky_tests, surefire_reports
+from lib.surefire_reports import ERROR, FAILED, PASSED, SKIPPED
+
+
+def _results(**statuses) -> list:
+    return [surefire_reports.TestCaseResult("org.x.FooTest", method, status, 0.01) for method, status in statuses.items()]
+
+
+def test_record_and_verdicts(monkeypatch):
+    monkeypatch.setattr(flaky_tests, "MAX_HISTORY", 3)
+    tests = {}
+    flaky_tests.record(tests, 1, _results(a=PASSED, b=FAILED, c=PASSED, d=SKIPPED))
+    flaky_tests.record(tests, 2, _results(a=FAILED, b=ERROR, c=PASSED))
+    flaky_tests.record(tests, 3, _results(a=PASSED, b=FAILED, c=PASSED))
+    flaky_tests.record(tests, 4, _results(a=PASSED, b=FAILED, c=PASSED))
+
+    assert "org.x.FooTest#d" not in tests
+    # Only the last MAX_HISTORY runs are kept
+    assert tests["org.x.FooTest#a"] == [[2, "fail"], [3, "pass"], [4, "pass"]]
+    assert flaky_tests.verdict(tests["org.x.FooTest#a"]) == (flaky_tests.FLAKY, 0.333)
+    assert flaky_tests.verdict(tests["org.x.FooTest#b"]) == (flaky_tests.FAILING, 0.0)
+    assert flaky_tests.verdict(tests["org.x.FooTest#c"]) == (flaky_tests.STABLE, 0.0)
+    assert flaky_tests.known_flaky(tests) == {"org.x.FooTest#a"}
+
+    rows = flaky_tests.summarize(tests)
+    assert [(r["test"], r["verdict"]) for r in rows] == [
+        ("org.x.FooTest#a", "flaky"), ("org.x.FooTest#b", "failing"), ("org.x.FooTest#c", "stable")]
+    assert rows[0]["failing_seeds"] == [2]
+    assert flaky_tests.summarize(tests, {"org.x.BarTest"}) == []
+
+
+def test_history_belongs_to_its_sources(tmp_path):
+    sources = flaky_tests.sources_key({"main/java/Foo.java": "aa", "test/java/FooTest.java": "bb"})
+    assert sources == flaky_tests.sources_key({"test/java/FooTest.java": "bb", "main/java/Foo.java": "aa"})
+    tests = {"org.x.FooTest#a": [[1, "pass"], [2, "fail"]]}
+
+    flaky_tests.save(str(tmp_path), tests, sources)
+    assert flaky_tests.load(str(tmp_path), sources) == tests
+    changed = flaky_tests.sources_key({"main/java/Foo.java": "cc", "test/java/FooTest.java": "bb"})
+    assert flaky_tests.load(str(tmp_path), changed) == {}
+    assert flaky_tests.load(str(tmp_path / "missing"), sources) == {}
+
+
+def test_method_filter():
+    keys = ["org.x.FooTest#b", "org.x.FooTest#a[1]", "org.x.FooTest#a[2]", "org.x.BarTest#c"]
+    assert flaky_tests.method_filter(keys) == "org.x.BarTest#c,org.x.FooTest#a+b"
+    assert flaky_tests.method_filter(["org.x.BarTest#c"], exclude=True) == "!org.x.BarTest#c"
+
+
+def test_seed_and_class_order_from_output():
+    lines = [
+        "[INFO] Tests are run in random order, use -Dsurefire.runOrder.random.seed=-42 to reproduce",
+        "[INFO] Running org.x.BarTest",
+        "[INFO] Running org.x.FooTest",
+    ]
+    assert flaky_tests.seed_from_output(lines) == -42
+    assert flaky_tests.seed_from_output(lines[1:]) is None
+    assert flaky_tests.class_order(lines) == ["org.x.BarTest", "org.x.FooTest"]
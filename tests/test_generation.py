@@ -0,0 +1,77 @@
+import os
+
+from lib import coverage_index, java_index
+from tools import generation
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+SOURCES = os.path.join(FIXTURES, "java")
+REPORT = os.path.join(FIXTURES, "jacoco.xml")
+
+
+def _method(name: str, *types: str, kind: str = "method", type_params: str = "", lines=(0, 0)) -> dict:
+    return {
+        "name": name, "kind": kind, "type_params": type_params,
+        "params": [{"type": t, "name": f"p{i}"} for i, t in enumerate(types)],
+        "start_line": lines[0], "end_line": lines[1],
+    }
+
+
+def test_descriptor_params():
+    assert generation._descriptor_params("f(ILjava/util/Map$Entry;[J)V") == ["int", "Entry", "long[]"]
+    assert generation._descriptor_params("<init>()V") == []
+    assert generation._descriptor_params("g([[Ljava/lang/String;Z)Z") == ["String[][]", "boolean"]
+
+
+def test_params_match_erases_source_types():
+    assert generation._params_match(_method("f", "java.util.Map<K, V>", "int"), ["Map", "int"])
+    assert generation._params_match(_method("f", "String..."), ["String[]"])
+    assert not generation._params_match(_method("f", "String"), ["CharSequence"])
+    assert not generation._params_match(_method("f", "int"), ["int", "int"])
+
+    # Type variables stand for any reference type, but not a primitive
+    generic = _method("max", "T", "T[]", type_params="<T extends Comparable<T>>")
+    assert generation._params_match(generic, ["Comparable", "Object[]"])
+    assert not generation._params_match(generic, ["int", "Object[]"])
+    assert generation._params_match(_method("f", "E1"), ["Object"])
+
+    # Inner class constructors take the outer instance first
+    ctor = _method("Inner", "String", kind="constructor")
+    assert not generation._params_match(ctor, ["Outer", "String"])
+    assert generation._params_match(ctor, ["Outer", "String"], leading=True)
+
+
+def test_method_coverage_tells_overloads_apart():
+    cov = coverage_index.build_index(REPORT)
+    with open(os.path.join(SOURCES, "org", "example", "util", "Strings.java"), encoding="ISO-8859-1") as f:
+        (strings, _mode, _matcher) = java_index.parse_source(f.read())["types"]
+    is_blank_string, is_blank_chars, max_method, _join = strings["methods"]
+    # A constructor whose recorded first line lies outside it (field
+    # initializers) is matched by its parameter types
+    ctor = _method("Strings", kind="constructor", lines=(20, 21))
+    methods = strings["methods"] + [ctor]
+
+    matched = generation._method_coverage(cov, "org.example.util.Strings", methods)
+
+    nodes = cov.classes["org.example.util.Strings"].children
+    assert matched[id(is_blank_string)] is nodes["isBlank(Ljava/lang/String;)Z"]
+    assert matched[id(is_blank_chars)] is nodes["isBlank(Ljava/lang/CharSequence;)Z"]
+    assert matched[id(ctor)] is nodes["<init>()V"]
+    # Not in the report
+    assert id(max_method) not in matched
+    assert generation._method_coverage(cov, "org.example.util.Missing", methods) == {}
+
+
+def test_suggestions_list_methods_with_missed_code(monkeypatch, tmp_path):
+    monkeypatch.setattr(generation, "SRC_DIR", SOURCES)
+    monkeypatch.setattr(generation, "SOURCE_INDEX_FILE", str(tmp_path / "index.json"))
+    monkeypatch.setattr(generation, "find_jacoco_report", lambda: REPORT)
+    monkeypatch.setattr(generation, "sources_fingerprint", lambda: str(tmp_path))
+
+    text = generation.suggest_junit_tests_for_class("org.example.util.Strings")
+    assert "1 of 2 public methods have missed lines or branches" in text
+    assert "public void test_isBlank_CharSequence()" in text
+    assert "test_isBlank_String" not in text
+
+    text = generation.suggest_junit_tests_for_class("org.example.Greeter", only_uncovered=False)
+    assert "public void test_greet()" in text and "public void test_task()" in text
+    assert "Could not find source file" in generation.suggest_junit_tests_for_class("org.example.Nope")
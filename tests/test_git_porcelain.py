@@ -0,0 +1,58 @@
+from lib.git_porcelain import parse_status
+
+
+def _status(*records: str) -> dict:
+    return parse_status("\0".join(records) + "\0")
+
+
+def test_branch_with_upstream():
+    status = _status(
+        "# branch.oid 1a2b3c",
+        "# branch.head main",
+        "# branch.upstream origin/main",
+        "# branch.ab +2 -3",
+    )
+    assert status["branch"] == {"head": "main", "oid": "1a2b3c", "upstream": "origin/main",
+                                "ahead": 2, "behind": 3}
+    assert status["clean"]
+
+
+def test_initial_commit_and_detached_head():
+    status = _status("# branch.oid (initial)", "# branch.head (detached)")
+    assert status["branch"]["oid"] is None
+    assert status["branch"]["head"] is None
+    assert status["branch"]["upstream"] is None
+
+
+def test_staged_and_unstaged_changes_of_one_file():
+    status = _status("1 MM N... 100644 100644 100644 aaa bbb src/Foo Bar.java")
+    assert status["staged"] == [{"path": "src/Foo Bar.java", "status": "M"}]
+    assert status["unstaged"] == [{"path": "src/Foo Bar.java", "status": "M"}]
+    assert not status["clean"]
+
+
+def test_rename_takes_the_original_path_from_the_next_record():
+    status = _status(
+        "2 R. N... 100644 100644 100644 aaa aaa R100 new name.txt",
+        "old name.txt",
+        "? notes.txt",
+    )
+    assert status["staged"] == [{"path": "new name.txt", "status": "R", "orig_path": "old name.txt"}]
+    assert status["unstaged"] == []
+    assert status["untracked"] == ["notes.txt"]
+
+
+def test_unmerged_untracked_and_ignored():
+    status = _status(
+        "u UU N... 100644 100644 100644 100644 aaa bbb ccc conflict.txt",
+        "? new.txt",
+        "! build/out.class",
+    )
+    assert status["unmerged"] == [{"path": "conflict.txt", "status": "UU"}]
+    assert status["untracked"] == ["new.txt"]
+    assert status["ignored"] == ["build/out.class"]
+    assert not status["clean"]
+
+
+def test_ignored_files_alone_are_clean():
+    assert _status("! build/out.class")["clean"]
@@ -0,0 +1,50 @@
+import os
+
+from lib import jacoco_exec
+from tools import coverage
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+EXEC = os.path.join(FIXTURES, "jacoco.exec")
+CLASSES = os.path.join(FIXTURES, "classes")
+PACKAGE = "org/apache/commons/lang3/concurrent"
+
+
+def test_read_exec():
+    sessions, classes = jacoco_exec.read_exec(EXEC)
+
+    assert [s.id for s in sessions] == ["fixture-run"]
+    (data,) = classes.values()
+    assert data.name == f"{PACKAGE}/LazyInitializer"
+    assert data.probes == [True, True, True, False, True, True, True, False, True]
+    assert (data.covered, data.total) == (7, 9)
+
+
+def test_match_class_files_by_class_id(tmp_path):
+    _sessions, classes = jacoco_exec.read_exec(EXEC)
+    current, stale, unexecuted = jacoco_exec.match_class_files(classes, CLASSES)
+
+    assert [c.name for c in current] == [f"{PACKAGE}/LazyInitializer"]
+    assert stale == []
+    assert unexecuted == [f"{PACKAGE}/ConcurrentException", f"{PACKAGE}/ConcurrentInitializer"]
+
+    (data,) = classes.values()
+    data.id ^= 1
+    current, stale, _unexecuted = jacoco_exec.match_class_files(classes, CLASSES)
+    assert current == [] and stale == [data]
+
+
+def test_summary_counts_classes_that_never_ran_as_missed(monkeypatch):
+    monkeypatch.setattr(coverage, "JACOCO_EXEC_PATH", EXEC)
+    monkeypatch.setattr(coverage, "CLASSES_DIR", CLASSES)
+
+    summary = coverage.summarize_exec_coverage()
+
+    # LazyInitializer hits 7 of 9 probes; ConcurrentException's 3 never ran
+    # and the ConcurrentInitializer interface has no code
+    assert "- PROBE: 58.3% (7/12 covered)" in summary
+    assert "- LINE: 60.0% (9/15 covered)" in summary
+    assert "- METHOD: 40.0% (2/5 covered)" in summary
+    assert "1 executed class(es), 1 with code that never ran." in summary
+    assert "  - org.apache.commons.lang3.concurrent.ConcurrentException" in summary
+    assert "ConcurrentInitializer" not in summary
+    assert "Warning" not in summary
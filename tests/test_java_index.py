@@ -0,0 +1,92 @@
+import os
+import shutil
+
+from lib import java_index
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+SOURCES = os.path.join(FIXTURES, "java")
+STRINGS = os.path.join(SOURCES, "org", "example", "util", "Strings.java")
+
+
+def _parse(path: str) -> dict:
+    with open(path, "r", encoding="ISO-8859-1") as f:
+        return java_index.parse_source(f.read())
+
+
+def test_tokenize_drops_comments_and_keeps_lines():
+    tokens = java_index.tokenize('int a; // b {\n/* c\n} */ String s = "{";')
+    assert tokens == [("int", 1), ("a", 1), (";", 1), ("String", 3), ("s", 3), ("=", 3), ('"{"', 3), (";", 3)]
+
+
+def test_parse_source_lists_types_flat_with_members():
+    parsed = _parse(STRINGS)
+
+    assert parsed["package"] == "org.example.util"
+    assert [(t["qualified"], t["kind"], t["visibility"], t["start_line"], t["end_line"]) for t in parsed["types"]] == [
+        ("Strings", "class", "public", 3, 36),
+        ("Strings.Mode", "enum", "public", 24, 31),
+        ("Strings.Matcher", "interface", "package", 33, 35),
+    ]
+    strings, mode, matcher = parsed["types"]
+    assert [m["signature"] for m in strings["methods"]] == [
+        "public static boolean isBlank(String s)",
+        "public static boolean isBlank(CharSequence cs)",
+        "static <T extends Comparable<T>> T max(T a, T b) throws IllegalStateException",
+        "protected String join(String... parts)",
+    ]
+    max_method = strings["methods"][2]
+    assert (max_method["visibility"], max_method["return_type"], max_method["throws"]) == (
+        "package", "T", ["IllegalStateException"])
+    assert (max_method["start_line"], max_method["end_line"]) == (15, 18)
+    # The body of the STRICT constant is not a member of the enum
+    assert [(m["name"], m["start_line"]) for m in mode["methods"]] == [("weight", 28)]
+    assert matcher["methods"][0]["visibility"] == "public"
+
+
+def test_method_bodies_and_anonymous_classes_are_skipped():
+    (greeter,) = _parse(os.path.join(SOURCES, "org", "example", "Greeter.java"))["types"]
+    assert [(m["name"], m["start_line"], m["end_line"]) for m in greeter["methods"]] == [
+        ("greet", 4, 8), ("task", 9, 11)]
+
+
+def test_binary_name():
+    assert java_index.binary_name("org.example.util", {"qualified": "Strings.Mode"}) == "org.example.util.Strings$Mode"
+    assert java_index.binary_name("", {"qualified": "Top"}) == "Top"
+
+
+def test_index_finds_types_and_refreshes_changed_files(tmp_path):
+    src = tmp_path / "src"
+    shutil.copytree(SOURCES, src)
+    index_path = str(tmp_path / "state" / "index.json")
+    index = java_index.SourceIndex(str(src), index_path)
+
+    assert index.refresh() == 2
+    assert index.refresh() == 0
+    for name in ("org.example.util.Strings.Mode", "org/example/util/Strings/Mode", "org.example.util.Strings$Mode"):
+        rel, jtype = index.find_type(name)
+        assert (rel, jtype["kind"]) == ("org/example/util/Strings.java", "enum")
+    assert index.package_of("org/example/Greeter.java") == "org.example"
+
+    # A new instance starts from the saved table
+    assert java_index.SourceIndex(str(src), index_path).refresh() == 0
+
+    greeter = src / "org" / "example" / "Greeter.java"
+    greeter.write_text(greeter.read_text().replace("class Greeter", "class Welcomer"))
+    assert index.refresh() == 1
+    assert index.find_type("org.example.Greeter") is None
+    assert index.find_type("org.example.Welcomer") is not None
+
+    greeter.unlink()
+    assert index.refresh() == 0
+    assert index.find_type("org.example.Welcomer") is None
+    assert sorted(rel for rel, _package, _t in index.types()) == ["org/example/util/Strings.java"] * 3
+
+
+def test_source_lines_follow_the_file(tmp_path):
+    path = tmp_path / "A.java"
+    path.write_text("class A {\n}\n")
+    assert java_index.source_lines(str(path)) == ["class A {", "}"]
+    assert java_index.source_lines(str(path)) is java_index.source_lines(str(path))
+
+    path.write_text("class B {}\n")
+    assert java_index.source_lines(str(path)) == ["class B {}"]
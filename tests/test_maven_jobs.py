@@ -0,0 +1,76 @@
+import asyncio
+import sys
+import threading
+
+from lib import build_logs, maven_jobs
+from lib.maven_jobs import JobQueue
+
+
+async def _wait(job: maven_jobs.MavenJob) -> None:
+    while not job.done:
+        await asyncio.sleep(0.01)
+
+
+def test_job_runs_and_collects_test_classes(tmp_path):
+    script = "print('Running org.x.FooTest'); print('Tests run: 2, Failures: 1, Errors: 0, Skipped: 0')"
+
+    async def main():
+        queue = JobQueue(str(tmp_path))
+        job = queue.submit("tests", [sys.executable, "-c", script], str(tmp_path),
+                           after=lambda returncode, elapsed: f"exit {returncode}")
+        await _wait(job)
+        return job
+
+    job = asyncio.run(main())
+    assert job.status == maven_jobs.PASSED and job.returncode == 0
+    assert [(t.name, t.tests, t.ok) for t in job.tests] == [("org.x.FooTest", 2, False)]
+    assert job.log.closed
+    assert job.log.lines(job.log.line_count - 1, 1) == ["exit 0"]
+
+
+def test_job_without_command_passes(tmp_path):
+    async def main():
+        queue = JobQueue(str(tmp_path))
+        job = queue.submit("nothing to do", [], str(tmp_path), before=lambda job: "up to date")
+        await _wait(job)
+        return job
+
+    job = asyncio.run(main())
+    assert job.status == maven_jobs.PASSED
+    assert job.log.lines(0, 1) == ["up to date"]
+
+
+def test_cancelled_wait_for_the_lock_does_not_take_it(tmp_path):
+    lock = threading.Lock()
+    lock.acquire()
+
+    async def main():
+        queue = JobQueue(str(tmp_path), lock)
+        job = queue.submit("tests", [sys.executable, "-c", "pass"], str(tmp_path))
+        await asyncio.sleep(3 * maven_jobs.LOCK_POLL_SECONDS)
+        assert job.status == maven_jobs.QUEUED
+        queue._worker.cancel()
+        await asyncio.sleep(0)
+        lock.release()
+        await asyncio.sleep(3 * maven_jobs.LOCK_POLL_SECONDS)
+
+    asyncio.run(main())
+    assert lock.acquire(blocking=False)
+
+
+def test_only_the_newest_finished_jobs_are_kept(tmp_path, monkeypatch):
+    monkeypatch.setattr(maven_jobs, "MAX_FINISHED_JOBS", 2)
+
+    async def main():
+        queue = JobQueue(str(tmp_path))
+        jobs = []
+        for i in range(4):
+            jobs.append(queue.submit(f"job {i}", [], str(tmp_path)))
+            await _wait(jobs[-1])
+        return queue, jobs
+
+    queue, jobs = asyncio.run(main())
+    # Submitting the fourth job forgot the first; it is forgotten in turn
+    # once the next one is submitted
+    assert list(queue.jobs) == [job.id for job in jobs[1:]]
+    assert build_logs.find_log(str(tmp_path), jobs[0].log.id) is not jobs[0].log
@@ -0,0 +1,129 @@
+import os
+
+import pytest
+
+from lib import fast_build, flaky_tests
+from tools import maven
+
+
+@pytest.fixture
+def codebase(tmp_path, monkeypatch):
+    """
+    A small codebase with one main class and two tests, wired into tools.maven.
+    """
+    root = tmp_path / "codebase"
+    files = {
+        "main/java/org/x/Foo.java": "class Foo {}\n",
+        "test/java/org/x/FooTest.java": "class FooTest { Foo foo; }\n",
+        "test/java/org/x/BarTest.java": "class BarTest {}\n",
+    }
+    for rel, text in files.items():
+        path = root / "src" / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    (root / "target" / "classes").mkdir(parents=True)
+    (root / "target" / "test-classes").mkdir()
+    (root / "pom.xml").write_text("<project/>\n")
+
+    state = tmp_path / "state"
+    for name, value in {
+        "CODEBASE_DIR": root,
+        "SRC_DIR": root / "src",
+        "MAIN_JAVA_DIR": root / "src" / "main" / "java",
+        "TEST_JAVA_DIR": root / "src" / "test" / "java",
+        "CLASSES_DIR": root / "target" / "classes",
+        "TEST_CLASSES_DIR": root / "target" / "test-classes",
+        "JACOCO_EXEC_PATH": root / "target" / "jacoco.exec",
+        "CACHE_DIR": state,
+        "SOURCE_HASHES_FILE": state / "source_hashes.json",
+    }.items():
+        monkeypatch.setattr(maven, name, str(value))
+    return root
+
+
+def test_full_run(codebase):
+    plan = maven._plan_maven_run(False, 1)
+
+    assert plan.args == ["clean", "test", "-B"]
+    assert plan.full_run and plan.baseline
+    assert sorted(plan.hashes) == ["main/java/org/x/Foo.java", "test/java/org/x/BarTest.java",
+                                   "test/java/org/x/FooTest.java"]
+
+
+def test_forks_and_per_test_coverage(codebase):
+    assert maven._plan_maven_run(False, 3).args[3:] == maven._parallel_args(3)
+    assert maven._plan_maven_run(False, 1, per_test_coverage=True).args[-1] == "-Pjacoco-per-test"
+
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({"flaky": "ignore"}, "Unknown flaky policy"),
+    ({"tests": "FooTest", "incremental": True}, "cannot be combined"),
+    ({"per_test_coverage": True, "forks": 2}, "forks > 1"),
+])
+def test_rejects_conflicting_options(codebase, kwargs, message):
+    options = {"incremental": False, "forks": 1, **kwargs}
+    with pytest.raises(ValueError, match=message):
+        maven._plan_maven_run(**options)
+
+
+def test_chosen_tests_do_not_become_the_baseline(codebase):
+    plan = maven._plan_maven_run(False, 1, tests="FooTest#testA")
+
+    assert plan.args == ["test", "-B", "-Dtest=FooTest#testA", "-DfailIfNoTests=false"]
+    assert not plan.full_run and not plan.baseline
+
+
+def test_incremental_selects_tests_of_changed_files(codebase):
+    # Without a passing run to compare with, everything runs
+    assert maven._plan_maven_run(True, 1).args == ["clean", "test", "-B"]
+
+    maven._save_source_hashes(maven._hash_sources())
+    plan = maven._plan_maven_run(True, 1)
+    assert plan.args is None and plan.header.startswith("No changes under codebase/src")
+
+    # No test impact data: tests naming the changed class are selected
+    (codebase / "src" / "main" / "java" / "org" / "x" / "Foo.java").write_text("class Foo { int x; }\n")
+    plan = maven._plan_maven_run(True, 1)
+    assert plan.args == ["test", "-B", "-Dtest=org.x.FooTest", "-DfailIfNoTests=false"]
+    assert not plan.full_run and plan.baseline
+
+
+def test_compile_only_falls_back_until_a_classpath_is_recorded(codebase):
+    plan = maven._plan_maven_run(False, 1, compile_only=True)
+    assert plan.args == ["clean", "test", "-B"] + fast_build.classpath_args(maven.CACHE_DIR)
+    assert plan.record_classpath == fast_build.pom_fingerprint(str(codebase))
+    assert "no dependency classpath recorded yet" in plan.header
+
+    # The clean build wrote the classpath and passed
+    os.makedirs(maven.CACHE_DIR)
+    with open(os.path.join(maven.CACHE_DIR, fast_build.CLASSPATH_FILE), "w", encoding="utf-8") as f:
+        f.write("")
+    fast_build.record_state(maven.CACHE_DIR, plan.record_classpath)
+    maven._save_source_hashes(plan.hashes)
+    (codebase / "src" / "test" / "java" / "org" / "x" / "BarTest.java").write_text("class BarTest { }\n")
+
+    plan = maven._plan_maven_run(False, 1, compile_only=True)
+    assert plan.args[:4] == ["-B", f"{maven.JACOCO_PLUGIN}:prepare-agent", "surefire:test",
+                             f"{maven.JACOCO_PLUGIN}:report"]
+    assert "-Dtest=org.x.BarTest" in plan.args
+    assert plan.prepare is not None and not plan.full_run
+
+
+def test_quarantine_excludes_known_flaky_tests(codebase):
+    flaky_tests.save(maven.CACHE_DIR, {
+        "org.x.FooTest#testA": [[1, "pass"], [2, "fail"]],
+        "org.x.BarTest#testB": [[1, "fail"], [2, "fail"]],
+    }, flaky_tests.sources_key(maven._hash_sources()))
+
+    plan = maven._plan_maven_run(False, 1, flaky="quarantine")
+    assert "-Dtest=**/*Test.java,!org.x.FooTest#testA" in plan.args
+    assert f"-Dcommons.surefire.version={maven.SUREFIRE_FILTER_VERSION}" in plan.args
+    assert "org.x.BarTest" not in plan.header
+
+    plan = maven._plan_maven_run(False, 1, flaky="quarantine", tests="BarTest")
+    assert "-Dtest=BarTest,!org.x.FooTest#testA" in plan.args
+
+    # Verdicts recorded on other sources no longer apply
+    (codebase / "src" / "main" / "java" / "org" / "x" / "Foo.java").write_text("class Foo { int x; }\n")
+    plan = maven._plan_maven_run(False, 1, flaky="quarantine")
+    assert plan.args == ["clean", "test", "-B"]
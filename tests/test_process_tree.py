@@ -0,0 +1,81 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from lib import process_tree
+from lib.process_tree import Limits
+
+posix_only = pytest.mark.skipif(os.name != "posix", reason="uses sh and POSIX signals")
+
+
+def _gone(pid: int, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@posix_only
+def test_kill_tree_stops_the_child_and_what_it_forked():
+    proc = subprocess.Popen(["sh", "-c", "sleep 60 & echo $!; wait"], stdout=subprocess.PIPE,
+                            text=True, **process_tree.popen_kwargs())
+    grandchild = int(proc.stdout.readline())
+    process_tree.kill_tree(proc, grace=2.0)
+    assert proc.poll() is not None
+    assert _gone(grandchild)
+    proc.stdout.close()
+
+
+@posix_only
+def test_kill_tree_kills_a_tree_that_ignores_the_interrupt():
+    proc = subprocess.Popen(["sh", "-c", "trap '' INT; sleep 60"], **process_tree.popen_kwargs())
+    time.sleep(0.2)
+    started = time.monotonic()
+    process_tree.kill_tree(proc, grace=0.5)
+    assert proc.poll() is not None
+    assert time.monotonic() - started < 5
+
+
+def test_run_within_limits_returns_the_output():
+    result = process_tree.run([sys.executable, "-c", "print('hello')"], Limits(timeout=30))
+    assert result.returncode == 0
+    assert result.stdout == "hello\n"
+    assert result.usage.exceeded is None
+    assert result.usage.summary().startswith("Resource usage:")
+
+
+@posix_only
+def test_watchdog_stops_a_run_at_the_wall_clock_limit():
+    started = time.monotonic()
+    result = process_tree.run(["sh", "-c", "echo started; sleep 60"], Limits(timeout=0.5))
+    assert time.monotonic() - started < 10
+    assert result.stdout == "started\n"
+    assert result.usage.exceeded == "wall-clock limit of 0.5 s"
+    assert result.usage.summary().startswith("Stopped: exceeded the wall-clock limit")
+
+
+@pytest.mark.skipif(process_tree.tree_usage(os.getpid()) is None, reason="no /proc or psutil")
+def test_watchdog_stops_a_run_at_the_cpu_limit():
+    result = process_tree.run([sys.executable, "-c", "while True: pass"], Limits(timeout=30, cpu_seconds=0.5))
+    assert result.usage.exceeded == "CPU limit of 0.5 s"
+    assert result.usage.cpu_seconds >= 0.5
+
+
+def test_limits_for_reads_the_environment(monkeypatch):
+    assert process_tree.limits_for("git_push") == Limits(timeout=120)
+    assert process_tree.limits_for("no_such_tool") == process_tree.FALLBACK_LIMITS
+
+    monkeypatch.setenv("MCP_TIMEOUT_GIT_PUSH", "0")
+    monkeypatch.setenv("MCP_MEMORY_MB_GIT_PUSH", "256")
+    assert process_tree.limits_for("git_push") == Limits(timeout=None, memory_mb=256)
+
+    monkeypatch.setenv("MCP_CPU_GIT_PUSH", "soon")
+    with pytest.raises(ValueError, match="MCP_CPU_GIT_PUSH"):
+        process_tree.limits_for("git_push")
@@ -0,0 +1,137 @@
+import os
+import time
+
+from lib.surefire_stream import FailFastWatcher
+
+
+def _feed(watcher: FailFastWatcher, lines: list[str]) -> int | None:
+    """
+    Feed lines until the watcher says stop; the index of that line.
+    """
+    for i, line in enumerate(lines):
+        if watcher.feed(line):
+            return i
+    return None
+
+
+def test_surefire_2_failure_block():
+    watcher = FailFastWatcher()
+    stopped_at = _feed(watcher, [
+        "[INFO] Running org.x.FooTest",
+        "[ERROR] Tests run: 2, Failures: 1, Errors: 0, Skipped: 0, Time elapsed: 0.1 s <<< FAILURE! - in org.x.FooTest",
+        "[ERROR] testBar(org.x.FooTest)  Time elapsed: 0.01 s  <<< FAILURE!",
+        "java.lang.AssertionError: expected:<1> but was:<2>",
+        "\tat org.junit.Assert.fail(Assert.java:88)",
+        "\tat org.x.FooTest.testBar(FooTest.java:42)",
+        "",
+        "[INFO] Running org.x.OtherTest",
+    ])
+    assert stopped_at == 6
+    assert watcher.failure == {
+        "class": "org.x.FooTest",
+        "method": "testBar",
+        "kind": "failure",
+        "type": "java.lang.AssertionError",
+        "message": "expected:<1> but was:<2>",
+        "trace": [
+            "java.lang.AssertionError: expected:<1> but was:<2>",
+            "at org.junit.Assert.fail(Assert.java:88)",
+            "at org.x.FooTest.testBar(FooTest.java:42)",
+        ],
+    }
+
+
+def test_surefire_3_error_with_multi_line_message():
+    watcher = FailFastWatcher()
+    _feed(watcher, [
+        "[INFO] Running org.x.FooTest",
+        "[ERROR] org.x.FooTest.testBaz -- Time elapsed: 0.02 s <<< ERROR!",
+        "java.lang.IllegalStateException: first line",
+        "second line",
+        "\tat org.x.FooTest.testBaz(FooTest.java:50)",
+        "[INFO] Tests run: 1",
+    ])
+    assert watcher.done
+    failure = watcher.failure
+    assert (failure["class"], failure["method"], failure["kind"]) == ("org.x.FooTest", "testBaz", "error")
+    assert failure["type"] == "java.lang.IllegalStateException"
+    assert failure["message"] == "first line\nsecond line"
+
+
+def test_class_without_test_block_reads_its_report(tmp_path):
+    (tmp_path / "TEST-org.x.FooTest.xml").write_text(
+        '<testsuite name="org.x.FooTest">'
+        '<testcase classname="org.x.FooTest" name="testOk" time="0.01"/>'
+        '<testcase classname="org.x.FooTest" name="testBad" time="0.02">'
+        '<failure message="boom" type="java.lang.AssertionError">trace</failure>'
+        '</testcase></testsuite>'
+    )
+    watcher = FailFastWatcher(reports_dir=str(tmp_path))
+    stopped_at = _feed(watcher, [
+        "Running org.x.FooTest",
+        "Tests run: 2, Failures: 1, Errors: 0, Skipped: 0, Time elapsed: 0.05 sec <<< FAILURE!",
+        "Running org.x.BarTest",
+    ])
+    assert stopped_at == 2
+    assert watcher.failure["method"] == "testBad"
+    assert watcher.failure["message"] == "boom"
+    assert watcher.failure["type"] == "java.lang.AssertionError"
+
+
+def test_report_older_than_the_run_is_ignored(tmp_path):
+    report = tmp_path / "TEST-org.x.FooTest.xml"
+    report.write_text(
+        '<testsuite name="org.x.FooTest">'
+        '<testcase classname="org.x.FooTest" name="testOld" time="0.01">'
+        '<failure message="old" type="java.lang.AssertionError">trace</failure>'
+        '</testcase></testsuite>'
+    )
+    old = time.time() - 60
+    os.utime(report, (old, old))
+    watcher = FailFastWatcher(reports_dir=str(tmp_path), since=old + 30)
+    _feed(watcher, [
+        "Running org.x.FooTest",
+        "Tests run: 1, Failures: 1, Errors: 0, Skipped: 0, Time elapsed: 0.05 sec <<< FAILURE!",
+        "Running org.x.BarTest",
+    ])
+    # Only what the console said
+    assert watcher.failure == {"class": "org.x.FooTest", "method": None, "kind": "failure",
+                               "type": None, "message": None, "trace": []}
+
+
+def test_stops_when_every_target_class_passed():
+    watcher = FailFastWatcher(targets=["FooTest", "org.x.BarTest"])
+    stopped_at = _feed(watcher, [
+        "[INFO] Running org.x.FooTest",
+        "[INFO] Tests run: 3, Failures: 0, Errors: 0, Skipped: 0, Time elapsed: 0.1 s - in org.x.FooTest",
+        "[INFO] Running org.x.BarTest",
+        "[INFO] Tests run: 1, Failures: 0, Errors: 0, Skipped: 0, Time elapsed: 0.1 s - in org.x.BarTest",
+        "[INFO] Tests run: 4, Failures: 0, Errors: 0, Skipped: 0",
+    ])
+    assert stopped_at == 3
+    assert watcher.failure is None
+    assert watcher.completed == ["org.x.FooTest", "org.x.BarTest"]
+
+
+def test_passing_run_without_targets_never_stops():
+    watcher = FailFastWatcher()
+    assert _feed(watcher, [
+        "[INFO] Running org.x.FooTest",
+        "[INFO] Tests run: 3, Failures: 0, Errors: 0, Skipped: 0, Time elapsed: 0.1 s - in org.x.FooTest",
+        "[INFO] BUILD SUCCESS",
+    ]) is None
+    watcher.close()
+    assert not watcher.done
+
+
+def test_close_settles_a_failure_at_the_end_of_the_output():
+    watcher = FailFastWatcher()
+    _feed(watcher, [
+        "testBar(org.x.FooTest)  Time elapsed: 0.01 s  <<< FAILURE!",
+        "java.lang.AssertionError",
+    ])
+    assert not watcher.done
+    watcher.close()
+    assert watcher.done
+    assert watcher.failure["type"] == "java.lang.AssertionError"
+    assert watcher.failure["message"] is None
@@ -0,0 +1,107 @@
+import os
+
+from lib import test_impact
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+EXEC = os.path.join(FIXTURES, "per-test.exec")
+CLASSES = os.path.join(FIXTURES, "classes")
+PACKAGE = "org/apache/commons/lang3/concurrent"
+LAZY = f"{PACKAGE}/LazyInitializer.java"
+EXCEPTION = f"{PACKAGE}/ConcurrentException.java"
+
+# per-test.exec holds one session per test class:
+#   LazyInitializerTest      LazyInitializer, recorded before a recompile
+#   ConcurrentExceptionTest  ConcurrentException, first and last constructor
+#   LazyInitializerCtorTest  LazyInitializer, constructor only
+TESTS = ["LazyInitializerTest", "ConcurrentExceptionTest", "LazyInitializerCtorTest"]
+
+
+def _dirs(tmp_path, tests=TESTS) -> tuple:
+    test_classes = tmp_path / "test-classes"
+    for name in tests:
+        path = test_classes.joinpath(*PACKAGE.split("/"), name + ".class")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"")
+    main_src = tmp_path / "src"
+    source = main_src.joinpath(*EXCEPTION.split("/"))
+    source.parent.mkdir(parents=True)
+    source.write_text("class ConcurrentException {}\n")
+    return str(test_classes), str(main_src), str(tmp_path / "state")
+
+
+def test_build_index_maps_lines_and_methods_to_tests(tmp_path):
+    test_classes, main_src, state = _dirs(tmp_path)
+    index = test_impact.build_index(EXEC, CLASSES, test_classes, main_src, state)
+
+    dotted = PACKAGE.replace("/", ".")
+    assert index["tests"] == [f"{dotted}.{t}" for t in TESTS]
+    exception = index["sources"][EXCEPTION]
+    assert exception["lines"] == {"45": [1], "46": [1], "68": [1], "69": [1]}
+    assert [(m["desc"], m["tests"]) for m in exception["methods"]] == [
+        ("()V", [1]), ("(Ljava/lang/Throwable;)V", []), ("(Ljava/lang/String;Ljava/lang/Throwable;)V", [1])]
+    # Only sources with usable data get a copy
+    assert os.path.exists(os.path.join(state, test_impact.SOURCES_DIR, *EXCEPTION.split("/")))
+    assert os.path.exists(os.path.join(state, test_impact.INDEX_FILE))
+
+
+def test_tests_for_selects_by_line_and_method(tmp_path):
+    index = test_impact.build_index(EXEC, CLASSES, *_dirs(tmp_path))
+    exception_test = f"{PACKAGE.replace('/', '.')}.ConcurrentExceptionTest"
+
+    assert test_impact.tests_for(index, EXCEPTION) == [exception_test]
+    assert test_impact.tests_for(index, EXCEPTION, {46}) == [exception_test]
+    assert test_impact.tests_for(index, EXCEPTION, {56}) == []
+    # A line outside every method selects every test of the file
+    assert test_impact.tests_for(index, EXCEPTION, {20}) == [exception_test]
+    assert test_impact.tests_for(index, EXCEPTION, method="<init>") == [exception_test]
+    assert test_impact.tests_for(index, f"{PACKAGE}/Unknown.java") is None
+
+
+def test_stale_data_leaves_the_source_to_the_fallback(tmp_path):
+    index = test_impact.build_index(EXEC, CLASSES, *_dirs(tmp_path))
+
+    # LazyInitializerCtorTest's data is current, but LazyInitializerTest's
+    # predates the class file, so the tests listed may be incomplete
+    assert index["stale"] == [LAZY]
+    assert test_impact.tests_for(index, LAZY) is None
+    assert test_impact.tests_for(index, LAZY, {79}) is None
+
+
+def test_tests_for_current_data(tmp_path):
+    dirs = _dirs(tmp_path, ["ConcurrentExceptionTest", "LazyInitializerCtorTest"])
+    index = test_impact.build_index(EXEC, CLASSES, *dirs)
+    ctor_test = f"{PACKAGE.replace('/', '.')}.LazyInitializerCtorTest"
+
+    assert index["stale"] == []
+    assert test_impact.tests_for(index, LAZY, {79}) == [ctor_test]
+    assert test_impact.tests_for(index, LAZY, {98}) == []
+    assert test_impact.tests_for(index, LAZY, method="get") == []
+
+
+def test_build_index_without_per_test_sessions(tmp_path):
+    assert test_impact.build_index(EXEC, CLASSES, *_dirs(tmp_path, [])) is None
+
+
+def test_load_index_is_cached_until_the_exec_file_changes(tmp_path):
+    dirs = _dirs(tmp_path)
+    exec_path = tmp_path / "jacoco.exec"
+    exec_path.write_bytes(open(EXEC, "rb").read())
+
+    first = test_impact.load_index(str(exec_path), CLASSES, *dirs)
+    assert test_impact.load_index(str(exec_path), CLASSES, *dirs) is first
+
+    os.utime(exec_path, ns=(first["exec_key"][0] + 10**9,) * 2)
+    second = test_impact.load_index(str(exec_path), CLASSES, *dirs)
+    assert second is not first and second["tests"] == first["tests"]
+
+
+def test_changed_lines_against_the_indexed_copy(tmp_path):
+    test_classes, main_src, state = _dirs(tmp_path)
+    test_impact.build_index(EXEC, CLASSES, test_classes, main_src, state)
+    current = tmp_path / "ConcurrentException.java"
+
+    current.write_text("class ConcurrentException {}\n")
+    assert test_impact.changed_lines(state, EXCEPTION, str(current)) == set()
+    current.write_text("// moved\nclass ConcurrentException { int x; }\n")
+    assert test_impact.changed_lines(state, EXCEPTION, str(current)) == {1}
+    assert test_impact.changed_lines(state, LAZY, str(current)) is None
@@ -0,0 +1,83 @@
+import os
+
+from lib import tool_cache
+from lib.tool_cache import ToolCache
+
+
+def test_lru_counts_hits_misses_and_evictions():
+    cache = ToolCache(max_entries=2)
+    assert cache.get("a", ("a", 1)) is None
+    cache.put("a", ("a", 1), "one")
+    cache.put("b", ("b", 2), None)
+    # A cached None is a hit, not a miss
+    assert cache.get("b", ("b", 2)) == (None,)
+    assert cache.get("a", ("a", 1)) == ("one",)
+
+    # b is now the least recently used
+    cache.put("a", ("a", 3), "three")
+    assert cache.get("a", ("a", 1)) == ("one",)
+    assert cache.get("b", ("b", 2)) is None
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"], stats["hit_rate"]) == (2, 3, 2, 0.6)
+    assert stats["tools"] == {
+        "a": {"hits": 2, "misses": 1, "evictions": 0, "entries": 2},
+        "b": {"hits": 1, "misses": 1, "evictions": 1, "entries": 0},
+    }
+    cache.clear()
+    assert cache.stats()["entries"] == 0 and cache.stats()["hit_rate"] is None
+
+
+def test_memoize_keys_on_arguments_and_fingerprint(monkeypatch):
+    monkeypatch.setattr(tool_cache, "cache", ToolCache())
+    fingerprint = [1]
+    calls = []
+
+    @tool_cache.memoize(lambda: fingerprint[0])
+    def lookup(name: str, depth: int = 1) -> str:
+        calls.append((name, depth))
+        return f"{name}:{depth}:{len(calls)}"
+
+    assert lookup("x") == "x:1:1"
+    # Defaults are bound, so these are the same call
+    assert lookup("x", 1) == lookup(name="x") == "x:1:1"
+    assert lookup("x", 2) == "x:2:2"
+    fingerprint[0] = 2
+    assert lookup("x") == "x:1:3"
+    fingerprint[0] = None
+    assert lookup("x") == "x:1:4" and lookup("x") == "x:1:5"
+    assert lookup.__name__ == "lookup"
+
+
+def test_error_results_are_not_cached(monkeypatch):
+    monkeypatch.setattr(tool_cache, "cache", ToolCache())
+    results = iter(["Error reading report: busy", "ok"])
+
+    @tool_cache.memoize(lambda: "fp")
+    def report() -> str:
+        return next(results)
+
+    assert report() == "Error reading report: busy"
+    assert report() == "ok"
+    assert report() == "ok"
+
+
+def test_fingerprints_change_with_the_files(tmp_path):
+    path = tmp_path / "a.txt"
+    missing = str(tmp_path / "missing.txt")
+    path.write_text("a")
+    before = tool_cache.file_fingerprint(str(path), missing)
+    assert before[1] is None
+    tree = tool_cache.tree_fingerprint(str(tmp_path))
+    assert tree[0] == 1 and tree[2] == 1
+
+    path.write_text("ab")
+    os.utime(path, ns=(before[0][0] + 10**9,) * 2)
+    assert tool_cache.file_fingerprint(str(path), missing) != before
+    assert tool_cache.tree_fingerprint(str(tmp_path)) != tree
+
+    skipped = tmp_path / "target"
+    skipped.mkdir()
+    (skipped / "b.class").write_bytes(b"x")
+    assert tool_cache.tree_fingerprint(str(tmp_path), skip_dirs=("target",))[0] == 1
+    assert tool_cache.tree_fingerprint(str(tmp_path))[0] == 2
@@ -0,0 +1,87 @@
+import inspect
+
+import pytest
+
+import test_tools
+from lib import tool_registry
+
+
+class FakeServer:
+    def __init__(self):
+        self.tools = {}
+
+    def tool(self, func):
+        self.tools[func.__name__] = func
+        return func
+
+
+@pytest.fixture(autouse=True)
+def manifest(tmp_path, monkeypatch):
+    monkeypatch.setattr(tool_registry, "MANIFEST_FILE", str(tmp_path / "tool_manifest.json"))
+
+
+def test_scan_reads_tools_without_importing():
+    specs = {s["name"]: s for s in tool_registry.scan_plugin("maven")}
+
+    assert specs["start_maven_tests"]["async"] and not specs["run_maven_tests"]["async"]
+    assert {"name": "forks", "type": "int", "default": 1} in specs["run_maven_tests"]["params"]
+    assert specs["build_log"]["doc"].strip()
+    # Helpers without @tool are left out
+    assert "_plan_maven_run" not in specs
+
+
+def test_scan_rejects_unsupported_annotations(tmp_path, monkeypatch):
+    (tmp_path / "tools").mkdir()
+    (tmp_path / "tools" / "odd.py").write_text("@tool\ndef odd(items: list) -> str:\n    return ''\n")
+    monkeypatch.setattr(tool_registry, "_ROOT", str(tmp_path))
+    with pytest.raises(ValueError, match="unsupported annotation 'list' on items"):
+        tool_registry.scan_plugin("odd")
+
+
+def test_manifest_is_cached_until_a_module_changes(monkeypatch):
+    first = tool_registry.load_manifest(("calculator", "git"))
+    assert [s["name"] for s in first["calculator"]] == ["calculator"]
+
+    monkeypatch.setattr(tool_registry, "scan_plugin", lambda plugin: pytest.fail("rescanned"))
+    assert tool_registry.load_manifest(("calculator", "git")) == first
+    # Another set of modules does not match the saved keys
+    monkeypatch.setattr(tool_registry, "scan_plugin", lambda plugin: [])
+    assert tool_registry.load_manifest(("calculator",)) == {"calculator": []}
+
+
+def test_lazy_proxies_keep_the_signature_and_import_on_first_call(monkeypatch):
+    monkeypatch.setattr(tool_registry, "load_times", {})
+    server = FakeServer()
+
+    registered = tool_registry.register(server, ("calculator", "maven"))
+    assert registered["calculator"] == ["calculator"]
+    assert "run_maven_tests" in registered["maven"]
+
+    proxy = server.tools["calculator"]
+    assert str(inspect.signature(proxy)) == "(expression: str) -> str"
+    assert proxy.__doc__ == test_tools.calculator.__doc__
+    assert "calculator" not in tool_registry.load_times
+    assert proxy("6 * 7") == "42"
+    assert "calculator" in tool_registry.load_times
+
+    status = server.tools["list_maven_jobs"]
+    assert inspect.iscoroutinefunction(server.tools["start_maven_tests"])
+    assert isinstance(status(), str)
+
+
+def test_eager_registration_uses_the_functions():
+    server = FakeServer()
+    registered = tool_registry.register(server, ("calculator", "git"), lazy=False)
+
+    assert registered == {"calculator": ["calculator"],
+                          "git": [s["name"] for s in tool_registry.scan_plugin("git")]}
+    assert server.tools["calculator"] is test_tools.calculator
+
+
+def test_test_tools_reexports_every_tool():
+    tools = {s["name"] for plugin in tool_registry.PLUGINS for s in tool_registry.scan_plugin(plugin)}
+    assert set(test_tools.__all__) == tools
+    assert test_tools.calculator("2 ** 10") == "1024"
+    assert test_tools.calculator("__import__('os')").startswith("Error: ")
+    assert all(callable(getattr(test_tools, name)) for name in test_tools.__all__)
+
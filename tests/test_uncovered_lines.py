@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+from tools import coverage
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+@pytest.fixture(autouse=True)
+def report(tmp_path, monkeypatch):
+    monkeypatch.setattr(coverage, "find_jacoco_report", lambda: os.path.join(FIXTURES, "jacoco.xml"))
+    monkeypatch.setattr(coverage, "SRC_DIR", os.path.join(FIXTURES, "java"))
+    monkeypatch.setattr(coverage, "MAIN_JAVA_DIR", os.path.join(FIXTURES, "java"))
+    monkeypatch.setattr(coverage, "SOURCE_INDEX_FILE", str(tmp_path / "index.json"))
+    # A fresh memoization key per test
+    monkeypatch.setattr(coverage, "sources_fingerprint", lambda: str(tmp_path))
+
+
+def test_ranges_are_shown_with_the_source():
+    text = coverage.uncovered_lines("org.example.Greeter")
+
+    assert text.startswith(
+        "org.example.Greeter (org/example/Greeter.java): 3 uncovered and 1 partly covered line(s) in 3 range(s).")
+    # The context windows touch, so the three ranges form one block
+    block = text[text.index("-- lines"):].splitlines()
+    assert block[0] == ("-- lines 5-5 partial: 0 missed instruction(s), 1/2 branches missed; "
+                        "6-6 uncovered: 2 missed instruction(s); 9-10 uncovered: 9 missed instruction(s) --")
+    assert block[1:] == [
+        "     4 |     public String greet(final String name) {",
+        "~    5 |         if (name == null)",
+        "!    6 |             return \"nobody\";",
+        "     7 |         return \"Hello, \" + name;",
+        "     8 |     }",
+        "!    9 |     public Runnable task() { return new Runnable() {",
+        "!   10 |         public void run() { greet(null); }",
+        "    11 |     }; }",
+    ]
+
+
+def test_max_ranges_and_unknown_classes():
+    text = coverage.uncovered_lines("org.example.Greeter", context=0, max_ranges=1)
+    assert "~    5 |         if (name == null)" in text
+    assert "!    6" not in text
+    assert text.endswith("... 2 more range(s); raise max_ranges to see them.")
+
+    assert coverage.uncovered_lines("org.example.Nope").startswith("No line coverage for org.example.Nope")
@@ -0,0 +1,3 @@
+"""
+Tool modules loaded on demand by the MCP server (see lib.tool_registry).
+"""
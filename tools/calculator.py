@@ -0,0 +1,19 @@
+"""
+The calculator tool, on top of lib.expression_eval (no eval()).
+"""
+from lib import expression_eval
+from lib.tool_registry import tool
+
+
+@tool
+def calculator(expression: str) -> str:
+    """
+    Evaluate an arithmetic expression: numbers, + - * / // % ** and bit
+    operators, comparisons, and/or/not, abs, round, min, max, sqrt, exp,
+    log, log10, sin, cos, tan, floor, ceil, pi and e.
+    """
+    try:
+        result = expression_eval.evaluate(expression)
+        return str(result)
+    except Exception as e:
+        return f"Error: {e}"
@@ -0,0 +1,91 @@
+"""
+Paths and helpers shared by the tool modules.
+"""
+import os
+
+from lib import (
+    coverage_csv,
+    coverage_index,
+    coverage_snapshots,
+    tool_cache,
+)
+
+# Resolve path to the codebase folder (where pom.xml lives)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CODEBASE_DIR = os.path.join(PROJECT_ROOT, "codebase")
+SRC_DIR = os.path.join(CODEBASE_DIR, "src")
+MAIN_JAVA_DIR = os.path.join(SRC_DIR, "main", "java")
+TEST_JAVA_DIR = os.path.join(SRC_DIR, "test", "java")
+JACOCO_EXEC_PATH = os.path.join(CODEBASE_DIR, "target", "jacoco.exec")
+CLASSES_DIR = os.path.join(CODEBASE_DIR, "target", "classes")
+TEST_CLASSES_DIR = os.path.join(CODEBASE_DIR, "target", "test-classes")
+SUREFIRE_REPORTS_DIR = os.path.join(CODEBASE_DIR, "target", "surefire-reports")
+
+# Local state kept between tool calls (source hashes, indexes, ...)
+CACHE_DIR = os.path.join(PROJECT_ROOT, ".mcp_cache")
+SOURCE_HASHES_FILE = os.path.join(CACHE_DIR, "source_hashes.json")
+RUN_TIMINGS_FILE = os.path.join(CACHE_DIR, "run_timings.json")
+SOURCE_INDEX_FILE = os.path.join(CACHE_DIR, "source_index.json")
+BUILD_LOG_DIR = os.path.join(CACHE_DIR, "build_logs")
+SNAPSHOT_DIR = os.path.join(CACHE_DIR, "coverage_snapshots")
+COVERAGE_STORE_FILE = os.path.join(CACHE_DIR, "coverage_store.bin")
+
+
+# JaCoCo XML report locations, in order of preference
+JACOCO_XML_CANDIDATES = [
+    os.path.join(CODEBASE_DIR, "target", "site", "jacoco", "jacoco.xml"),
+    os.path.join(CODEBASE_DIR, "target", "jacoco.xml"),  # fallback just in case
+]
+JACOCO_CSV_PATH = os.path.join(CODEBASE_DIR, "target", "site", "jacoco", "jacoco.csv")
+
+
+def coverage_fingerprint() -> tuple:
+    return tool_cache.file_fingerprint(*JACOCO_XML_CANDIDATES, JACOCO_CSV_PATH)
+
+
+def sources_fingerprint() -> tuple:
+    return tool_cache.tree_fingerprint(SRC_DIR)
+
+
+def find_jacoco_report() -> str | None:
+    for p in JACOCO_XML_CANDIDATES:
+        if os.path.exists(p):
+            return p
+    return None
+
+
+def find_fresh_jacoco_csv(report_path: str | None) -> str | None:
+    # jacoco.csv, when it comes from the same report run as report_path
+    return JACOCO_CSV_PATH if coverage_csv.is_fresh(JACOCO_CSV_PATH, report_path) else None
+
+
+def report_not_found() -> str:
+    return (
+        "JaCoCo report not found in expected locations.\n"
+        "I looked for:\n"
+        + "\n".join(f"  - {p}" for p in JACOCO_XML_CANDIDATES)
+        + "\n\nRun `run_maven_tests` or `mvn clean test jacoco:report` first."
+    )
+
+
+def snapshot_coverage_if_changed(label: str = "") -> str | None:
+    """
+    Snapshot the current jacoco.xml unless the newest snapshot was already
+    taken from it. Returns the new snapshot id.
+    """
+    report_path = find_jacoco_report()
+    if report_path is None:
+        return None
+    try:
+        index = coverage_index.load_index(report_path)
+        if coverage_snapshots.latest_key(SNAPSHOT_DIR) == list(index.key):
+            return None
+        return coverage_snapshots.save(index, SNAPSHOT_DIR, label)
+    except Exception:
+        # A missing or half-written report must not fail the test run
+        return None
+
+
+def project_root() -> str:
+    # The folder where server.py lives
+    return PROJECT_ROOT
@@ -0,0 +1,370 @@
+"""
+JaCoCo coverage tools: summaries, drill-down queries, uncovered lines
+and snapshots compared across runs.
+"""
+import json
+import os
+
+from lib import (
+    class_probes,
+    coverage_csv,
+    coverage_index,
+    coverage_snapshots,
+    coverage_store,
+    jacoco_exec,
+    java_index,
+    tool_cache,
+)
+from lib.tool_registry import tool
+from tools.common import (
+    SRC_DIR,
+    MAIN_JAVA_DIR,
+    JACOCO_EXEC_PATH,
+    CLASSES_DIR,
+    SOURCE_INDEX_FILE,
+    SNAPSHOT_DIR,
+    COVERAGE_STORE_FILE,
+    coverage_fingerprint,
+    sources_fingerprint,
+    find_jacoco_report,
+    find_fresh_jacoco_csv,
+    report_not_found,
+    snapshot_coverage_if_changed,
+)
+
+
+@tool
+@tool_cache.memoize(coverage_fingerprint)
+def summarize_coverage() -> str:
+    """
+    Read JaCoCo coverage report and summarize overall coverage.
+
+    Looks for:
+      codebase/target/site/jacoco/jacoco.csv
+      codebase/target/site/jacoco/jacoco.xml
+
+    The totals are the XML's report-level counters, read from the end of
+    the file. The flat CSV is only used when there is no XML: its LINE
+    total counts a line shared by two classes once per class, so it can be
+    a few lines higher than the XML's.
+    """
+    report_path = find_jacoco_report()
+    csv_path = find_fresh_jacoco_csv(report_path)
+    if report_path is None and csv_path is None:
+        return report_not_found()
+
+    try:
+        if report_path is not None:
+            source = report_path
+            totals = coverage_index.report_totals(report_path)
+            if totals is None:
+                totals = coverage_store.load(report_path, COVERAGE_STORE_FILE).totals
+        else:
+            source = f"{csv_path} (LINE counts shared lines once per class)"
+            totals = coverage_csv.load(csv_path).totals
+
+        lines = [f"JaCoCo coverage summary from: {source}"]
+
+        for ctype, (missed, covered) in totals.items():
+            total = covered + missed
+            pct = coverage_index.percent(missed, covered)
+            lines.append(f"- {ctype}: {pct}% ({covered}/{total} covered)")
+
+        return "\n".join(lines)
+
+    except Exception as e:
+        return f"Error reading JaCoCo report: {e}"
+
+
+@tool
+@tool_cache.memoize(coverage_fingerprint)
+def coverage_hotspots(level: str = "class", counter: str = "LINE", top: int = 10,
+                      package_prefix: str = "", order: str = "missed") -> str:
+    """
+    Top packages, classes or methods by missed coverage, as JSON.
+
+    level is "package", "class" or "method"; counter is one of INSTRUCTION,
+    BRANCH, LINE, COMPLEXITY, METHOD, CLASS. order="missed" ranks by the
+    number of missed items, order="percent" by the lowest coverage ratio.
+    package_prefix (e.g. "org.apache.commons.lang3.text") restricts the
+    results to that package and its subpackages, or to that class and its
+    nested classes; the result then also has the counter's subtotal over
+    those packages or classes.
+
+    Example: the 5 methods with the most missed branches in builder:
+      coverage_hotspots("method", "BRANCH", 5, "org.apache.commons.lang3.builder")
+    """
+    report_path = find_jacoco_report()
+    if report_path is None:
+        return report_not_found()
+
+    counter = counter.upper()
+    if counter not in coverage_index.COUNTER_TYPES:
+        return f"Unknown counter {counter!r}; use one of {', '.join(coverage_index.COUNTER_TYPES)}."
+    try:
+        store = coverage_store.load(report_path, COVERAGE_STORE_FILE)
+        results = coverage_store.top_nodes(store, level, counter, top, package_prefix, order)
+        out = {"level": level, "counter": counter, "order": order}
+        if package_prefix:
+            missed, covered = coverage_store.subtotal(store, counter, package_prefix)
+            out["subtotal"] = {"missed": missed, "covered": covered,
+                               "percent": coverage_index.percent(missed, covered)}
+        out["results"] = results
+        return json.dumps(out, indent=2)
+    except ValueError as e:
+        return str(e)
+    except Exception as e:
+        return f"Error reading JaCoCo report: {e}"
+
+
+@tool
+@tool_cache.memoize(lambda: (coverage_fingerprint(), sources_fingerprint()))
+def uncovered_lines(class_name: str, context: int = 1, max_ranges: int = 30) -> str:
+    """
+    Uncovered and partly covered line ranges of a class with the source
+    code, from the line data in jacoco.xml.
+
+    Lines are marked "!" when none of their code ran and "~" when only
+    part of it ran or branches were missed; `context` surrounding lines
+    are shown unmarked. For a nested class
+    ("org.apache.commons.lang3.builder.ToStringStyle$DefaultToStringStyle")
+    only its own lines are reported.
+    """
+    report_path = find_jacoco_report()
+    if report_path is None:
+        return report_not_found()
+
+    try:
+        cov = coverage_index.load_index(report_path)
+        dotted_name = coverage_index.dotted(class_name)
+        source = cov.class_sources.get(dotted_name)
+        if source is None or source not in cov.sourcefiles:
+            return f"No line coverage for {class_name} in {report_path}."
+
+        first, last = 0, None
+        found = java_index.load_index(SRC_DIR, SOURCE_INDEX_FILE).find_type(dotted_name)
+        if found is not None and "." in found[1]["qualified"]:
+            first, last = found[1]["start_line"], found[1]["end_line"]
+
+        ranges = coverage_index.line_ranges(cov.sourcefiles[source], first, last)
+        path = os.path.join(MAIN_JAVA_DIR, *source.split("/"))
+        src = java_index.source_lines(path) if os.path.exists(path) else []
+
+        line_data = cov.sourcefiles[source]
+        code_lines = {line_data[i] for i in range(0, len(line_data), coverage_index.LINE_FIELDS)}
+        # Only code lines are marked; comments and blanks inside a range are not
+        status_of = {}
+        for r in ranges:
+            for nr in range(r["first"], r["last"] + 1):
+                if nr in code_lines:
+                    status_of[nr] = "!" if r["status"] == "uncovered" else "~"
+
+        lines = [
+            f"{class_name} ({source}): "
+            f"{sum(1 for m in status_of.values() if m == '!')} uncovered and "
+            f"{sum(1 for m in status_of.values() if m == '~')} partly covered line(s) "
+            f"in {len(ranges)} range(s)."
+        ]
+        if not src:
+            lines.append(f"Source file not found: {path}")
+        if src and os.path.getmtime(path) > os.path.getmtime(report_path):
+            lines.append("Warning: the source changed after the JaCoCo report was written; lines may be off.")
+
+        # Ranges whose context windows touch are shown as one block
+        blocks = []
+        for r in ranges[:max_ranges]:
+            if blocks and r["first"] - context <= blocks[-1][-1]["last"] + context + 1:
+                blocks[-1].append(r)
+            else:
+                blocks.append([r])
+
+        for block in blocks:
+            details = []
+            for r in block:
+                detail = f"{r['first']}-{r['last']} {r['status']}: {r['missed_instructions']} missed instruction(s)"
+                if r["branches"]:
+                    detail += f", {r['missed_branches']}/{r['branches']} branches missed"
+                details.append(detail)
+            lines.append("")
+            lines.append(f"-- lines {'; '.join(details)} --")
+            for nr in range(max(block[0]["first"] - context, 1), min(block[-1]["last"] + context, len(src)) + 1):
+                lines.append(f"{status_of.get(nr, ' ')}{nr:5d} | {src[nr - 1]}")
+        if len(ranges) > max_ranges:
+            lines.append("")
+            lines.append(f"... {len(ranges) - max_ranges} more range(s); raise max_ranges to see them.")
+        return "\n".join(lines)
+    except Exception as e:
+        return f"Error reading line coverage: {e}"
+
+
+@tool
+def snapshot_coverage(label: str = "") -> str:
+    """
+    Save a compact snapshot of the current JaCoCo report for later
+    comparison with coverage_diff. Test runs take one automatically
+    whenever they produce a new report; use this to tag a state, e.g.
+    label="before RangeTest changes".
+    """
+    report_path = find_jacoco_report()
+    if report_path is None:
+        return report_not_found()
+    try:
+        index = coverage_index.load_index(report_path)
+        snapshot_id = coverage_snapshots.save(index, SNAPSHOT_DIR, label)
+        return f"Saved coverage snapshot {snapshot_id} from {report_path}."
+    except Exception as e:
+        return f"Error saving coverage snapshot: {e}"
+
+
+@tool
+def coverage_diff(base: str = "", target: str = "", counter: str = "LINE", limit: int = 20) -> str:
+    """
+    Compare two coverage snapshots per package, class and method, as JSON.
+
+    base and target are snapshot ids; target defaults to the newest
+    snapshot and base to the one before it. target="current" compares
+    against the current jacoco.xml (snapshotting it first if needed), and
+    base="list" lists the saved snapshots. counter is one of INSTRUCTION,
+    BRANCH, LINE, COMPLEXITY, METHOD, CLASS.
+    """
+    counter = counter.upper()
+    if counter not in coverage_index.COUNTER_TYPES:
+        return f"Unknown counter {counter!r}; use one of {', '.join(coverage_index.COUNTER_TYPES)}."
+    try:
+        if target == "current":
+            snapshot_coverage_if_changed("current")
+            target = ""
+
+        ids = coverage_snapshots.list_snapshots(SNAPSHOT_DIR)
+        if base == "list":
+            if not ids:
+                return "No coverage snapshots yet."
+            lines = []
+            for i in ids:
+                snap = coverage_snapshots.load(SNAPSHOT_DIR, i)
+                missed, covered = snap.totals.get(counter, (0, 0))
+                lines.append(f"- {i}: {coverage_index.percent(missed, covered)}% {counter}")
+            return "\n".join(lines)
+
+        target = target or (ids[0] if ids else "")
+        if not base:
+            older = ids[ids.index(target) + 1:] if target in ids else []
+            base = older[0] if older else ""
+        if not base or not target:
+            return "Need two coverage snapshots to compare; run the tests again or use snapshot_coverage."
+
+        result = coverage_snapshots.diff(
+            coverage_snapshots.load(SNAPSHOT_DIR, base),
+            coverage_snapshots.load(SNAPSHOT_DIR, target),
+            counter,
+            limit,
+        )
+        return json.dumps(result, indent=2)
+    except FileNotFoundError as e:
+        return f"Unknown coverage snapshot {e}. Use coverage_diff(base=\"list\") to see them."
+    except Exception as e:
+        return f"Error comparing coverage snapshots: {e}"
+
+
+def _count_class(packages: dict, probes: class_probes.ClassProbes, hits: list) -> None:
+    """
+    Add a class's probes, methods and lines to its package's counts; hits
+    are its probes from the execution data, all False for a class that
+    never ran.
+    """
+    package = probes.name.rpartition("/")[0]
+    counts = packages.setdefault(coverage_index.dotted(package), {
+        "PROBE": [0, 0], "METHOD": [0, 0], "lines": {},
+    })
+    counts["PROBE"][0] += sum(1 for h in hits if h)
+    counts["PROBE"][1] += probes.probe_count
+    with_code = [m for m in probes.methods if m.probe_count]
+    counts["METHOD"][0] += len([m for m in probes.covered_methods(hits) if m.probe_count])
+    counts["METHOD"][1] += len(with_code)
+    # Nested and anonymous classes share lines with their outer class, so
+    # lines are counted once per source file, as JaCoCo's report does
+    all_lines, covered = counts["lines"].setdefault(probes.source_file or probes.name, (set(), set()))
+    for m in with_code:
+        all_lines.update(m.lines)
+    covered.update(probes.covered_lines(hits))
+
+
+def _exec_counters(counts: dict) -> dict:
+    # counter -> (covered, total)
+    lines = counts["lines"].values()
+    return {
+        "PROBE": tuple(counts["PROBE"]),
+        "LINE": (sum(len(c & a) for a, c in lines), sum(len(a) for a, _c in lines)),
+        "METHOD": tuple(counts["METHOD"]),
+    }
+
+
+@tool
+@tool_cache.memoize(lambda: (tool_cache.file_fingerprint(JACOCO_EXEC_PATH), tool_cache.tree_fingerprint(CLASSES_DIR)))
+def summarize_exec_coverage() -> str:
+    """
+    Summarize coverage straight from codebase/target/jacoco.exec.
+
+    The binary execution data is matched to codebase/target/classes by
+    JaCoCo class id, so this works right after the tests finish, without
+    `jacoco:report`. Probes (branch/exit points) are mapped to methods and
+    source lines through the class files, giving probe, line and method
+    coverage per package. Classes that never ran count as missed.
+    """
+    if not os.path.exists(JACOCO_EXEC_PATH):
+        return (
+            f"JaCoCo execution data not found: {JACOCO_EXEC_PATH}\n"
+            "Run `run_maven_tests` first."
+        )
+
+    try:
+        sessions, classes = jacoco_exec.read_exec(JACOCO_EXEC_PATH)
+        current, stale, unexecuted = jacoco_exec.match_class_files(classes, CLASSES_DIR)
+
+        packages = {}
+        for data in current:
+            _count_class(packages, class_probes.class_file_probes(_class_file(data.name)), data.probes)
+        never_ran = []
+        for name in unexecuted:
+            probes = class_probes.class_file_probes(_class_file(name))
+            if probes.probe_count:
+                # Interfaces without code have no probes and are left out
+                never_ran.append(name)
+                _count_class(packages, probes, [False] * probes.probe_count)
+
+        per_package = {pkg: _exec_counters(counts) for pkg, counts in packages.items()}
+        lines = [f"JaCoCo execution data summary from: {JACOCO_EXEC_PATH}"]
+        lines.append(f"Sessions: {', '.join(s.id for s in sessions) or 'none'}")
+        for ctype in ("PROBE", "LINE", "METHOD"):
+            covered = sum(c[ctype][0] for c in per_package.values())
+            total = sum(c[ctype][1] for c in per_package.values())
+            lines.append(f"- {ctype}: {coverage_index.percent(total - covered, covered)}% ({covered}/{total} covered)")
+        lines.append(f"{len(current)} executed class(es), {len(never_ran)} with code that never ran.")
+        lines.append("")
+        lines.append("Per package:")
+        for pkg in sorted(per_package):
+            parts = []
+            for ctype, unit in (("PROBE", "probes"), ("LINE", "lines"), ("METHOD", "methods")):
+                c, t = per_package[pkg][ctype]
+                parts.append(f"{coverage_index.percent(t - c, c)}% of {t} {unit}")
+            lines.append(f"- {pkg}: {', '.join(parts)}")
+
+        if never_ran:
+            lines.append("")
+            lines.append(f"Classes with no execution data, counted as missed ({len(never_ran)}):")
+            lines.extend(f"  - {coverage_index.dotted(n)}" for n in never_ran)
+        if stale:
+            lines.append("")
+            lines.append(
+                f"Warning: {len(stale)} class(es) were recompiled after this data was "
+                "recorded and are left out; rerun the tests to refresh it."
+            )
+
+        return "\n".join(lines)
+
+    except Exception as e:
+        return f"Error reading JaCoCo execution data: {e}"
+
+
+def _class_file(vm_name: str) -> str:
+    return os.path.join(CLASSES_DIR, *vm_name.split("/")) + ".class"
@@ -0,0 +1,312 @@
+"""
+Test generation helpers: JUnit skeletons guided by the source index and
+coverage, class outlines and boundary-test checklists.
+"""
+import os
+import re
+
+from lib import coverage_index, java_index, tool_cache
+from lib.tool_registry import tool
+from tools.common import (
+    SRC_DIR,
+    SOURCE_INDEX_FILE,
+    coverage_fingerprint,
+    sources_fingerprint,
+    find_jacoco_report,
+)
+
+
+def _test_method_name(method: dict, overloaded: bool) -> str:
+    # Overloads get their parameter types appended: test_abbreviate_String_int
+    base = "constructor" if method["kind"] == "constructor" else method["name"]
+    if not overloaded:
+        return f"test_{base}"
+    parts = []
+    for p in method["params"]:
+        t = re.sub(r"<.*>", "", p["type"]).split(".")[-1]
+        parts.append(t.replace("[]", "Array").replace("...", "Varargs"))
+    return "_".join([f"test_{base}"] + (parts or ["noArgs"]))
+
+
+def _method_coverage(cov: coverage_index.CoverageIndex, binary: str, methods: list) -> dict:
+    """
+    Map id(source method) -> JaCoCo method node. JaCoCo records a method by
+    name, descriptor and first line, so overloads are told apart by which
+    source line range contains that line, then by parameter types. Methods
+    that still match several nodes (or none) are left out of the map.
+    """
+    cls = cov.classes.get(binary)
+    if cls is None:
+        return {}
+    nodes = [(sig.split("(", 1)[0], _descriptor_params(sig), node) for sig, node in cls.children.items()]
+    matched = {}
+    for m in methods:
+        jname = "<init>" if m["kind"] == "constructor" else m["name"]
+        for name, _params, node in nodes:
+            if name == jname and node.line is not None and m["start_line"] <= node.line <= m["end_line"]:
+                matched[id(m)] = node
+                break
+
+    # Constructors start with the inlined field initializers, so their first
+    # line can lie outside the constructor; fall back to the parameter types
+    used = {id(n) for n in matched.values()}
+    for m in methods:
+        if id(m) in matched:
+            continue
+        jname = "<init>" if m["kind"] == "constructor" else m["name"]
+        candidates = []
+        # Inner class and enum constructors take the outer instance, or the
+        # constant's name and ordinal, ahead of the declared parameters
+        for leading in (False, m["kind"] == "constructor"):
+            candidates = candidates or [
+                node for name, params, node in nodes
+                if name == jname and id(node) not in used and _params_match(m, params, leading)
+            ]
+        if len(candidates) == 1:
+            matched[id(m)] = candidates[0]
+            used.add(id(candidates[0]))
+    return matched
+
+
+_PRIMITIVES = {"B": "byte", "C": "char", "D": "double", "F": "float",
+               "I": "int", "J": "long", "S": "short", "Z": "boolean"}
+
+
+def _descriptor_params(sig: str) -> list[str]:
+    # Parameters of "name(ILjava/util/Map$Entry;[J)V" as simple source
+    # names: ["int", "Entry", "long[]"]
+    params = sig[sig.index("(") + 1:sig.index(")")]
+    return [
+        (re.split(r"[/$]", ref)[-1] if ref else _PRIMITIVES[prim]) + "[]" * len(dims)
+        for dims, ref, prim in re.findall(r"(\[*)(?:L([^;]*);|([BCDFIJSZ]))", params)
+    ]
+
+
+def _params_match(method: dict, descriptor: list[str], leading: bool = False) -> bool:
+    """
+    Whether the source method's parameter types erase to descriptor. Type
+    variables (declared on the method, or named like T, K or E1) stand for
+    any reference type. leading=True lets the descriptor have extra
+    parameters ahead of the declared ones.
+    """
+    source = method["params"]
+    if leading and len(descriptor) > len(source):
+        descriptor = descriptor[len(descriptor) - len(source):]
+    if len(descriptor) != len(source):
+        return False
+    type_vars = set(re.findall(r"[<,]\s*(\w+)", method["type_params"]))
+    for p, erased in zip(source, descriptor):
+        t = re.sub(r"<.*>", "", p["type"]).replace("...", "[]").replace(" ", "")
+        base, dims = t.partition("[")[0].split(".")[-1], t.count("[")
+        if base in type_vars or re.fullmatch(r"[A-Z][0-9]?", base):
+            if erased.count("[") != dims or erased.rstrip("[]") in _PRIMITIVES.values():
+                return False
+        elif base + "[]" * dims != erased:
+            return False
+    return True
+
+
+@tool
+@tool_cache.memoize(lambda: (sources_fingerprint(), coverage_fingerprint()))
+def suggest_junit_tests_for_class(class_name: str, only_uncovered: bool = True) -> str:
+    """
+    Suggest JUnit 4 test method skeletons for a given fully-qualified class name.
+
+    Example input:
+      "org.apache.commons.lang3.Range"
+      "org.apache.commons.lang3.builder.ToStringStyle$DefaultToStringStyle"
+
+    Public methods and constructors (every overload) are looked up in the
+    source index. When a JaCoCo report exists and only_uncovered is True,
+    skeletons are emitted only for methods with missed lines or branches,
+    most missed instructions first. This does NOT modify files; it just
+    returns suggested test methods as text.
+    """
+    try:
+        index = java_index.load_index(SRC_DIR, SOURCE_INDEX_FILE)
+    except Exception as e:
+        return f"Error indexing Java sources: {e}"
+
+    found = index.find_type(class_name)
+    if found is None:
+        return (
+            f"Could not find source file for {class_name}.\n"
+            f"No type with that name is declared under: {SRC_DIR}"
+        )
+    rel, jtype = found
+    simple = jtype["name"]
+
+    methods = [m for m in jtype["methods"] if m["visibility"] == "public"]
+    if not methods:
+        return f"No public methods found in {class_name}."
+
+    counts = {}
+    for m in methods:
+        counts[(m["kind"], m["name"])] = counts.get((m["kind"], m["name"]), 0) + 1
+
+    notes = []
+    coverage = {}
+    report_path = find_jacoco_report()
+    if report_path is None:
+        notes.append("No JaCoCo report found; listing every public method.")
+    else:
+        try:
+            cov = coverage_index.load_index(report_path)
+            coverage = _method_coverage(cov, java_index.binary_name(index.package_of(rel), jtype), methods)
+        except Exception as e:
+            notes.append(f"Could not read JaCoCo report ({e}); listing every public method.")
+        if os.path.getmtime(os.path.join(SRC_DIR, *rel.split("/"))) > os.path.getmtime(report_path):
+            notes.append("Warning: the source changed after the JaCoCo report was written.")
+
+    if coverage and only_uncovered:
+        total = len(methods)
+        # A method the report could not be matched with is kept, not dropped
+        methods = [
+            m for m in methods
+            if id(m) not in coverage or coverage[id(m)].missed("LINE") or coverage[id(m)].missed("BRANCH")
+        ]
+        methods.sort(key=lambda m: coverage[id(m)].missed("INSTRUCTION") if id(m) in coverage else -1,
+                     reverse=True)
+        unmatched = sum(1 for m in methods if id(m) not in coverage)
+        notes.append(
+            f"{len(methods) - unmatched} of {total} public methods have missed lines or branches "
+            "(most missed instructions first)."
+        )
+        if unmatched:
+            notes.append(f"{unmatched} method(s) could not be matched to the JaCoCo report; listed last.")
+        if not methods:
+            return f"All public methods of {class_name} are fully covered.\n" + "\n".join(notes)
+
+    import_name = class_name.replace("$", ".")
+    lines = []
+    lines.append(f"Suggested JUnit 4 test skeletons for {class_name}:")
+    lines.extend(notes)
+    lines.append("")
+    lines.append("```java")
+    lines.append("import org.junit.Test;")
+    lines.append("import static org.junit.Assert.*;")
+    lines.append(f"import {import_name};")
+    lines.append("")
+    lines.append(f"public class {simple}GeneratedTest " + "{")
+    lines.append("")
+
+    filename = rel.rsplit("/", 1)[-1]
+    for m in methods:
+        args = ", ".join(f"{p['type']} {p['name']}" for p in m["params"])
+        lines.append(f"    // {m['signature']}  ({filename}:{m['start_line']})")
+        node = coverage.get(id(m))
+        if node is not None:
+            lines.append(
+                f"    // missed: {node.missed('INSTRUCTION')} instructions, "
+                f"{node.missed('LINE')}/{node.missed('LINE') + node.covered('LINE')} lines, "
+                f"{node.missed('BRANCH')}/{node.missed('BRANCH') + node.covered('BRANCH')} branches"
+            )
+        lines.append("    @Test")
+        lines.append(f"    public void {_test_method_name(m, counts[(m['kind'], m['name'])] > 1)}() " + "{")
+        lines.append("        // TODO: arrange inputs")
+        if m["kind"] == "constructor":
+            lines.append(f"        // {simple} obj = new {simple}(/* {args} */);")
+            lines.append("        // assertNotNull(obj);")
+        else:
+            if "static" in m["modifiers"]:
+                target = simple
+            else:
+                lines.append(f"        // {simple} obj = new {simple}();")
+                target = "obj"
+            call = f"{target}.{m['name']}(/* {args} */);"
+            if m["return_type"] == "void":
+                lines.append(f"        // {call}")
+            else:
+                lines.append(f"        // {m['return_type']} result = {call}")
+                lines.append("        // assertNotNull(result);")
+        lines.append("    }")
+        lines.append("")
+
+    lines.append("}")
+    lines.append("```")
+
+    return "\n".join(lines)
+
+
+@tool
+@tool_cache.memoize(sources_fingerprint)
+def describe_java_class(class_name: str) -> str:
+    """
+    Outline of a Java type from the source index: kind, line range, and
+    every method and constructor with visibility, signature and line range.
+    Nested types are included with their qualified names.
+
+    Example input:
+      "org.apache.commons.lang3.Range"
+    """
+    try:
+        index = java_index.load_index(SRC_DIR, SOURCE_INDEX_FILE)
+    except Exception as e:
+        return f"Error indexing Java sources: {e}"
+
+    found = index.find_type(class_name)
+    if found is None:
+        return f"No type named {class_name} is declared under {SRC_DIR}."
+    rel, jtype = found
+
+    prefix = jtype["qualified"] + "."
+    nested = [t for r, _pkg, t in index.types() if r == rel and t["qualified"].startswith(prefix)]
+    lines = [f"{class_name} ({rel})"]
+    for t in [jtype] + nested:
+        lines.append("")
+        lines.append(f"{t['visibility']} {t['kind']} {t['qualified']}  lines {t['start_line']}-{t['end_line']}")
+        for m in t["methods"]:
+            lines.append(f"  {m['start_line']}-{m['end_line']}  {m['signature']}")
+    return "\n".join(lines)
+
+
+@tool
+def suggest_boundary_tests(description: str) -> str:
+    """
+    Suggest boundary and edge-case tests for a method or behavior.
+
+    Example input:
+      "Range.between(low, high) with integers"
+      "StringUtils.substring(str, start, end)"
+    """
+    ideas = []
+    ideas.append(f"Boundary test ideas for: {description}")
+    ideas.append("")
+    ideas.append("1. Typical in-range values")
+    ideas.append("   - Use normal, expected inputs to confirm the main behavior.")
+    ideas.append("")
+    ideas.append("2. Lower boundary")
+    ideas.append("   - Inputs exactly at the minimum allowed (e.g., min, 0, empty string).")
+    ideas.append("   - Check that the method still behaves correctly and does not throw.")
+    ideas.append("")
+    ideas.append("3. Just below lower boundary")
+    ideas.append("   - Inputs slightly below the allowed minimum (e.g., min-1, -1).")
+    ideas.append("   - Expect an exception or clear error behavior if the API specifies it.")
+    ideas.append("")
+    ideas.append("4. Upper boundary")
+    ideas.append("   - Inputs exactly at the maximum allowed (e.g., max, length-1).")
+    ideas.append("   - Ensure no off-by-one errors.")
+    ideas.append("")
+    ideas.append("5. Just above upper boundary")
+    ideas.append("   - Inputs slightly above the maximum allowed (e.g., max+1, length).")
+    ideas.append("   - Expect failure or a well-defined response.")
+    ideas.append("")
+    ideas.append("6. Null / empty / default values")
+    ideas.append("   - Null arguments, empty collections, empty strings, zero-length ranges.")
+    ideas.append("   - Check whether the method allows them or throws.")
+    ideas.append("")
+    ideas.append("7. Degenerate / special cases")
+    ideas.append("   - low == high, start == end, negative ranges, NaN, infinities.")
+    ideas.append("   - For comparisons, equal values and reversed bounds.")
+    ideas.append("")
+    ideas.append("8. Large inputs")
+    ideas.append("   - Very large numbers, long strings, big collections.")
+    ideas.append("   - Look for overflow, performance, or memory issues.")
+    ideas.append("")
+    ideas.append("9. Invalid combinations")
+    ideas.append("   - Start > end, low > high, incompatible flags.")
+    ideas.append("   - Ensure clear error handling or documented behavior.")
+    ideas.append("")
+    ideas.append("Use these categories to design concrete JUnit tests for this API.")
+
+    return "\n".join(ideas)
@@ -0,0 +1,202 @@
+"""
+Git tools operating on the project root.
+
+git runs without a terminal or stdin and with GIT_TERMINAL_PROMPT=0, so a
+push that needs credentials fails instead of waiting for them, and under
+per-tool limits (see process_tree).
+"""
+import json
+import os
+import re
+import shlex
+
+from lib import git_porcelain, process_tree
+from lib.tool_registry import tool
+from tools.common import (
+    project_root,
+)
+
+
+# Longest output kept per step of git_batch
+STEP_OUTPUT_CHARS = 2000
+
+
+def _git(args: list[str], tool: str) -> process_tree.CompletedRun:
+    return process_tree.run(
+        ["git", "-C", project_root()] + args,
+        process_tree.limits_for(tool),
+        env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+    )
+
+
+def _output(result: process_tree.CompletedRun, default: str = "") -> str:
+    if result.usage.exceeded:
+        return (result.stdout + result.stderr).strip() + "\n" + result.usage.summary()
+    return result.stdout or result.stderr or default
+
+
+@tool
+def git_status(porcelain: bool = False) -> str:
+    """
+    Run 'git status' in the project root and return the output.
+
+    porcelain=True returns the branch (head, upstream, ahead/behind) and
+    the staged, unstaged, unmerged and untracked files as JSON instead,
+    parsed from 'git status --porcelain=v2'.
+    """
+    try:
+        if porcelain:
+            result = _git(git_porcelain.STATUS_ARGS, "git_status")
+            if result.returncode != 0 or result.usage.exceeded:
+                return f"Error running git status: {_output(result).strip()}"
+            return json.dumps(git_porcelain.parse_status(result.stdout), indent=2)
+        return _output(_git(["status"], "git_status"))
+    except Exception as e:
+        return f"Error running git status: {e}"
+
+
+@tool
+def git_add_all() -> str:
+    """
+    Run 'git add -A' in the project root.
+    """
+    try:
+        return _output(_git(["add", "-A"], "git_add_all"), "git add -A completed.")
+    except Exception as e:
+        return f"Error running git add -A: {e}"
+
+
+@tool
+def git_commit(message: str) -> str:
+    """
+    Run 'git commit -m <message>' in the project root.
+    """
+    try:
+        return _output(_git(["commit", "-m", message], "git_commit"))
+    except Exception as e:
+        return f"Error running git commit: {e}"
+
+
+@tool
+def git_push(remote: str = "origin", branch: str = "main") -> str:
+    """
+    Run 'git push <remote> <branch>' in the project root.
+
+    This will fail gracefully if no remote is configured, and fails rather
+    than prompting when the remote asks for credentials.
+    """
+    try:
+        return _output(_git(["push", remote, branch], "git_push"))
+    except Exception as e:
+        return f"Error running git push: {e}"
+
+
+def _batch_command(step: dict) -> list[str]:
+    """
+    git arguments for one git_batch step. Raises ValueError for unknown
+    operations or bad arguments.
+    """
+    op = step.get("op")
+    if op == "status":
+        return list(git_porcelain.STATUS_ARGS)
+    if op == "add":
+        paths = step.get("paths") or []
+        if isinstance(paths, str):
+            paths = [paths]
+        return ["add", "-A", "--"] + [str(p) for p in paths]
+    if op == "commit":
+        message = step.get("message")
+        if not message:
+            raise ValueError("commit needs a message")
+        args = ["commit", "-m", str(message)]
+        if step.get("allow_empty"):
+            args.append("--allow-empty")
+        return args
+    if op == "push":
+        remote = str(step.get("remote") or "origin")
+        branch = str(step.get("branch") or "HEAD")
+        if remote.startswith("-") or branch.startswith("-"):
+            raise ValueError("remote and branch must not start with '-'")
+        return ["push", remote, branch]
+    raise ValueError(f"unknown operation {op!r} (expected add, commit, push or status)")
+
+
+@tool
+def git_batch(operations: str, stop_on_error: bool = True) -> str:
+    """
+    Run several git operations in the project root in one call, e.g. to
+    stage, commit and push new tests, and return JSON with a result per
+    step plus the final status.
+
+    operations is a JSON list of steps, run in order:
+      {"op": "add", "paths": ["codebase/src/test"]}  no paths: stage everything
+      {"op": "commit", "message": "Add tests", "allow_empty": false}
+      {"op": "push", "remote": "origin", "branch": ""}  no branch: current one
+      {"op": "status"}
+    A plain string such as "add" or "push" is a step with default arguments.
+
+    Each step reports its command, ok, return code and output (commit also
+    the new commit id, a step killed by its limits also `stopped`). After
+    a failing step the remaining steps are skipped unless
+    stop_on_error=False. The final status is parsed from
+    'git status --porcelain=v2' as in git_status(porcelain=True).
+
+    Every step still starts its own git process, as git has no way to run
+    several commands in one; the batch saves tool calls, not processes.
+    """
+    try:
+        steps = json.loads(operations)
+    except ValueError as e:
+        return f"Error: operations is not valid JSON: {e}"
+    if isinstance(steps, (dict, str)):
+        steps = [steps]
+    if not isinstance(steps, list) or not steps:
+        return "Error: operations must be a non-empty JSON list of steps."
+    steps = [{"op": s} if isinstance(s, str) else s for s in steps]
+
+    results = []
+    status = None
+    failed = False
+    try:
+        for step in steps:
+            if not isinstance(step, dict):
+                return f"Error: each step must be an object or a string, got {step!r}"
+            op = step.get("op")
+            if failed and stop_on_error:
+                results.append({"op": op, "skipped": True})
+                continue
+            try:
+                args = _batch_command(step)
+            except ValueError as e:
+                results.append({"op": op, "ok": False, "error": str(e)})
+                failed = True
+                continue
+
+            result = _git(args, "git_batch")
+            ok = result.returncode == 0 and not result.usage.exceeded
+            entry = {"op": op, "command": shlex.join(["git"] + args), "ok": ok,
+                     "returncode": result.returncode}
+            if result.usage.exceeded:
+                entry["stopped"] = result.usage.summary()
+            status = None
+            if op == "status" and ok:
+                status = git_porcelain.parse_status(result.stdout)
+                entry["status"] = status
+            else:
+                output = (result.stdout + result.stderr).strip()
+                entry["output"] = output[-STEP_OUTPUT_CHARS:]
+                if op == "commit" and ok:
+                    m = re.search(r"^\[.+? ([0-9a-f]{7,})\]", result.stdout, re.M)
+                    if m:
+                        entry["commit"] = m.group(1)
+            results.append(entry)
+            failed = failed or not ok
+
+        # The status at the end, unless the last step that ran was a status
+        if status is None:
+            result = _git(git_porcelain.STATUS_ARGS, "git_batch")
+            status = git_porcelain.parse_status(result.stdout) if result.returncode == 0 else None
+    except Exception as e:
+        return f"Error running git batch: {e}"
+
+    return json.dumps({"ok": not failed, "steps": results, "status": status}, indent=2)
@@ -0,0 +1,1079 @@
+"""
+Maven test runs: blocking and background builds, incremental and
+compile-only test selection, flaky-test detection, build logs and
+surefire reports.
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable
+
+from lib import (
+    build_logs,
+    fast_build,
+    flaky_tests,
+    jacoco_exec,
+    maven_jobs,
+    process_tree,
+    surefire_reports,
+    surefire_stream,
+    test_impact,
+    tool_cache,
+)
+from lib.tool_registry import tool
+from tools.common import (
+    CODEBASE_DIR,
+    SRC_DIR,
+    MAIN_JAVA_DIR,
+    TEST_JAVA_DIR,
+    JACOCO_EXEC_PATH,
+    CLASSES_DIR,
+    TEST_CLASSES_DIR,
+    SUREFIRE_REPORTS_DIR,
+    CACHE_DIR,
+    SOURCE_HASHES_FILE,
+    RUN_TIMINGS_FILE,
+    BUILD_LOG_DIR,
+    snapshot_coverage_if_changed,
+)
+
+
+def _hash_sources() -> dict:
+    """
+    Return {path relative to codebase/src: sha1 of contents} for every file under src.
+    """
+    hashes = {}
+    for dirpath, _dirnames, filenames in os.walk(SRC_DIR):
+        for fname in filenames:
+            path = os.path.join(dirpath, fname)
+            with open(path, "rb") as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+            hashes[os.path.relpath(path, SRC_DIR).replace(os.sep, "/")] = digest
+    return hashes
+
+
+def _load_source_hashes() -> dict | None:
+    if not os.path.exists(SOURCE_HASHES_FILE):
+        return None
+    try:
+        with open(SOURCE_HASHES_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_source_hashes(hashes: dict) -> None:
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(SOURCE_HASHES_FILE, "w", encoding="utf-8") as f:
+        json.dump(hashes, f)
+
+
+def _changed_sources(previous: dict, current: dict) -> list[str]:
+    # Added, modified and deleted files all count as changes
+    changed = {p for p, h in current.items() if previous.get(p) != h}
+    changed.update(p for p in previous if p not in current)
+    return sorted(changed)
+
+
+def _java_class_name(rel_path: str, root: str) -> str | None:
+    """
+    Map 'main/java/org/x/Foo.java' to 'org.x.Foo' when it lives under root
+    ('main/java' or 'test/java'), otherwise None.
+    """
+    prefix = root + "/"
+    if not rel_path.startswith(prefix) or not rel_path.endswith(".java"):
+        return None
+    return rel_path[len(prefix):-len(".java")].replace("/", ".")
+
+
+def _load_test_impact() -> dict | None:
+    return test_impact.load_index(JACOCO_EXEC_PATH, CLASSES_DIR, TEST_CLASSES_DIR, MAIN_JAVA_DIR, CACHE_DIR)
+
+
+def _select_affected_tests(changed: list[str]) -> list[str]:
+    """
+    Pick the test classes affected by a set of changed files under codebase/src.
+
+    A test class is selected when its own file changed, or when it executes
+    a changed method of a main class according to the test impact index
+    (recorded with run_maven_tests(per_test_coverage=True)). Main classes
+    the index does not know fall back to the test classes whose source
+    refers to their simple name.
+    """
+    selected = set()
+    changed_simple_names = set()
+    index = _load_test_impact()
+
+    for rel in changed:
+        test_cls = _java_class_name(rel, "test/java")
+        if test_cls and test_cls.endswith("Test"):
+            selected.add(test_cls)
+        main_cls = _java_class_name(rel, "main/java")
+        if main_cls:
+            source = rel[len("main/java/"):]
+            tests = None
+            if index is not None:
+                lines = test_impact.changed_lines(CACHE_DIR, source, os.path.join(SRC_DIR, rel))
+                tests = test_impact.tests_for(index, source, lines)
+            if tests is None:
+                changed_simple_names.add(main_cls.split(".")[-1])
+            else:
+                selected.update(tests)
+
+    if changed_simple_names:
+        name_pattern = re.compile(
+            r"\b(" + "|".join(re.escape(n) for n in sorted(changed_simple_names)) + r")\b"
+        )
+        for dirpath, _dirnames, filenames in os.walk(TEST_JAVA_DIR):
+            for fname in filenames:
+                if not fname.endswith("Test.java"):
+                    continue
+                path = os.path.join(dirpath, fname)
+                with open(path, "r", encoding="ISO-8859-1") as f:
+                    if name_pattern.search(f.read()):
+                        rel = os.path.relpath(path, TEST_JAVA_DIR)
+                        selected.add(rel[:-len(".java")].replace(os.sep, "."))
+
+    return sorted(selected)
+
+
+def _load_run_timings() -> dict:
+    try:
+        with open(RUN_TIMINGS_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _record_run_timing(forks: int, seconds: float) -> None:
+    timings = _load_run_timings()
+    timings[str(forks)] = seconds
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(RUN_TIMINGS_FILE, "w", encoding="utf-8") as f:
+        json.dump(timings, f)
+
+
+def _parallel_args(forks: int) -> list[str]:
+    """
+    Surefire options for running test classes in `forks` JVMs at once.
+
+    Every fork gets the JaCoCo agent through ${argLine}; the agent appends
+    its own session to target/jacoco.exec under a file lock, so the forks'
+    execution data ends up merged in the one file jacoco:report reads.
+    """
+    return [
+        f"-DforkCount={forks}",
+        "-DreuseForks=true",
+        # forkCount needs surefire 2.14+; commons-parent 28 pins an older one
+        "-Dcommons.surefire.version=2.22.2",
+    ]
+
+
+# Surefire needed by the -Dtest method filters and exclusions (2.19+)
+SUREFIRE_FILTER_VERSION = "2.22.2"
+# ... and by -Dsurefire.runOrder.random.seed (3.0.0-M6+)
+SUREFIRE_SEED_VERSION = "3.0.0"
+
+FLAKY_POLICIES = ("report", "retry", "quarantine")
+# Reruns of known-flaky failures with flaky="retry"
+FLAKY_RETRIES = 2
+
+
+def _fresh_test_results(since: float) -> list:
+    """
+    Surefire results from the report files written at or after `since`
+    (a time.time() value), i.e. by the run that started then.
+    """
+    if not os.path.isdir(SUREFIRE_REPORTS_DIR):
+        return []
+    results = []
+    for f in sorted(os.listdir(SUREFIRE_REPORTS_DIR)):
+        path = os.path.join(SUREFIRE_REPORTS_DIR, f)
+        # One second of slack for file systems with coarse timestamps
+        if f.startswith("TEST-") and f.endswith(".xml") and os.path.getmtime(path) >= since - 1:
+            results.extend(surefire_reports.parse_report(path))
+    return results
+
+
+def _failed_keys(results: list) -> set[str]:
+    return {
+        f"{r.class_name}#{r.method}" for r in results
+        if r.status in (surefire_reports.FAILED, surefire_reports.ERROR)
+    }
+
+
+def _mvn_cmd() -> str:
+    return "mvn.cmd" if os.name == "nt" else "mvn"
+
+
+def _mvnd_cmd() -> str:
+    return "mvnd.cmd" if os.name == "nt" else "mvnd"
+
+
+# Output fragments mvnd prints when a client loses its daemon mid-build
+MVND_DAEMON_FAILURES = (
+    "DaemonException",
+    "Could not connect to daemon",
+    "daemon disappeared",
+    "Daemon was stopped",
+)
+
+
+def _run_mvnd(option: str) -> process_tree.CompletedRun:
+    result = process_tree.run([_mvnd_cmd(), option], process_tree.limits_for("mvnd"), cwd=CODEBASE_DIR)
+    if result.usage.exceeded:
+        raise RuntimeError(f"mvnd {option}: {result.usage.summary()}")
+    return result
+
+
+def _mvnd_daemons() -> list[dict]:
+    """
+    Parse 'mvnd --status' into [{"id", "pid", "status"}, ...].
+    """
+    result = _run_mvnd("--status")
+    daemons = []
+    for line in result.stdout.splitlines():
+        parts = line.split()
+        # Header line starts with "ID"; daemon lines are "<id> <pid> <address> <status> ..."
+        if len(parts) >= 4 and parts[0] != "ID" and parts[1].isdigit():
+            daemons.append({"id": parts[0], "pid": int(parts[1]), "status": parts[3]})
+    return daemons
+
+
+def _stop_mvnd() -> str:
+    result = _run_mvnd("--stop")
+    return result.stdout or result.stderr
+
+
+def _ensure_mvnd_healthy() -> str:
+    """
+    Health check before a daemon build: stop every daemon if any of them is
+    broken or stuck shutting down, so the next build starts a fresh one.
+    Returns a note for the tool output ("" when nothing had to be done).
+    """
+    daemons = _mvnd_daemons()
+    bad = [d for d in daemons if d["status"] in ("Broken", "Canceled", "StopRequested")]
+    if not bad:
+        return ""
+    _stop_mvnd()
+    return f"Restarted Maven daemon(s): {', '.join(d['id'] + ' was ' + d['status'] for d in bad)}\n"
+
+
+class MavenBusyError(Exception):
+    pass
+
+
+# Held by every build that uses codebase/target, blocking or background
+_build_lock = threading.Lock()
+
+
+@contextmanager
+def _exclusive_build():
+    """
+    Hold the build lock for a blocking build, or raise MavenBusyError when
+    a background job or another call has it; waiting could take as long
+    as that build does.
+    """
+    if not _build_lock.acquire(blocking=False):
+        running = [j.id for j in maven_job_queue.jobs.values() if j.status == maven_jobs.RUNNING]
+        holder = f"Background job {running[0]}" if running else "Another Maven build"
+        raise MavenBusyError(
+            f"{holder} is using codebase/target; wait for it to finish or cancel it "
+            "(maven_job_status, cancel_maven_job) and try again."
+        )
+    try:
+        yield
+    finally:
+        _build_lock.release()
+
+
+def _maven_executable(backend: str) -> str:
+    if backend == "mvn":
+        return _mvn_cmd()
+    if backend == "mvnd":
+        return _mvnd_cmd()
+    raise ValueError(f"Unknown Maven backend {backend!r}; use 'mvn' or 'mvnd'.")
+
+
+def _stream_to_log(cmd: list[str], log: build_logs.BuildLog, limits: process_tree.Limits,
+                   watcher: surefire_stream.FailFastWatcher | None = None) -> tuple[int, process_tree.Watchdog]:
+    """
+    Run cmd in the codebase with stdout and stderr merged into log, line by
+    line as they arrive, under limits. Returns the exit code and the
+    Watchdog with the resources used; the usage is also logged.
+
+    Each line is also fed to watcher, if given; once it has seen enough,
+    the process and everything it forked are stopped.
+    """
+    with subprocess.Popen(
+        cmd,
+        cwd=CODEBASE_DIR,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        errors="replace",
+        **process_tree.popen_kwargs(),
+    ) as proc:
+        with process_tree.Watchdog(proc, limits) as usage:
+            for line in proc.stdout:
+                line = line.rstrip("\r\n")
+                log.add(line)
+                if watcher is not None and watcher.feed(line):
+                    log.add("---- fail-fast: stopping Maven ----")
+                    process_tree.kill_tree(proc)
+                    break
+            returncode = proc.wait()
+    if watcher is not None:
+        watcher.close()
+    log.add(f"---- {usage.summary()} ----")
+    return returncode, usage
+
+
+def _run_maven(args: list[str], backend: str, limits: process_tree.Limits,
+               watcher: surefire_stream.FailFastWatcher | None = None
+               ) -> tuple[int, build_logs.BuildLog, str, process_tree.Watchdog]:
+    """
+    Run Maven with the given arguments on the chosen backend.
+
+    backend="mvn" forks a fresh Maven JVM; backend="mvnd" goes through the
+    Maven daemon so repeated calls reuse a warm JVM, plugin classloaders and
+    the parsed POM model. A daemon that dies mid-build is restarted and the
+    build retried once.
+
+    The build runs under limits (see process_tree); a build that exceeds
+    one is killed with everything it forked, and the note says so.
+
+    Output goes to a new build log rather than memory. Returns
+    (exit code, log, note, resource usage). A watcher is passed on to
+    _stream_to_log.
+    """
+    cmd = [_maven_executable(backend)] + args
+    log = build_logs.open_log(BUILD_LOG_DIR, "maven")
+    try:
+        note = _ensure_mvnd_healthy() if backend == "mvnd" else ""
+        returncode, usage = _stream_to_log(cmd, log, limits, watcher)
+        stopped = usage.exceeded or (watcher is not None and watcher.done)
+        daemon_failed = (
+            backend == "mvnd" and returncode != 0 and not stopped
+            and log.grep("|".join(map(re.escape, MVND_DAEMON_FAILURES)), 0, 1)[1]
+        )
+        if daemon_failed:
+            _stop_mvnd()
+            note += "Maven daemon failed during the build; restarted it and retried.\n"
+            log.add("---- retrying after Maven daemon failure ----")
+            returncode, usage = _stream_to_log(cmd, log, limits, watcher)
+        if usage.exceeded:
+            note += usage.summary() + "\n"
+        return returncode, log, note, usage
+    finally:
+        log.close()
+
+
+@dataclass
+class MavenPlan:
+    """
+    What a test run will do.
+
+    args is None when there is nothing to run; header is then the message
+    to return. prepare, if set, runs right before Maven (in a worker thread
+    for background jobs) and returns a note for the output; it raises
+    FastBuildError when the run must not go ahead. record_classpath is the
+    POM fingerprint to store with the classpath a passing clean build wrote.
+    flaky is the policy for known-flaky tests (see run_maven_tests).
+    baseline is whether a passing run records the sources as the new
+    incremental baseline; runs of hand-picked tests do not.
+    """
+    args: list | None
+    header: str
+    hashes: dict
+    full_run: bool = True
+    prepare: Callable | None = None
+    record_classpath: str | None = None
+    flaky: str = "report"
+    baseline: bool = True
+    created: float = field(default_factory=time.time)
+
+
+# surefire:test and JaCoCo run as plain goals on the fast path
+JACOCO_PLUGIN = "org.jacoco:jacoco-maven-plugin:0.8.11"
+
+
+def _plan_maven_run(incremental: bool, forks: int, per_test_coverage: bool = False,
+                    compile_only: bool = False, flaky: str = "report", tests: str = "") -> MavenPlan:
+    """
+    Work out the Maven arguments for a test run.
+    """
+    if flaky not in FLAKY_POLICIES:
+        raise ValueError(f"Unknown flaky policy {flaky!r}; use one of {', '.join(FLAKY_POLICIES)}.")
+    if tests and (incremental or compile_only):
+        raise ValueError("tests picks the tests itself; it cannot be combined with incremental or compile_only.")
+    if per_test_coverage and forks > 1:
+        # The profile starts every fork's agent on a fresh jacoco.exec
+        raise ValueError("per_test_coverage records into a fresh jacoco.exec; it cannot be combined with forks > 1.")
+    plan = MavenPlan(["clean", "test", "-B"], "", _hash_sources(), flaky=flaky)
+    previous_hashes = _load_source_hashes() if incremental or compile_only else None
+
+    if tests:
+        # Hand-picked tests: no clean, and nothing to learn for the baseline
+        plan.args = ["test", "-B", "-Dtest=" + tests, "-DfailIfNoTests=false"]
+        plan.full_run = False
+        plan.baseline = False
+        plan.header = f"Running the given tests: {tests}\n\n"
+
+    elif compile_only:
+        reason = fast_build.unavailable_reason(CODEBASE_DIR, CACHE_DIR, [CLASSES_DIR, TEST_CLASSES_DIR])
+        if reason is None and previous_hashes is None:
+            reason = "no passing run recorded to compare sources with"
+        changed = _changed_sources(previous_hashes or {}, plan.hashes)
+        deleted = [p for p in changed if p not in plan.hashes and p.endswith(".java")]
+        if reason is None and deleted:
+            reason = f"{len(deleted)} source file(s) were deleted"
+
+        if reason is not None:
+            # Fall back to a clean build that also records the classpath
+            plan.args += fast_build.classpath_args(CACHE_DIR)
+            plan.record_classpath = fast_build.pom_fingerprint(CODEBASE_DIR)
+            plan.header = f"Compile-only fast path not available ({reason}); running a clean build.\n\n"
+            incremental = False
+        else:
+            if not changed:
+                return MavenPlan(None, "No changes under codebase/src since the last successful run; no tests to run.", plan.hashes)
+            tests = _select_affected_tests(changed)
+            if not tests:
+                _save_source_hashes(plan.hashes)
+                return MavenPlan(None, (
+                    f"{len(changed)} changed file(s) under codebase/src, "
+                    "but no test classes are affected; no tests to run."
+                ), plan.hashes)
+
+            plan.args = [
+                "-B",
+                f"{JACOCO_PLUGIN}:prepare-agent",
+                "surefire:test",
+                f"{JACOCO_PLUGIN}:report",
+                "-Dtest=" + ",".join(tests),
+                "-DfailIfNoTests=false",
+            ]
+            plan.full_run = False
+            plan.prepare = lambda: fast_build.compile_changed(CODEBASE_DIR, CACHE_DIR, changed)
+            plan.header = (
+                f"Compile-only run: {len(changed)} changed file(s) compiled into target/, "
+                f"{len(tests)} test class(es) selected:\n"
+                + "\n".join(f"  - {t}" for t in tests)
+                + "\n\n"
+            )
+
+    elif incremental and previous_hashes is not None:
+        changed = _changed_sources(previous_hashes, plan.hashes)
+        if not changed:
+            return MavenPlan(None, "No changes under codebase/src since the last successful run; no tests to run.", plan.hashes)
+
+        tests = _select_affected_tests(changed)
+        if not tests:
+            _save_source_hashes(plan.hashes)
+            return MavenPlan(None, (
+                f"{len(changed)} changed file(s) under codebase/src, "
+                "but no test classes are affected; no tests to run."
+            ), plan.hashes)
+
+        plan.args = ["test", "-B", "-Dtest=" + ",".join(tests), "-DfailIfNoTests=false"]
+        plan.full_run = False
+        plan.header = (
+            f"Incremental run: {len(changed)} changed file(s), "
+            f"{len(tests)} test class(es) selected:\n"
+            + "\n".join(f"  - {t}" for t in tests)
+            + "\n\n"
+        )
+
+    if forks > 1:
+        plan.args += _parallel_args(forks)
+    if per_test_coverage:
+        plan.args.append("-Pjacoco-per-test")
+
+    quarantined = sorted(_known_flaky(plan)) if flaky == "quarantine" else []
+    if quarantined:
+        exclude = flaky_tests.method_filter(quarantined, exclude=True)
+        selection = next((a for a in plan.args if a.startswith("-Dtest=")), None)
+        if selection is not None:
+            plan.args[plan.args.index(selection)] = f"{selection},{exclude}"
+        else:
+            # -Dtest replaces the POM's includes, so repeat them
+            plan.args += [f"-Dtest=**/*Test.java,{exclude}", "-DfailIfNoTests=false"]
+        if forks <= 1:
+            plan.args.append(f"-Dcommons.surefire.version={SUREFIRE_FILTER_VERSION}")
+        plan.header += (
+            f"Quarantined {len(quarantined)} known-flaky test(s):\n"
+            + "\n".join(f"  - {t}" for t in quarantined)
+            + "\n\n"
+        )
+
+    return plan
+
+
+def _known_flaky(plan: MavenPlan) -> set[str]:
+    # Flaky verdicts recorded on the sources the plan was made for
+    return flaky_tests.known_flaky(flaky_tests.load(CACHE_DIR, flaky_tests.sources_key(plan.hashes)))
+
+
+def _finish_maven_run(returncode: int, elapsed: float, forks: int, plan: MavenPlan) -> str:
+    """
+    Record the outcome of a test run and return the footer for its output.
+    """
+    footer = f"\n\nWall-clock: {elapsed:.1f}s with {forks} fork(s)"
+    if plan.full_run:
+        # Only full runs are comparable with each other
+        baseline = _load_run_timings().get("1")
+        if forks > 1 and baseline:
+            footer += f", {baseline / elapsed:.2f}x speedup over 1 fork ({baseline:.1f}s)"
+        if forks > 1 and os.path.exists(JACOCO_EXEC_PATH):
+            sessions, _classes = jacoco_exec.read_exec(JACOCO_EXEC_PATH)
+            footer += f"; merged JaCoCo data from {len(sessions)} session(s)"
+        # A failing run may stop early, which would skew the fork timings
+        if returncode == 0:
+            _record_run_timing(forks, elapsed)
+
+    if returncode != 0 and plan.flaky != "quarantine":
+        known = _failed_keys(_fresh_test_results(plan.created)) & _known_flaky(plan)
+        if known:
+            footer += (
+                f"\n{len(known)} failing test(s) are known to be flaky: {', '.join(sorted(known))}"
+                " (see detect_flaky_tests; flaky=\"retry\" or \"quarantine\" handles them)."
+            )
+
+    snapshot = snapshot_coverage_if_changed("full run" if plan.full_run else "partial run")
+    if snapshot:
+        footer += f"\nCoverage snapshot {snapshot} saved; compare runs with coverage_diff."
+
+    # Only a passing run becomes the new baseline, so failing tests are
+    # selected again next time
+    if returncode == 0 and plan.baseline:
+        _save_source_hashes(plan.hashes)
+        if plan.record_classpath and fast_build.record_state(CACHE_DIR, plan.record_classpath):
+            footer += "\nRecorded the dependency classpath; compile_only runs can use the fast path now."
+
+    return footer
+
+
+def _retry_flaky(plan: MavenPlan, backend: str, limits: process_tree.Limits) -> tuple[bool, str]:
+    """
+    Rerun the failed tests of a run, up to FLAKY_RETRIES times, when every
+    one of them is known to be flaky. Returns (passed on a retry, note).
+    """
+    failed = _failed_keys(_fresh_test_results(plan.created))
+    if not failed or not failed <= _known_flaky(plan):
+        return False, ""
+
+    for attempt in range(1, FLAKY_RETRIES + 1):
+        started = time.time()
+        returncode, log, _note, _usage = _run_maven([
+            "-B",
+            f"{JACOCO_PLUGIN}:prepare-agent",
+            "surefire:test",
+            "-Dtest=" + flaky_tests.method_filter(failed),
+            "-DfailIfNoTests=false",
+            f"-Dcommons.surefire.version={SUREFIRE_FILTER_VERSION}",
+        ], backend, limits)
+        if returncode == 0:
+            return True, (
+                f"\nAll {len(failed)} failure(s) were known-flaky tests; they passed on retry "
+                f"{attempt} (build log {log.id}): {', '.join(sorted(failed))}"
+            )
+        still = _failed_keys(_fresh_test_results(started))
+        if not still:
+            # The retry itself broke (no reports), not the tests
+            return False, f"\nRetrying known-flaky failures did not run any test (build log {log.id})."
+        failed = still
+    return False, (
+        f"\nKnown-flaky test(s) still failing after {FLAKY_RETRIES} retries: {', '.join(sorted(failed))}"
+    )
+
+
+def _selected_classes(args: list) -> list[str]:
+    """
+    The test classes a -Dtest selection in args names, or [] when there is
+    no selection or it uses patterns (then the run's classes are unknown).
+    """
+    selection = next((a[len("-Dtest="):] for a in args if a.startswith("-Dtest=")), "")
+    classes = []
+    for entry in selection.split(","):
+        entry = entry.strip()
+        if not entry or entry.startswith("!"):
+            continue
+        name = entry.partition("#")[0]
+        if any(ch in name for ch in "*?/%[") or name.endswith(".java"):
+            return []
+        classes.append(name)
+    return classes
+
+
+def _fail_fast_report(watcher: surefire_stream.FailFastWatcher) -> str:
+    if watcher.failure is not None:
+        return (
+            f"Fail-fast: stopped Maven at the first failure, after {len(watcher.completed)} test class(es).\n"
+            + json.dumps(watcher.failure, indent=2) + "\n\n"
+        )
+    if watcher.done:
+        return (
+            f"Fail-fast: all {len(watcher.targets)} selected test class(es) passed; "
+            "stopped Maven before the remaining goals (the coverage report was not updated).\n\n"
+        )
+    return "Fail-fast: no test failed before Maven exited.\n\n"
+
+
+@tool
+def run_maven_tests(incremental: bool = False, backend: str = "mvn", forks: int = 1,
+                    per_test_coverage: bool = False, compile_only: bool = False,
+                    flaky: str = "report", fail_fast: bool = False, tests: str = "") -> str:
+    """
+    Run the codebase's Maven tests and return the tail of the output (the
+    rest is in a build log, see build_log). Blocks until Maven exits and
+    refuses to start while a background job is using codebase/target;
+    README.md ("Running Maven tests") describes each option in full.
+
+    incremental: run only the tests affected by changes since the last passing run.
+    backend: "mvn" or "mvnd" (the Maven daemon, see maven_daemon_status).
+    forks: number of test JVMs to run at once.
+    per_test_coverage: record JaCoCo data per test class for the test impact index.
+    compile_only: javac the changed files into target/ and run the affected tests.
+    flaky: "report", "retry" or "quarantine" tests detect_flaky_tests found flaky.
+    fail_fast: stop at the first failing test and return it as JSON.
+    tests: run only these tests, as for surefire's -Dtest ("FooTest#testBar").
+    """
+    try:
+        if forks < 1:
+            return "forks must be at least 1."
+
+        limits = process_tree.limits_for("run_maven_tests")
+        with _exclusive_build():
+            plan = _plan_maven_run(incremental, forks, per_test_coverage, compile_only, flaky, tests)
+            if plan.args is None:
+                return plan.header
+
+            watcher = None
+            if fail_fast:
+                targets = _selected_classes(plan.args) if not plan.full_run else []
+                watcher = surefire_stream.FailFastWatcher(targets, SUREFIRE_REPORTS_DIR, plan.created)
+
+            started = time.perf_counter()
+            prepared = ""
+            if plan.prepare is not None:
+                try:
+                    prepared = plan.prepare() + "\n"
+                except fast_build.FastBuildError as e:
+                    return plan.header + str(e)
+            returncode, log, note, usage = _run_maven(plan.args, backend, limits, watcher)
+            if usage.exceeded:
+                plan.full_run = False
+            stopped = ""
+            if watcher is not None:
+                stopped = _fail_fast_report(watcher)
+                if watcher.done:
+                    # Stopped early: not comparable with complete full runs
+                    plan.full_run = False
+                    returncode = 1 if watcher.failure is not None else 0
+            retried = ""
+            if returncode != 0 and flaky == "retry":
+                passed, retried = _retry_flaky(plan, backend, limits)
+                if passed:
+                    returncode = 0
+            elapsed = time.perf_counter() - started
+            footer = retried + _finish_maven_run(returncode, elapsed, forks, plan)
+
+            # Return the last 2000 characters; the full output stays in the log
+            return (
+                stopped + note + plan.header + prepared + log.tail(2000) + footer
+                + f"\nFull output: {log.line_count} lines in build log {log.id}; "
+                "page or search it with build_log."
+            )
+    except (ValueError, MavenBusyError) as e:
+        return str(e)
+    except Exception as e:
+        return f"Error running mvn test: {e}"
+
+
+@tool
+def maven_daemon_status(restart: bool = False) -> str:
+    """
+    Report the Maven daemons (mvnd) used by run_maven_tests(backend="mvnd").
+
+    With restart=True all daemons are stopped first; the next daemon build
+    starts a fresh one.
+    """
+    try:
+        lines = []
+        if restart:
+            # Stopping the daemons would break a build running on one
+            with _exclusive_build():
+                _stop_mvnd()
+            lines.append("Stopped all Maven daemons.")
+
+        daemons = _mvnd_daemons()
+        if not daemons:
+            lines.append("No Maven daemon running; the next mvnd build will start one.")
+        for d in daemons:
+            lines.append(f"- daemon {d['id']} (pid {d['pid']}): {d['status']}")
+        return "\n".join(lines)
+    except FileNotFoundError:
+        return "mvnd is not installed or not on PATH."
+    except MavenBusyError as e:
+        return str(e)
+    except Exception as e:
+        return f"Error checking Maven daemon: {e}"
+
+
+# Background test runs started with start_maven_tests
+maven_job_queue = maven_jobs.JobQueue(BUILD_LOG_DIR, _build_lock)
+
+
+@tool
+async def start_maven_tests(incremental: bool = False, backend: str = "mvn", forks: int = 1,
+                            per_test_coverage: bool = False, compile_only: bool = False,
+                            flaky: str = "report") -> str:
+    """
+    Start a Maven test run in the background and return its job id at once.
+
+    Takes the same options as run_maven_tests except tests, fail_fast and
+    flaky="retry". Jobs run one at a time and work out what to run when
+    they start; follow one with maven_job_status and stop it with
+    cancel_maven_job.
+    """
+    try:
+        if forks < 1:
+            return "forks must be at least 1."
+        if flaky == "retry":
+            return "flaky=\"retry\" needs the blocking run_maven_tests; use \"report\" or \"quarantine\" here."
+        if flaky not in FLAKY_POLICIES:
+            return f"Unknown flaky policy {flaky!r}; use one of {', '.join(FLAKY_POLICIES)}."
+        executable = _maven_executable(backend)
+        limits = process_tree.limits_for("start_maven_tests")
+        planned = {}
+
+        def before(job: maven_jobs.MavenJob) -> str:
+            # Planned when the job starts, against the sources as they are
+            # then; a failed compile raises, which ends the job with "error"
+            plan = planned["plan"] = _plan_maven_run(incremental, forks, per_test_coverage,
+                                                     compile_only, flaky)
+            if plan.args is None:
+                return plan.header
+            job.cmd = [executable] + plan.args
+            job.description = " ".join(plan.args)
+            notes = [plan.header.rstrip("\n"), plan.prepare() if plan.prepare is not None else ""]
+            if backend == "mvnd":
+                notes.append(_ensure_mvnd_healthy())
+            return "\n".join(n for n in notes if n)
+
+        def after(returncode: int, elapsed: float) -> str:
+            return _finish_maven_run(returncode, elapsed, forks, planned["plan"])
+
+        kind = "compile-only" if compile_only else "incremental" if incremental else "full"
+        description = f"{kind} test run (planned when it starts)"
+        job = maven_job_queue.submit(description, [], CODEBASE_DIR, before, after, limits)
+        position = sum(1 for j in maven_job_queue.jobs.values() if not j.done) - 1
+        return (
+            f"Started {job.id}: {description}\n"
+            + (f"{position} job(s) ahead of it in the queue.\n" if position else "")
+            + f"Use maven_job_status(\"{job.id}\") to follow it."
+        )
+    except ValueError as e:
+        return str(e)
+    except Exception as e:
+        return f"Error starting mvn test: {e}"
+
+
+@tool
+def maven_job_status(job_id: str, since_line: int = 0, max_lines: int = 200) -> str:
+    """
+    Report a background Maven job: status, per-test-class results so far,
+    and output lines starting at since_line.
+
+    Pass the returned next_line as since_line on the next call to stream
+    only the new output.
+    """
+    job = maven_job_queue.jobs.get(job_id)
+    if job is None:
+        return f"Unknown job {job_id!r}. Known jobs: {', '.join(maven_job_queue.jobs) or 'none'}"
+
+    now = job.finished or time.time()
+    lines = [f"{job.id}: {job.status} ({job.description})"]
+    if job.started:
+        lines.append(f"Elapsed: {now - job.started:.1f}s")
+    if job.returncode is not None:
+        lines.append(f"Exit code: {job.returncode}")
+    if job.stopped:
+        lines.append(job.stopped)
+
+    if job.tests:
+        failed = [t for t in job.tests if not t.ok]
+        lines.append(
+            f"Test classes finished: {len(job.tests)}, "
+            f"tests run: {sum(t.tests for t in job.tests)}, "
+            f"classes with failures/errors: {len(failed)}"
+        )
+        for t in failed:
+            lines.append(f"  - FAILED {t.name}: {t.failures} failure(s), {t.errors} error(s)")
+
+    chunk = job.log.lines(since_line, max_lines)
+    next_line = since_line + len(chunk)
+    lines.append("")
+    lines.append(
+        f"Output lines {since_line}-{next_line} of {job.log.line_count} "
+        f"(next_line={next_line}, build log {job.log.id}):"
+    )
+    lines.extend(chunk)
+    return "\n".join(lines)
+
+
+@tool
+def cancel_maven_job(job_id: str) -> str:
+    """
+    Cancel a queued or running background Maven job.
+    """
+    job = maven_job_queue.cancel(job_id)
+    if job is None:
+        return f"Unknown job {job_id!r}."
+    if job.status != maven_jobs.CANCELLED:
+        return f"{job.id} already finished: {job.status}."
+    return f"{job.id} cancelled."
+
+
+@tool
+def list_maven_jobs() -> str:
+    """
+    List background Maven jobs, oldest first.
+    """
+    if not maven_job_queue.jobs:
+        return "No Maven jobs have been started."
+    lines = []
+    for job in maven_job_queue.jobs.values():
+        lines.append(f"- {job.id}: {job.status} ({job.description})")
+    return "\n".join(lines)
+
+
+@tool
+def build_log(log_id: str = "", start: int = -200, count: int = 200, grep: str = "",
+              context: int = 3, max_matches: int = 20, ignore_case: bool = False) -> str:
+    """
+    Page through or search the saved output of a Maven build.
+
+    log_id is the id printed by run_maven_tests or maven_job_status; empty
+    means the newest log, and "list" lists the logs kept on disk.
+
+    Without grep, returns `count` lines starting at line `start` (0-based;
+    a negative start counts from the end, so the default is the last 200
+    lines). With grep, returns every match of that regular expression with
+    `context` lines around it, e.g. grep="ERROR|FAIL|Tests in error".
+    """
+    try:
+        if log_id == "list":
+            ids = build_logs.list_logs(BUILD_LOG_DIR)
+            return "\n".join(f"- {i}" for i in ids) if ids else "No build logs yet."
+
+        log = build_logs.find_log(BUILD_LOG_DIR, log_id)
+        if log is None:
+            return f"No build log {log_id!r}. Use build_log(\"list\") to see the saved logs."
+
+        state = "" if log.closed else ", still being written"
+        if grep:
+            blocks, matches = log.grep(grep, context, max_matches, ignore_case)
+            lines = [f"Build log {log.id} ({log.line_count} lines{state}): {matches} match(es) for {grep!r}"]
+            if matches > max_matches:
+                lines.append(f"Showing the first {max_matches}.")
+            for first, block in blocks:
+                lines.append("")
+                lines.append(f"-- lines {first}-{first + len(block) - 1} --")
+                lines.extend(block)
+            return "\n".join(lines)
+
+        if start < 0:
+            start = max(log.line_count + start, 0)
+        chunk = log.lines(start, count)
+        lines = [
+            f"Build log {log.id}: lines {start}-{start + len(chunk)} "
+            f"of {log.line_count}{state}:"
+        ]
+        lines.extend(chunk)
+        return "\n".join(lines)
+    except re.error as e:
+        return f"Invalid grep pattern {grep!r}: {e}"
+    except Exception as e:
+        return f"Error reading build log: {e}"
+
+
+@tool
+@tool_cache.memoize(lambda: tool_cache.tree_fingerprint(SUREFIRE_REPORTS_DIR))
+def surefire_test_report(slowest: int = 10, class_prefix: str = "") -> str:
+    """
+    Structured results from codebase/target/surefire-reports as JSON.
+
+    Returns {"totals", "failures", "slowest"}: counts per status and total
+    time, every failed or erroring test with its message, and the `slowest`
+    slowest tests. class_prefix (e.g. "org.apache.commons.lang3.time")
+    restricts the report to matching test classes.
+    """
+    if not os.path.isdir(SUREFIRE_REPORTS_DIR):
+        return (
+            f"Surefire reports not found: {SUREFIRE_REPORTS_DIR}\n"
+            "Run `run_maven_tests` first."
+        )
+
+    try:
+        results = surefire_reports.load_results(SUREFIRE_REPORTS_DIR)
+        if class_prefix:
+            results = [r for r in results if r.class_name.startswith(class_prefix)]
+        return json.dumps(surefire_reports.summarize(results, slowest), indent=2)
+    except Exception as e:
+        return f"Error reading surefire reports: {e}"
+
+
+@tool
+def select_tests_for_change(class_name: str, lines: str = "", method: str = "") -> str:
+    """
+    List the test classes that execute a main class, using the test impact
+    index built from per-test coverage.
+
+    Example inputs:
+      class_name="org.apache.commons.lang3.StringUtils", method="abbreviate"
+      class_name="org.apache.commons.lang3.StringUtils", lines="210-215,340"
+
+    lines are source line numbers; tests of the methods containing them are
+    returned. Without lines or method, every test touching the class's
+    source file is returned.
+    """
+    try:
+        index = _load_test_impact()
+        if index is None:
+            return (
+                "No per-test coverage data in codebase/target/jacoco.exec.\n"
+                "Run `run_maven_tests(per_test_coverage=True)` first."
+            )
+
+        source = test_impact.source_for_class(class_name, CLASSES_DIR)
+        if source is None:
+            return f"No compiled class for {class_name} in {CLASSES_DIR}."
+
+        wanted = None
+        if lines.strip():
+            wanted = set()
+            for part in lines.split(","):
+                lo, _sep, hi = part.strip().partition("-")
+                wanted.update(range(int(lo), int(hi or lo) + 1))
+
+        if source in index["stale"]:
+            return (
+                f"{source} was recompiled after its per-test coverage data was recorded.\n"
+                "Run `run_maven_tests(per_test_coverage=True)` again."
+            )
+        tests = test_impact.tests_for(index, source, wanted, method or None)
+        if tests is None:
+            return f"No test executes {source} according to the per-test coverage data."
+        if not tests:
+            return f"No test executes the selected code in {source}."
+
+        return (
+            f"{len(tests)} of {len(index['tests'])} test class(es) execute the selected code in {source}:\n"
+            + "\n".join(f"  - {t}" for t in tests)
+        )
+    except Exception as e:
+        return f"Error querying test impact index: {e}"
+
+
+@tool
+def detect_flaky_tests(test_classes: str, runs: int = 5, forks: int = 2, seed: int = 0,
+                       backend: str = "mvn") -> str:
+    """
+    Rerun test classes several times in random order to find flaky tests,
+    and return per-test verdicts as JSON.
+
+    test_classes is a comma-separated list as for surefire's -Dtest, e.g.
+    "TimedSemaphoreTest,org.apache.commons.lang3.time.StopWatchTest". The
+    test sources are compiled once; then the classes run `runs` times
+    with runOrder=random, each run in `forks` forked JVMs and with its own
+    order seed (seed, seed+1, ...; seed=0 picks a random start).
+
+    A test that passed in some runs and failed in others is "flaky" with a
+    score equal to its failure rate; one that failed every time is
+    "failing". Results are added to the history of earlier detections on
+    the same sources, so run_maven_tests(flaky="retry" or "quarantine") can
+    act on them; any change under codebase/src starts a new history. Each
+    run reports its seed and the order the classes ran in, to reproduce an
+    order-dependent failure.
+
+    The runs are sequential, as they share codebase/target and its surefire
+    reports: expect about `runs` times the time of one run. Like
+    run_maven_tests, it refuses to start while a background job is using
+    codebase/target.
+    """
+    try:
+        if not 2 <= runs <= 50:
+            return "runs must be between 2 and 50."
+        if forks < 1:
+            return "forks must be at least 1."
+        classes = [c.strip() for c in test_classes.split(",") if c.strip()]
+        if not classes:
+            return "Give at least one test class."
+
+        limits = process_tree.limits_for("detect_flaky_tests")
+        with _exclusive_build():
+            returncode, log, note, _usage = _run_maven(["-B", "test-compile"], backend, limits)
+            if returncode != 0:
+                return note + f"Compiling the tests failed:\n{log.tail(2000)}\nBuild log {log.id}."
+
+            base_seed = seed or random.randrange(1, 2**31)
+            sources = flaky_tests.sources_key(_hash_sources())
+            history = flaky_tests.load(CACHE_DIR, sources)
+            run_rows = []
+            seen = set()
+            for i in range(runs):
+                run_seed = base_seed + i
+                started = time.time()
+                returncode, log, _note, usage = _run_maven([
+                    "-B",
+                    f"{JACOCO_PLUGIN}:prepare-agent",
+                    "surefire:test",
+                    "-Dtest=" + ",".join(classes),
+                    "-DfailIfNoTests=false",
+                    "-Dsurefire.runOrder=random",
+                    f"-Dsurefire.runOrder.random.seed={run_seed}",
+                    f"-DforkCount={forks}",
+                    "-DreuseForks=true",
+                    f"-Dcommons.surefire.version={SUREFIRE_SEED_VERSION}",
+                ], backend, limits)
+                results = _fresh_test_results(started)
+                lines = log.lines(0, log.line_count)
+                used_seed = flaky_tests.seed_from_output(lines)
+                flaky_tests.record(history, used_seed if used_seed is not None else run_seed, results)
+                seen.update(r.class_name for r in results)
+                row = {
+                    "run": i + 1,
+                    "seed": used_seed if used_seed is not None else run_seed,
+                    "exit_code": returncode,
+                    "tests": len(results),
+                    "failed": sorted(_failed_keys(results)),
+                    "class_order": flaky_tests.class_order(lines),
+                    "build_log": log.id,
+                }
+                if usage.exceeded:
+                    # e.g. a test that hangs in some orders; its report is missing
+                    row["stopped"] = usage.summary()
+                run_rows.append(row)
+            flaky_tests.save(CACHE_DIR, history, sources)
+
+            rows = flaky_tests.summarize(history, seen)
+            return json.dumps({
+                "runs": run_rows,
+                "flaky": [r for r in rows if r["verdict"] == flaky_tests.FLAKY],
+                "failing": [r for r in rows if r["verdict"] == flaky_tests.FAILING],
+                "stable": sum(1 for r in rows if r["verdict"] == flaky_tests.STABLE),
+            }, indent=2)
+    except MavenBusyError as e:
+        return str(e)
+    except Exception as e:
+        return f"Error detecting flaky tests: {e}"